@@ -1,4 +1,7 @@
+from sqlalchemy import select, insert, func, tuple_
 from sqlalchemy.orm import Session
+from app.database import database
+from app.utils.tracing import traced
 from app.models.pdf_chunk import PDFChunk
 from app.models.documents import Document
 from fastapi import HTTPException
@@ -45,6 +48,39 @@ def insert_pdf_chunks(db: Session, chunks: list[dict]):
             detail=f"Chunk insertion failed: {str(e)}"
         )
 
+def ensure_document(db: Session, document_id: int, name: str = None) -> Document:
+    """Return the document row, creating a placeholder if it doesn't exist yet"""
+    document = db.query(Document).filter(Document.id == document_id).first()
+    if not document:
+        document = Document(id=document_id, name=name or f"Document {document_id}")
+        db.add(document)
+        db.flush()
+    return document
+
+def bulk_insert_chunks(db: Session, chunks: list[dict]) -> int:
+    """
+    Insert a batch of chunk dicts with a single executemany.
+
+    No ORM objects are created and nothing is committed, so callers can
+    stream many batches through one transaction with bounded memory.
+    """
+    if not chunks:
+        return 0
+    db.execute(
+        insert(PDFChunk),
+        [
+            {
+                "document_id": chunk["document_id"],
+                "chunk_index": chunk["chunk_index"],
+                "content": chunk["content"],
+                "vector": chunk.get("vector"),
+                "vector_id": chunk.get("vector_id"),
+            }
+            for chunk in chunks
+        ]
+    )
+    return len(chunks)
+
 def get_chunks(db: Session, document_id: int):
     """Retrieve chunks ordered by index"""
     return (
@@ -78,3 +114,49 @@ def get_all_chunks(db: Session):
 def get_chunks_by_ids(db: Session, chunk_ids: list[int]):
     """Get chunks by their IDs"""
     return db.query(PDFChunk).filter(PDFChunk.id.in_(chunk_ids)).all()
+
+# ---------- Async read paths (databases connection pool) ----------
+chunks_table = PDFChunk.__table__
+
+CHUNK_PREVIEW_LENGTH = 100
+
+@traced("db.fetch_chunk_page")
+async def fetch_chunk_page(
+    document_id: int = None,
+    has_vector: bool = None,
+    limit: int = 100,
+    after: tuple = None
+):
+    """
+    Keyset-paginated chunk listing that projects only the listing columns.
+
+    Rows are ordered by (document_id, chunk_index, id); `after` is the key of
+    the last row of the previous page. The vector array and the full content
+    never leave the database: only `vector IS NOT NULL` and a preview are read.
+    """
+    c = chunks_table.c
+    query = select(
+        c.id,
+        c.document_id,
+        c.chunk_index,
+        func.left(c.content, CHUNK_PREVIEW_LENGTH).label("preview"),
+        (func.length(c.content) > CHUNK_PREVIEW_LENGTH).label("truncated"),
+        c.vector.isnot(None).label("has_vector"),
+        c.vector_id,
+    )
+    if document_id is not None:
+        query = query.where(c.document_id == document_id)
+    if has_vector is not None:
+        query = query.where(c.vector.isnot(None) if has_vector else c.vector.is_(None))
+    if after is not None:
+        query = query.where(tuple_(c.document_id, c.chunk_index, c.id) > tuple_(*after))
+    query = query.order_by(c.document_id, c.chunk_index, c.id).limit(limit)
+    return await database.fetch_all(query)
+
+@traced("db.fetch_chunks_by_ids")
+async def fetch_chunks_by_ids(chunk_ids: list[int]):
+    """Get chunks by their IDs without blocking the event loop"""
+    if not chunk_ids:
+        return []
+    query = select(chunks_table).where(chunks_table.c.id.in_(chunk_ids))
+    return await database.fetch_all(query)
@@ -0,0 +1,137 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.reference_clauses import ReferenceClause, ReferenceLibraryVersion
+from app.utils.embeddings import Embedder, get_embedder
+from app.utils.tracing import traced
+
+clauses_table = ReferenceClause.__table__
+versions_table = ReferenceLibraryVersion.__table__
+
+def encode_vectors(vectors: np.ndarray) -> List[bytes]:
+    """One float32 byte string per row"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    return [row.tobytes() for row in vectors]
+
+def decode_vectors(blobs: List[bytes], dimension: int) -> np.ndarray:
+    """Stack stored vectors into one (len(blobs), dimension) float32 matrix"""
+    if not blobs:
+        return np.zeros((0, dimension), dtype=np.float32)
+    return np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(len(blobs), dimension)
+
+class LibraryVersionConflict(Exception):
+    """The library version being published was written by another publish"""
+
+# Publishes that lose the race for a version number retry with the next one
+PUBLISH_ATTEMPTS = 5
+
+def next_version(db: Session, product_type: str, jurisdiction: str) -> int:
+    v = versions_table.c
+    return (db.execute(
+        select(func.max(v.version)).where(v.product_type == product_type, v.jurisdiction == jurisdiction)
+    ).scalar() or 0) + 1
+
+@traced("db.publish_reference_library")
+def publish_library(
+    db: Session,
+    clauses: List[dict],
+    product_type: str,
+    jurisdiction: str,
+    embedder: Optional[Embedder] = None,
+    version: Optional[int] = None
+) -> Dict[str, object]:
+    """
+    Write `clauses` ({"text", "critical"}) as the next version of a library.
+    Every clause is embedded here, in one batched call, so loading the
+    library later never calls the embedding backend.
+
+    The version row and its clauses are committed together; the unique
+    (product_type, jurisdiction, version) constraint settles concurrent
+    publishes, and the loser retries with the next version. With `version`
+    exactly that version is written, or LibraryVersionConflict is raised.
+    """
+    if not clauses:
+        raise ValueError("A reference library needs at least one clause")
+    embedder = embedder or get_embedder()
+    blobs = encode_vectors(embedder.embed([clause["text"] for clause in clauses]))
+    for _ in range(PUBLISH_ATTEMPTS):
+        number = version or next_version(db, product_type, jurisdiction)
+        try:
+            library_id = db.execute(
+                insert(ReferenceLibraryVersion).values(
+                    product_type=product_type,
+                    jurisdiction=jurisdiction,
+                    version=number,
+                    clauses=len(clauses),
+                    embedding_backend=embedder.name,
+                    embedding_model=embedder.model,
+                )
+            ).inserted_primary_key[0]
+            db.execute(
+                insert(ReferenceClause),
+                [
+                    {
+                        "library_id": library_id,
+                        "product_type": product_type,
+                        "jurisdiction": jurisdiction,
+                        "version": number,
+                        "text": clause["text"],
+                        "critical": bool(clause.get("critical", False)),
+                        "embedding": blob,
+                        "embedding_backend": embedder.name,
+                        "embedding_model": embedder.model,
+                    }
+                    for clause, blob in zip(clauses, blobs)
+                ]
+            )
+            db.commit()
+            break
+        except IntegrityError:
+            db.rollback()
+            if version is not None:
+                raise LibraryVersionConflict(f"{product_type}/{jurisdiction} v{version} already exists")
+    else:
+        raise LibraryVersionConflict(
+            f"Could not publish {product_type}/{jurisdiction}: {PUBLISH_ATTEMPTS} concurrent publishes took every version tried"
+        )
+    return {
+        "product_type": product_type,
+        "jurisdiction": jurisdiction,
+        "version": number,
+        "clauses": len(clauses),
+        **embedder.info(),
+    }
+
+def latest_versions(db: Session) -> Dict[Tuple[str, str], int]:
+    """Latest version of every library, keyed by (product_type, jurisdiction)"""
+    v = versions_table.c
+    rows = db.execute(
+        select(v.product_type, v.jurisdiction, func.max(v.version)).group_by(v.product_type, v.jurisdiction)
+    ).all()
+    return {(product_type, jurisdiction): version for product_type, jurisdiction, version in rows}
+
+def list_libraries(db: Session) -> List[Dict[str, object]]:
+    """Every library version with its clause count"""
+    v = versions_table.c
+    rows = db.execute(
+        select(v.product_type, v.jurisdiction, v.version, v.clauses, v.created_at)
+        .order_by(v.product_type, v.jurisdiction, v.version)
+    ).all()
+    return [
+        {"product_type": p, "jurisdiction": j, "version": n, "clauses": count, "published_at": published}
+        for p, j, n, count, published in rows
+    ]
+
+@traced("db.load_reference_library")
+def load_library(db: Session, product_type: str, jurisdiction: str, version: int) -> List[tuple]:
+    """(text, critical, embedding, embedding_backend, embedding_model) rows of one library version"""
+    c = clauses_table.c
+    return db.execute(
+        select(c.text, c.critical, c.embedding, c.embedding_backend, c.embedding_model)
+        .where(c.product_type == product_type, c.jurisdiction == jurisdiction, c.version == version)
+        .order_by(c.id)
+    ).all()
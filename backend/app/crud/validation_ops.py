@@ -7,22 +7,21 @@ class ValidationOperations:
 
     def validate_termsheet(self, termsheet_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Main validation logic for a termsheet.
+        Validate extracted termsheet fields against the field rules of the
+        rule packs (required fields, ranges, date order).
         """
-        # Example: Check if required fields are present
-        required_fields = ["deal_name", "issuer", "amount", "currency", "maturity_date"]
-        missing_fields = [field for field in required_fields if field not in termsheet_data]
+        from app.validation.rules import evaluate_rules
 
-        if missing_fields:
+        report = evaluate_rules(None, termsheet_data, termsheet_data.get("product_type"))
+        if report.errors:
             return {
                 "status": "failed",
-                "missing_fields": missing_fields,
-                "message": "Validation failed due to missing fields."
+                **report.to_dict(),
+                "message": "Validation failed due to field rule violations."
             }
-
-        # Placeholder logic for real validation
         return {
             "status": "success",
+            **report.to_dict(),
             "message": "Termsheet validated successfully.",
             "data": termsheet_data
         }
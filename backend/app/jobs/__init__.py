@@ -0,0 +1,8 @@
+from .queue import get_queue, SQLiteJobQueue, RedisJobQueue, QUEUED, RUNNING, SUCCEEDED, FAILED
+from .tasks import task, encode_file, PermanentJobError
+
+
+__all__ = [
+    "get_queue", "SQLiteJobQueue", "RedisJobQueue", "QUEUED", "RUNNING", "SUCCEEDED", "FAILED",
+    "task", "encode_file", "PermanentJobError",
+]
@@ -0,0 +1,369 @@
+import os
+import json
+import time
+import uuid
+import random
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+JOB_QUEUE_URL = os.getenv("JOB_QUEUE_URL") or os.getenv("REDIS_URL") or "sqlite:///jobs.sqlite3"
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "300"))
+# A running job whose worker hasn't finished it within the lease is handed to another worker
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "900"))
+# How long Redis remembers an idempotency key after its job was enqueued
+JOB_IDEMPOTENCY_TTL_SECONDS = int(os.getenv("JOB_IDEMPOTENCY_TTL_SECONDS", str(7 * 24 * 3600)))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+def retry_delay(attempts: int, base: float = JOB_RETRY_BASE_SECONDS, cap: float = JOB_RETRY_MAX_SECONDS) -> float:
+    """Exponential backoff with full jitter for the given (1-based) attempt count"""
+    return random.uniform(0, min(cap, base * 2 ** (attempts - 1)))
+
+
+def new_job(kind: str, payload: Dict[str, Any], priority: int, idempotency_key: Optional[str], max_attempts: int) -> Dict[str, Any]:
+    now = time.time()
+    return {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "payload": payload,
+        "priority": priority,
+        "status": QUEUED,
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "idempotency_key": idempotency_key,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+        "run_after": now,
+        "lease_expires": None,
+        "worker": None,
+    }
+
+
+class SQLiteJobQueue:
+    """
+    Job queue in a SQLite file, shared by processes on one host.
+
+    Used for tests and single-machine deployments; claims are atomic via
+    BEGIN IMMEDIATE, so any number of worker processes can poll it.
+    """
+
+    def __init__(self, path: str = "jobs.sqlite3"):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    idempotency_key TEXT,
+                    status TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    run_after REAL NOT NULL,
+                    lease_expires REAL,
+                    created_at REAL NOT NULL,
+                    data TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_ready ON jobs (status, priority DESC, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_idempotency ON jobs (idempotency_key)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _save(self, conn, job):
+        conn.execute(
+            "INSERT OR REPLACE INTO jobs (id, kind, idempotency_key, status, priority, run_after, lease_expires, created_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job["id"], job["kind"], job["idempotency_key"], job["status"], job["priority"],
+             job["run_after"], job["lease_expires"], job["created_at"], json.dumps(job)),
+        )
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        priority: int = 0,
+        idempotency_key: Optional[str] = None,
+        max_attempts: int = JOB_MAX_ATTEMPTS
+    ) -> Dict[str, Any]:
+        """
+        Queue a job, or return the live job already queued under the same
+        idempotency key. Higher priority runs first.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if idempotency_key:
+                row = conn.execute(
+                    "SELECT data FROM jobs WHERE idempotency_key = ? AND status != ? ORDER BY created_at DESC LIMIT 1",
+                    (idempotency_key, FAILED),
+                ).fetchone()
+                if row:
+                    conn.execute("COMMIT")
+                    return json.loads(row[0])
+            job = new_job(kind, payload, priority, idempotency_key, max_attempts)
+            self._save(conn, job)
+            conn.execute("COMMIT")
+            return job
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def claim(self, worker: str, lease_seconds: float = JOB_LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        """Take the highest-priority runnable job, leasing it to `worker`"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Jobs whose worker died mid-run become runnable again
+            for (data,) in conn.execute(
+                "SELECT data FROM jobs WHERE status = ? AND lease_expires < ?", (RUNNING, now)
+            ).fetchall():
+                self._save(conn, {**json.loads(data), "status": QUEUED, "lease_expires": None, "worker": None})
+            row = conn.execute(
+                "SELECT data FROM jobs WHERE status = ? AND run_after <= ? ORDER BY priority DESC, created_at LIMIT 1",
+                (QUEUED, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            job = json.loads(row[0])
+            job.update(status=RUNNING, attempts=job["attempts"] + 1, worker=worker,
+                       lease_expires=now + lease_seconds, updated_at=now)
+            self._save(conn, job)
+            conn.execute("COMMIT")
+            return job
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _finish(self, job_id: str, worker: str, update) -> Optional[Dict[str, Any]]:
+        """Apply `update` to a running job leased to `worker`; None if it no longer holds the lease"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT data FROM jobs WHERE id = ? AND status = ? AND json_extract(data, '$.worker') = ?",
+                (job_id, RUNNING, worker),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            job = update(json.loads(row[0]))
+            job["updated_at"] = time.time()
+            self._save(conn, job)
+            conn.execute("COMMIT")
+            return job
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def complete(self, job_id: str, worker: str, result: Any) -> Optional[Dict[str, Any]]:
+        """Record the result of `worker`'s run; None if the job was reclaimed from it"""
+        return self._finish(job_id, worker, lambda job: {
+            **job, "status": SUCCEEDED, "result": result, "error": None, "lease_expires": None
+        })
+
+    def fail(
+        self,
+        job_id: str,
+        worker: str,
+        error: str,
+        retry: bool = True,
+        retry_base: float = JOB_RETRY_BASE_SECONDS
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Record a failed attempt by `worker`: requeue with backoff, or fail for
+        good after max_attempts. None if the job was reclaimed from the worker.
+        """
+        def update(job):
+            job.update(error=error, lease_expires=None, worker=None)
+            if retry and job["attempts"] < job["max_attempts"]:
+                job.update(status=QUEUED, run_after=time.time() + retry_delay(job["attempts"], base=retry_base))
+            else:
+                job["status"] = FAILED
+            return job
+        return self._finish(job_id, worker, update)
+
+    def stats(self) -> Dict[str, int]:
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+class RedisJobQueue:
+    """
+    Job queue in Redis, shared by API replicas and workers on any host.
+
+    Jobs are JSON strings under `{prefix}:job:<id>`. Runnable jobs sit in the
+    `ready` sorted set scored by (-priority, enqueue time) and are claimed with
+    ZPOPMIN; retries wait in `delayed` scored by run_after; running jobs are
+    tracked in `running` scored by lease expiry.
+    """
+
+    # Keeps priority dominant over enqueue time in the ready-set score
+    PRIORITY_WEIGHT = 1e10
+
+    def __init__(self, url: str, prefix: str = "jobs"):
+        import redis
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.prefix,) + parts)
+
+    def _score(self, job) -> float:
+        return -job["priority"] * self.PRIORITY_WEIGHT + job["created_at"]
+
+    def _save(self, job, pipe=None):
+        (pipe or self.client).set(self._key("job", job["id"]), json.dumps(job))
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        priority: int = 0,
+        idempotency_key: Optional[str] = None,
+        max_attempts: int = JOB_MAX_ATTEMPTS
+    ) -> Dict[str, Any]:
+        job = new_job(kind, payload, priority, idempotency_key, max_attempts)
+        if idempotency_key:
+            idem_key = self._key("idem", idempotency_key)
+            while not self.client.set(idem_key, job["id"], nx=True, ex=JOB_IDEMPOTENCY_TTL_SECONDS):
+                existing = self.get(self.client.get(idem_key) or "")
+                if existing and existing["status"] != FAILED:
+                    return existing
+                # The earlier job failed for good (or expired): replace the key
+                self.client.delete(idem_key)
+        pipe = self.client.pipeline()
+        self._save(job, pipe)
+        pipe.zadd(self._key("ready"), {job["id"]: self._score(job)})
+        pipe.execute()
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        data = self.client.get(self._key("job", job_id))
+        return json.loads(data) if data else None
+
+    def _promote(self, now: float):
+        """Move due retries and expired leases back to the ready set"""
+        for set_name in ("delayed", "running"):
+            for job_id in self.client.zrangebyscore(self._key(set_name), 0, now):
+                if self.client.zrem(self._key(set_name), job_id):
+                    job = self.get(job_id)
+                    if job and job["status"] in (QUEUED, RUNNING):
+                        job.update(status=QUEUED, lease_expires=None, worker=None)
+                        self._save(job)
+                        self.client.zadd(self._key("ready"), {job_id: self._score(job)})
+
+    def claim(self, worker: str, lease_seconds: float = JOB_LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        self._promote(now)
+        popped = self.client.zpopmin(self._key("ready"))
+        if not popped:
+            return None
+        job = self.get(popped[0][0])
+        if job is None:
+            return None
+        job.update(status=RUNNING, attempts=job["attempts"] + 1, worker=worker,
+                   lease_expires=now + lease_seconds, updated_at=now)
+        pipe = self.client.pipeline()
+        self._save(job, pipe)
+        pipe.zadd(self._key("running"), {job["id"]: job["lease_expires"]})
+        pipe.execute()
+        return job
+
+    def _finish(self, job_id: str, worker: str, update) -> Optional[Dict[str, Any]]:
+        """
+        Apply `update(job, pipe)` to a running job leased to `worker`, in a
+        WATCH/MULTI transaction so a concurrent reclaim wins; None if the
+        worker no longer holds the lease.
+        """
+        from redis.exceptions import WatchError
+
+        key = self._key("job", job_id)
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    data = pipe.get(key)
+                    job = json.loads(data) if data else None
+                    if job is None or job["status"] != RUNNING or job["worker"] != worker:
+                        pipe.unwatch()
+                        return None
+                    pipe.multi()
+                    pipe.zrem(self._key("running"), job_id)
+                    update(job, pipe)
+                    job["updated_at"] = time.time()
+                    self._save(job, pipe)
+                    pipe.execute()
+                    return job
+                except WatchError:
+                    continue
+
+    def complete(self, job_id: str, worker: str, result: Any) -> Optional[Dict[str, Any]]:
+        def update(job, pipe):
+            job.update(status=SUCCEEDED, result=result, error=None, lease_expires=None)
+        return self._finish(job_id, worker, update)
+
+    def fail(
+        self,
+        job_id: str,
+        worker: str,
+        error: str,
+        retry: bool = True,
+        retry_base: float = JOB_RETRY_BASE_SECONDS
+    ) -> Optional[Dict[str, Any]]:
+        def update(job, pipe):
+            job.update(error=error, lease_expires=None, worker=None)
+            if retry and job["attempts"] < job["max_attempts"]:
+                job.update(status=QUEUED, run_after=time.time() + retry_delay(job["attempts"], base=retry_base))
+                pipe.zadd(self._key("delayed"), {job_id: job["run_after"]})
+            else:
+                job["status"] = FAILED
+        return self._finish(job_id, worker, update)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            QUEUED: self.client.zcard(self._key("ready")) + self.client.zcard(self._key("delayed")),
+            RUNNING: self.client.zcard(self._key("running")),
+        }
+
+
+_queue = None
+
+
+def get_queue(url: Optional[str] = None):
+    """
+    Job queue for JOB_QUEUE_URL: redis://... for Redis, sqlite:///path for a
+    local SQLite file (the default when neither JOB_QUEUE_URL nor REDIS_URL is set).
+    """
+    global _queue
+    if url is not None:
+        return _open_queue(url)
+    if _queue is None:
+        _queue = _open_queue(JOB_QUEUE_URL)
+    return _queue
+
+
+def _open_queue(url: str):
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisJobQueue(url)
+    if url.startswith("sqlite:///"):
+        return SQLiteJobQueue(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported job queue URL: {url}")
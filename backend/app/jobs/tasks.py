@@ -0,0 +1,54 @@
+import io
+import os
+import base64
+import asyncio
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException, UploadFile
+
+# Job kind -> handler(payload) returning a JSON-serialisable result
+TASKS: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+
+
+class PermanentJobError(Exception):
+    """A failure retrying can't fix (bad input); the job fails without further attempts"""
+
+
+def task(kind: str):
+    """Register a job handler for `kind`"""
+    def decorator(func):
+        TASKS[kind] = func
+        return func
+    return decorator
+
+
+def run_task(job: Dict[str, Any]) -> Any:
+    handler = TASKS.get(job["kind"])
+    if handler is None:
+        raise PermanentJobError(f"Unknown job kind '{job['kind']}'")
+    return handler(job["payload"])
+
+
+def encode_file(filename: str, data: bytes) -> Dict[str, str]:
+    """Job payload carrying an uploaded file, so any worker host can process it"""
+    return {"filename": filename, "content_b64": base64.b64encode(data).decode("ascii")}
+
+
+@task("validate_full")
+def validate_full(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the /validate/full pipeline on an uploaded document"""
+    from app.routers.validate import extract_text_from_file, run_full_validation
+
+    data = base64.b64decode(payload["content_b64"])
+    upload = UploadFile(file=io.BytesIO(data), filename=os.path.basename(payload["filename"]))
+    try:
+        text = extract_text_from_file(upload)
+    except Exception as e:
+        raise PermanentJobError(f"File parsing failed: {e}")
+    try:
+        result = asyncio.run(run_full_validation(text))
+    except HTTPException as e:
+        if e.status_code < 500:
+            raise PermanentJobError(str(e.detail))
+        raise
+    return result.model_dump(mode="json")
@@ -0,0 +1,96 @@
+"""
+Job worker processes.
+
+    python -m app.jobs.worker --processes 4
+
+Each process polls the queue (JOB_QUEUE_URL), runs one job at a time and
+records the result. Scale throughput by running more worker processes or
+hosts; the API only enqueues.
+"""
+import os
+import time
+import signal
+import socket
+import logging
+import argparse
+import traceback
+import multiprocessing
+from typing import Any, Dict, Optional
+
+from app.jobs.queue import get_queue
+from app.jobs.tasks import PermanentJobError, run_task
+
+logger = logging.getLogger(__name__)
+
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1.0"))
+
+
+def run_once(queue, worker_id: str) -> Optional[Dict[str, Any]]:
+    """Claim and run a single job; returns the finished job, or None if the queue was empty"""
+    job = queue.claim(worker_id)
+    if job is None:
+        return None
+    start = time.perf_counter()
+    try:
+        result = run_task(job)
+    except PermanentJobError as e:
+        logger.warning(f"Job {job['id']} ({job['kind']}) failed permanently: {e}")
+        return _finished(queue, job, queue.fail(job["id"], worker_id, str(e), retry=False))
+    except Exception as e:
+        logger.error(f"Job {job['id']} ({job['kind']}) attempt {job['attempts']} failed: {traceback.format_exc()}")
+        return _finished(queue, job, queue.fail(job["id"], worker_id, str(e)))
+    logger.info(f"Job {job['id']} ({job['kind']}) finished in {time.perf_counter() - start:.2f}s")
+    return _finished(queue, job, queue.complete(job["id"], worker_id, result))
+
+
+def _finished(queue, job: Dict[str, Any], recorded: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The recorded job, or its current state if the lease expired and another worker took it"""
+    if recorded is None:
+        logger.warning(f"Job {job['id']} ({job['kind']}) lease lost before it finished; outcome discarded")
+        return queue.get(job["id"]) or job
+    return recorded
+
+
+def run_worker(worker_id: Optional[str] = None, poll_interval: float = JOB_POLL_SECONDS):
+    """Process jobs until SIGTERM/SIGINT; the job in hand is finished first"""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    queue = get_queue()
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info(f"Worker {worker_id} started")
+    while not stopping:
+        if run_once(queue, worker_id) is None:
+            time.sleep(poll_interval)
+    logger.info(f"Worker {worker_id} stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run job worker processes")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("JOB_WORKER_PROCESSES", "1")))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+
+    if args.processes <= 1:
+        run_worker()
+        return
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=run_worker, name=f"worker-{i}") for i in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # Explicit router imports
@@ -8,10 +9,14 @@ from app.routers.analyze import router as analyze_router
 from app.routers.audit import router as audit_router
 from app.routers.dbops import router as dbops_router
 from app.routers.chat import router as chat_router
+from app.routers.health import router as health_router
+from app.routers.jobs import router as jobs_router
+from app.routers.reference_clauses import router as reference_clauses_router
 
-from app.models.base import Base
-from app.database import engine
 import app.models  # Ensure all models are registered
+from app.startup import on_startup, on_shutdown
+from app.utils.tracing import TimingMiddleware, render_metrics
+from app.utils.llm_client import render_llm_metrics
 
 # Initialize the FastAPI app
 app = FastAPI(
@@ -25,7 +30,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+# Per-stage latency histograms and the optional Server-Timing breakdown
+app.add_middleware(TimingMiddleware)
 
 # Include routers
 # Mount upload router without extra prefix (endpoints at /upload/...)
@@ -39,14 +47,26 @@ app.include_router(audit_router)
 app.include_router(dbops_router, prefix="/db", tags=["Database Operations"])
 # Chat endpoints under /api/chat
 app.include_router(chat_router, prefix="/api", tags=["Chat"])
+# Liveness and readiness probes under /health
+app.include_router(health_router)
+# Queued validations, processed by `python -m app.jobs.worker`
+app.include_router(jobs_router)
+app.include_router(reference_clauses_router)
 
-# Create tables from models
-Base.metadata.create_all(bind=engine)
+# Table creation, the async pool and model warm-up run in the background after
+# startup, so importing the app never touches the database or loads models
+app.add_event_handler("startup", on_startup)
+app.add_event_handler("shutdown", on_shutdown)
 
 @app.get("/", tags=["Root"])
 async def root():
     return {"message": "Welcome to the Termsheet Validation API"}
 
+@app.get("/metrics", tags=["Root"], response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint for stage and request latency histograms and LLM queues"""
+    return PlainTextResponse(render_metrics() + render_llm_metrics(), media_type="text/plain; version=0.0.4")
+
 # Optional: Run FastAPI app directly
 if __name__ == "__main__":
     import uvicorn
@@ -2,6 +2,7 @@ from .base import Base
 from .documents import Document
 from .pdf_chunk import PDFChunk
 from .validation_logs import ValidationLog
+from .reference_clauses import ReferenceClause, ReferenceLibraryVersion
 
 
-__all__ = ["Base", "Document", "PDFChunk", "ValidationLog"] 
\ No newline at end of file
+__all__ = ["Base", "Document", "PDFChunk", "ValidationLog", "ReferenceClause", "ReferenceLibraryVersion"] 
\ No newline at end of file
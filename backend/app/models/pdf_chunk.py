@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, ARRAY, Float
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, ARRAY, Float, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class PDFChunk(Base):
     __tablename__ = "pdf_chunks"
+    __table_args__ = (
+        # Backs keyset pagination over (document_id, chunk_index, id)
+        Index("ix_pdf_chunks_document_chunk", "document_id", "chunk_index", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     document_id = Column(Integer, ForeignKey("documents.id"))
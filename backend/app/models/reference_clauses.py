@@ -0,0 +1,49 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, LargeBinary, Index, ForeignKey, UniqueConstraint
+from app.database import Base
+
+class ReferenceLibraryVersion(Base):
+    """
+    One published version of a reference library. The unique constraint
+    makes a version number a claim: concurrent publishers of the same
+    library can't both write a version, so a version's clauses are always
+    from one publish.
+    """
+    __tablename__ = "reference_library_versions"
+    __table_args__ = (
+        UniqueConstraint("product_type", "jurisdiction", "version", name="uq_reference_library_versions"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_type = Column(String, nullable=False)
+    jurisdiction = Column(String, nullable=False)
+    version = Column(Integer, nullable=False)
+    clauses = Column(Integer, nullable=False)
+    embedding_backend = Column(String, nullable=False)
+    embedding_model = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class ReferenceClause(Base):
+    """
+    One standard clause of a versioned reference library. A library is a
+    (product_type, jurisdiction) pair; publishing it again writes a new
+    version, so the clauses of a version never change once written.
+    """
+    __tablename__ = "reference_clauses"
+    __table_args__ = (
+        # Backs loading one library version and finding the latest version
+        Index("ix_reference_clauses_library_version", "product_type", "jurisdiction", "version"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    library_id = Column(Integer, ForeignKey("reference_library_versions.id"), nullable=False)
+    product_type = Column(String, nullable=False)
+    jurisdiction = Column(String, nullable=False)
+    version = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+    critical = Column(Boolean, nullable=False, default=False)
+    # float32 vector bytes, computed once when the version is published
+    embedding = Column(LargeBinary, nullable=False)
+    embedding_backend = Column(String, nullable=False)
+    embedding_model = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
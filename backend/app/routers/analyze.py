@@ -1,8 +1,10 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from sqlalchemy.orm import Session
 from app.dependencies import get_db
-from app.utils.validation_helpers import rule_based_checks
+from app.utils.validation_helpers import extract_text_from_file
+from app.validation.fields import evaluate_document
 from app.utils.llm_integration import LLMValidator
+from app.utils.llm_client import LLMOverloaded
 from app.schemas import ValidationResult, ValidationError
 from app.crud.validation_ops import ValidationOperations
 import hashlib
@@ -24,19 +26,18 @@ async def analyze_document(
     file_hash = hashlib.md5(file_contents).hexdigest()
     
     try:
-        # Convert to text based on file type
-        from app.utils.ocr import extract_text_from_file
-        file.file.seek(0)  # Reset file pointer
+        # Convert to text based on file type (OCR for scans and images)
         text = extract_text_from_file(file)
         
-        # Run rule-based checks first
-        basic_errors = rule_based_checks(text)
-        if basic_errors:
+        # Extract fields and run the rule packs first; a conclusive failure needs no LLM
+        fields, rules = await evaluate_document(text)
+        if rules.conclusive:
             result = ValidationResult(
-                errors=[ValidationError(**e) for e in basic_errors],
-                criticality_score=100,
+                errors=rules.errors,
+                criticality_score=rules.criticality_score,
                 validation_summary="Failed basic rule-based validation checks",
-                clause_matches=[]
+                clause_matches=[],
+                extracted_fields=fields.values
             )
             
             # Log validation result
@@ -54,14 +55,15 @@ async def analyze_document(
         
         # Create final result
         result = ValidationResult(
-            errors=llm_result["errors"],
-            criticality_score=llm_result["criticality_score"],
+            errors=rules.errors + [ValidationError(**e) for e in llm_result["errors"]],
+            criticality_score=max(rules.criticality_score, llm_result["criticality_score"]),
             validation_summary=llm_result["validation_summary"],
-            clause_matches=[]  # We're not doing clause matching in this example
+            clause_matches=[],  # We're not doing clause matching in this example
+            extracted_fields=fields.values
         )
         
         # Log validation result
-        status = "passed" if not llm_result["errors"] else "failed"
+        status = "passed" if not result.errors else "failed"
         await ValidationOperations.log_validation(db, {
             "document_id": 0,  # Placeholder
             "status": status,
@@ -70,5 +72,7 @@ async def analyze_document(
         
         return result
         
+    except LLMOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
\ No newline at end of file
@@ -1,61 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.dependencies import get_db
+from fastapi import APIRouter, HTTPException
+from sqlalchemy import select, insert
+from app.database import database
+from app.utils.tracing import span
 from app.models.audit_trail import AuditTrail
 from app.schemas import AuditLog
 from datetime import datetime
 
 router = APIRouter(prefix="/audit", tags=["Audit"])
 
+audit_table = AuditTrail.__table__
+
 @router.post("/log")
-async def log_audit_entry(
-    log_data: AuditLog, 
-    db: Session = Depends(get_db)
-):
+async def log_audit_entry(log_data: AuditLog):
     """
     Create an audit log entry to track system actions
     """
     try:
         # Create audit trail entry
-        audit_entry = AuditTrail(
+        query = insert(audit_table).values(
             user_id=log_data.user_id,
             action=log_data.action,
             details=f"Validation ID: {log_data.validation_id}",
             timestamp=datetime.utcnow()
         )
+        with span("db.audit_insert"):
+            audit_id = await database.execute(query)
         
-        db.add(audit_entry)
-        db.commit()
-        db.refresh(audit_entry)
-        
-        return {"status": "success", "audit_id": audit_entry.id}
+        return {"status": "success", "audit_id": audit_id}
     
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to create audit log: {str(e)}")
 
 @router.get("/history")
 async def get_audit_history(
     user_id: int = None,
     action: str = None,
-    limit: int = 50,
-    db: Session = Depends(get_db)
+    limit: int = 50
 ):
     """
     Retrieve audit history with optional filters
     """
     try:
-        query = db.query(AuditTrail)
+        query = select(audit_table)
         
         # Apply filters if provided
         if user_id:
-            query = query.filter(AuditTrail.user_id == user_id)
+            query = query.where(audit_table.c.user_id == user_id)
         
         if action:
-            query = query.filter(AuditTrail.action == action)
+            query = query.where(audit_table.c.action == action)
         
         # Get results ordered by timestamp
-        results = query.order_by(AuditTrail.timestamp.desc()).limit(limit).all()
+        with span("db.audit_history"):
+            results = await database.fetch_all(
+                query.order_by(audit_table.c.timestamp.desc()).limit(limit)
+            )
         
         # Convert to dict format
         audit_logs = [
@@ -72,4 +71,4 @@ async def get_audit_history(
         return {"audit_logs": audit_logs, "count": len(audit_logs)}
     
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve audit logs: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve audit logs: {str(e)}")
@@ -1,35 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from app.utils.rag.chatbot.retriever import ChatbotRetriever
 from app.utils.llm_integration import embed_text
-from app.crud.chunk_ops import get_chunks_by_ids
+from app.crud.chunk_ops import fetch_chunks_by_ids
 from typing import List, Dict, Any
 import numpy as np
 
 router = APIRouter()
 
 @router.post("/chat")
-def chat_with_docs(query: str, db: Session = Depends(get_db)):
+async def chat_with_docs(query: str):
     try:
-        # 1. Embed the query
-        query_vector = np.array(embed_text(query))
+        # 1. Embed the query (CPU-bound, keep it off the event loop)
+        query_vector = np.array(await run_in_threadpool(embed_text, query))
         
         # 2. Retrieve relevant chunks
         retriever = ChatbotRetriever()
         chunk_ids, distances = retriever.query(query_vector, top_k=5)
         
-        # 3. Get chunk details from database
-        chunks = get_chunks_by_ids(db, chunk_ids.tolist())
+        # 3. Get chunk details from database on the async pool
+        rows = await fetch_chunks_by_ids([int(cid) for cid in chunk_ids])
+        chunks_by_id = {row.id: row for row in rows}
         
-        # 4. Format results
+        # 4. Format results in retrieval order so scores line up with chunks
         results = []
-        for i, chunk in enumerate(chunks):
+        for chunk_id, distance in zip(chunk_ids, distances):
+            chunk = chunks_by_id.get(int(chunk_id))
+            if chunk is None:
+                continue
             results.append({
                 "chunk_id": chunk.id,
                 "document_id": chunk.document_id,
                 "content": chunk.content,  # CORRECTED: using content instead of chunk_text
-                "relevance_score": float(1.0 - distances[i]),  # Convert distance to similarity score
+                "relevance_score": float(1.0 - distance),  # Convert distance to similarity score
             })
         
         # 5. Generate response using an LLM (placeholder - implement in llm_integration.py)
@@ -1,5 +1,6 @@
-from fastapi import APIRouter
-from app.database import database
+from fastapi import APIRouter, HTTPException
+from app.database import database, engine
+from app.utils.pool_metrics import pool_status
 from app.models import documents, extracted_data, validation_logs, audit_trail
 from app.schemas import DocumentIn, ExtractedDataIn, ValidationLogIn, AuditTrailIn
 from app.utils.rag.chatbot.indexer import build_chatbot_index
@@ -47,3 +48,18 @@ def create_chatbot_index():
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/pool-stats")
+async def get_pool_stats():
+    """Connection pool occupancy, checkout/wait counters and latency percentiles"""
+    async_pool = getattr(database._backend, "_pool", None)
+    return {
+        "sync_pool": pool_status(engine),
+        "async_pool": {
+            "connected": database.is_connected,
+            "size": async_pool.get_size() if async_pool else 0,
+            "idle": async_pool.get_idle_size() if async_pool else 0,
+            "min_size": async_pool.get_min_size() if async_pool else None,
+            "max_size": async_pool.get_max_size() if async_pool else None,
+        },
+    }
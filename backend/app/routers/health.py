@@ -0,0 +1,33 @@
+import time
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.startup import readiness
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+@router.get("/live")
+async def liveness():
+    """
+    The process is up and accepting requests
+    """
+    return {"status": "alive", "uptime_seconds": round(time.time() - readiness["started_at"], 1)}
+
+@router.get("/ready")
+async def readiness_check(require_models: bool = False):
+    """
+    Ready to serve: the database is connected. Models load lazily, so
+    `models_warm` is reported separately; pass require_models=true to
+    also require the warm-up to have finished.
+    """
+    ready = readiness["database"] and (readiness["models_warm"] or not require_models)
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "accepting_requests": True,
+        "database": readiness["database"],
+        "models_warm": readiness["models_warm"],
+        "warmup_seconds": readiness["warmup_seconds"],
+        "warmup_steps": readiness["warmup_steps"],
+        "errors": readiness["errors"],
+        "llm_hosts": readiness["llm_hosts"],
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
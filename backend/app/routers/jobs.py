@@ -0,0 +1,76 @@
+import hashlib
+from fastapi import APIRouter, File, UploadFile, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from app.jobs.queue import get_queue, QUEUED, RUNNING, FAILED
+from app.jobs.tasks import encode_file
+from app.schemas import JobStatus
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+def job_status(job) -> JobStatus:
+    return JobStatus(
+        job_id=job["id"],
+        kind=job["kind"],
+        status=job["status"],
+        priority=job["priority"],
+        attempts=job["attempts"],
+        max_attempts=job["max_attempts"],
+        error=job["error"],
+        created_at=job["created_at"],
+        updated_at=job["updated_at"],
+    )
+
+async def _get_job(job_id: str):
+    job = await run_in_threadpool(get_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@router.post("/validate", status_code=202, response_model=JobStatus)
+async def enqueue_validation(
+    file: UploadFile = File(...),
+    priority: int = Query(0, description="Higher runs first")
+):
+    """
+    Queue a full validation (same pipeline as /validate/full) for a worker
+    process. Re-uploading the same document returns the job already queued
+    for it instead of validating it twice.
+    """
+    content = await file.read()
+    if not content:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty")
+    digest = hashlib.sha256(content).hexdigest()
+    job = await run_in_threadpool(
+        get_queue().enqueue,
+        "validate_full",
+        encode_file(file.filename, content),
+        priority=priority,
+        idempotency_key=f"validate_full:{digest}",
+    )
+    return job_status(job)
+
+@router.get("/stats")
+async def queue_stats():
+    """
+    Job counts by status
+    """
+    return await run_in_threadpool(get_queue().stats)
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    return job_status(await _get_job(job_id))
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str):
+    """
+    The job's result once it has succeeded; 202 with its status while it is
+    still queued or running, 409 with its status and stored error once it
+    has failed for good.
+    """
+    job = await _get_job(job_id)
+    if job["status"] in (QUEUED, RUNNING):
+        return JSONResponse(status_code=202, content=job_status(job).model_dump())
+    if job["status"] == FAILED:
+        return JSONResponse(status_code=409, content=job_status(job).model_dump())
+    return job["result"]
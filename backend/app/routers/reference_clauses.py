@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from app.crud.reference_clause_ops import LibraryVersionConflict, list_libraries, publish_library
+from app.dependencies import get_db
+from app.schemas import ReferenceLibraryIn
+from app.utils.reference_library import get_reference_store
+from app.validation.rules import get_rule_engine
+
+router = APIRouter(prefix="/reference-clauses", tags=["Reference Clauses"])
+
+@router.get("")
+async def get_libraries(db: Session = Depends(get_db)):
+    """
+    Every reference library version with its clause count, and the version
+    this process currently matches against for each library
+    """
+    libraries = await run_in_threadpool(list_libraries, db)
+    current = await run_in_threadpool(get_reference_store().versions)
+    for library in libraries:
+        library["current"] = current.get((library["product_type"], library["jurisdiction"])) == library["version"]
+    return libraries
+
+@router.post("/{product_type}", status_code=201)
+async def publish_reference_library(
+    product_type: str,
+    payload: ReferenceLibraryIn,
+    db: Session = Depends(get_db)
+):
+    """
+    Publish the full clause list as the next version of the product's library
+    for a jurisdiction. The clauses are embedded once, here; validations pick
+    the new version up within REFERENCE_LIBRARY_REFRESH_SECONDS.
+    """
+    if product_type not in get_rule_engine().packs:
+        raise HTTPException(status_code=404, detail=f"Unknown product type '{product_type}'")
+    try:
+        published = await run_in_threadpool(
+            publish_library,
+            db,
+            [clause.model_dump() for clause in payload.clauses],
+            product_type,
+            payload.jurisdiction
+        )
+    except LibraryVersionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    get_reference_store().invalidate()
+    return published
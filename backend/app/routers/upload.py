@@ -1,13 +1,26 @@
 from fastapi import APIRouter, File, UploadFile, Depends, HTTPException, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.dependencies import get_db
-from app.crud.chunk_ops import insert_pdf_chunks, get_chunks, update_chunk_vector
+from app.crud.chunk_ops import (
+    get_chunks, update_chunk_vector, fetch_chunk_page, ensure_document, bulk_insert_chunks
+)
 from app.models.documents import Document
 from app.utils.rag.indexer import build_faiss_index
-from app.utils.json_processor import process_json_data
+from app.utils.json_processor import chunk_page
+from app.utils.chunking import chunk_spans
+from app.utils.ocr import extract_pdf_text_with_ocr
+from app.utils.embeddings import get_chunk_embedder
+from app.utils.chunk_stream import (
+    CountingReader, INSERT_BATCH_SIZE, iter_uploaded_chunks, iter_document_pages,
+    start_progress, upload_progress
+)
+from app.utils.chunk_export import iter_chunk_batches, ndjson_stream, arrow_stream, EXPORT_BATCH_SIZE
 from app.schemas import ChunkInput, DocumentIn
 from typing import List, Dict, Any, Optional
 import json
+import ijson
 from datetime import datetime
 from pydantic import BaseModel
 
@@ -50,53 +63,74 @@ async def upload_document(
             detail=f"Document upload failed: {str(e)}"
         )
 
+async def _flush_chunk_batch(db: Session, batch: list, progress: Dict[str, Any]):
+    """Insert one batch off the event loop and advance the progress counter"""
+    inserted = await run_in_threadpool(bulk_insert_chunks, db, batch)
+    progress["chunks_processed"] += inserted
+    progress["chunks_with_vectors"] += sum(1 for chunk in batch if chunk.get("vector"))
+    batch.clear()
+
 @router.post("/chunks")
 async def upload_json_chunks(
     file: UploadFile = File(...),
+    upload_id: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
-    Upload document chunks from JSON file
+    Upload document chunks from a JSON array or NDJSON file.
+
+    The body is parsed incrementally and inserted in batches of
+    INSERT_BATCH_SIZE inside one transaction, so memory use stays bounded
+    regardless of file size. Poll /upload/progress/{upload_id} for status.
     """
+    progress = start_progress(upload_id, file.filename)
+    reader = CountingReader(file, progress)
+    document_id = None
+    batch = []
     try:
-        # 1. Read and validate JSON
-        contents = await file.read()
-        chunks_data = json.loads(contents)
-        
-        # Validate structure
-        if not isinstance(chunks_data, list) or not chunks_data:
+        async for chunk in iter_uploaded_chunks(reader):
+            if document_id is None:
+                document_id = chunk["document_id"]
+                await run_in_threadpool(ensure_document, db, document_id)
+            elif chunk["document_id"] != document_id:
+                raise HTTPException(
+                    status_code=400,
+                    detail="All chunks must belong to the same document"
+                )
+            batch.append(chunk)
+            if len(batch) >= INSERT_BATCH_SIZE:
+                await _flush_chunk_batch(db, batch, progress)
+        await _flush_chunk_batch(db, batch, progress)
+
+        if document_id is None:
             raise HTTPException(
                 status_code=400,
                 detail="Invalid JSON format: expected non-empty array of chunks"
             )
-        
-        # Check required fields
-        for chunk in chunks_data:
-            if not all(key in chunk for key in ["document_id", "chunk_index", "content"]):
-                raise HTTPException(
-                    status_code=400,
-                    detail="Each chunk requires document_id, chunk_index, and content"
-                )
-        
-        # Insert chunks with vector data if available
-        inserted_chunks = insert_pdf_chunks(db, chunks_data)
-        document_id = chunks_data[0]["document_id"]
-        
-        # Count chunks with vector data
-        vector_count = sum(1 for chunk in chunks_data if "vector" in chunk and chunk["vector"])
-        
+        await run_in_threadpool(db.commit)
+        progress["status"] = "completed"
+
         return {
             "status": "success",
+            "upload_id": progress["upload_id"],
             "document_id": document_id,
-            "chunks_processed": len(inserted_chunks),
-            "chunks_with_vectors": vector_count
+            "chunks_processed": progress["chunks_processed"],
+            "chunks_with_vectors": progress["chunks_with_vectors"]
         }
-    except json.JSONDecodeError:
+    except HTTPException:
+        db.rollback()
+        progress["status"] = "failed"
+        raise
+    except (json.JSONDecodeError, ijson.JSONError):
+        db.rollback()
+        progress["status"] = "failed"
         raise HTTPException(
             status_code=400,
             detail="Invalid JSON format in uploaded file"
         )
     except Exception as e:
+        db.rollback()
+        progress["status"] = "failed"
         raise HTTPException(
             status_code=500,
             detail=f"Processing failed: {str(e)}"
@@ -105,58 +139,90 @@ async def upload_json_chunks(
 @router.post("/upload-json-chunks")
 async def upload_json_chunks_legacy(
     file: UploadFile = File(...),
+    upload_id: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
     Legacy endpoint for uploading document chunks from JSON file
     """
     # Redirect to the new endpoint with the same logic
-    return await upload_json_chunks(file, db)
+    return await upload_json_chunks(file, upload_id, db)
 
 @router.post("/upload-json")
 async def upload_json_document(
     file: UploadFile = File(...),
+    upload_id: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
-    Upload and process a complete JSON document
+    Upload and process a complete JSON document.
+
+    Pages are streamed out of the `pages` array one at a time, chunked and
+    inserted in batches; `document_id` and `title` must precede `pages`.
     """
+    progress = start_progress(upload_id, file.filename)
+    reader = CountingReader(file, progress)
+    header = {}
+    document_id = None
+    batch = []
     try:
-        # Read JSON content
-        content = await file.read()
-        json_data = json.loads(content)
-        
-        # Extract document ID or generate one
-        document_id = json_data.get("document_id")
-        if not document_id:
-            # Create document with provided or default title
-            title = json_data.get("title", f"Document {datetime.now().isoformat()}")
-            db_document = Document(title=title)
-            db.add(db_document)
-            db.commit()
-            db.refresh(db_document)
-            document_id = db_document.id
-        
-        # Process JSON into chunks
-        chunks = process_json_data(json_data, document_id)
-        
-        # Store chunks in database
-        db_chunks = insert_pdf_chunks(db, chunks)
-        
+        async for page in iter_document_pages(reader, header):
+            if document_id is None:
+                header["pages_started"] = True
+                document_id = await run_in_threadpool(_resolve_json_document, db, header)
+            batch.extend(chunk_page(page, document_id, progress["chunks_processed"] + len(batch)))
+            if len(batch) >= INSERT_BATCH_SIZE:
+                await _flush_chunk_batch(db, batch, progress)
+        await _flush_chunk_batch(db, batch, progress)
+
+        if document_id is None:
+            # Document without pages: still register it
+            document_id = await run_in_threadpool(_resolve_json_document, db, header)
+        await run_in_threadpool(db.commit)
+        progress["status"] = "completed"
+
         return {
             "status": "success",
+            "upload_id": progress["upload_id"],
             "document_id": document_id,
-            "chunks_processed": len(db_chunks)
+            "chunks_processed": progress["chunks_processed"]
         }
-    except json.JSONDecodeError:
+    except (json.JSONDecodeError, ijson.JSONError):
+        db.rollback()
+        progress["status"] = "failed"
         raise HTTPException(
             status_code=400,
             detail="Invalid JSON format in uploaded file"
         )
     except Exception as e:
         db.rollback()
+        progress["status"] = "failed"
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(status_code=400, detail=str(e))
-      # Remove this extra curly brace
+
+def _resolve_json_document(db: Session, header: Dict[str, Any]) -> int:
+    """Use the uploaded document_id or create a document from the title"""
+    document_id = header.get("document_id")
+    if document_id:
+        ensure_document(db, int(document_id), header.get("title"))
+        return int(document_id)
+    # Create document with provided or default title
+    title = header.get("title", f"Document {datetime.now().isoformat()}")
+    db_document = Document(name=title)
+    db.add(db_document)
+    db.flush()
+    return db_document.id
+
+@router.get("/progress/{upload_id}")
+async def get_upload_progress(upload_id: str):
+    """
+    Report bytes read and chunks inserted for a streaming upload
+    """
+    progress = upload_progress.get(upload_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail=f"Upload {upload_id} not found")
+    return progress
 
 @router.post("/pdf")
 async def upload_pdf(
@@ -186,20 +252,43 @@ async def upload_pdf(
         # Process PDF file and extract chunks
         contents = await file.read()
         
-        # TODO: Implement PDF processing logic here
-        # This would typically include:
-        # 1. Extract text from PDF
-        # 2. Split into chunks
-        # 3. Generate embeddings
+        # 1. Extract text from PDF (page-parallel, OCR for scanned pages)
+        pdf_text = await run_in_threadpool(extract_pdf_text_with_ocr, contents)
+        
+        # 2. Split into chunks, remembering which pages each chunk spans
+        chunks = []
+        for start, end in chunk_spans(pdf_text.text):
+            content = pdf_text.text[start:end].strip()
+            if not content:
+                continue
+            first_page, last_page = pdf_text.page_range(start, end)
+            chunks.append({
+                "document_id": document_id,
+                "chunk_index": len(chunks),
+                "content": content,
+                "first_page": first_page,
+                "last_page": last_page
+            })
+        
+        # 3. Embeddings are generated separately via PUT /upload/vectors/{document_id}
         # 4. Store chunks with document_id reference
+        await run_in_threadpool(bulk_insert_chunks, db, chunks)
+        db.commit()
         
-        # For now, return placeholder
         return {
             "status": "success",
             "document_id": document_id,
-            "message": "PDF processing functionality to be implemented"
+            "pages": len(pdf_text.pages),
+            "chunks_processed": len(chunks),
+            "chunk_pages": [
+                {"chunk_index": c["chunk_index"], "first_page": c["first_page"], "last_page": c["last_page"]}
+                for c in chunks
+            ]
         }
+    except HTTPException:
+        raise
     except Exception as e:
+        db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"PDF processing failed: {str(e)}"
@@ -230,23 +319,22 @@ async def generate_vectors(
                 detail=f"No chunks found for document ID {document_id}"
             )
         
-        # Process chunks and generate vectors
+        # Only process chunks without vectors, embedding them in batches off the event loop
+        pending = [chunk for chunk in chunks if not chunk.vector]
+        embedder = get_chunk_embedder()
+        vectors = await run_in_threadpool(embedder.embed, [chunk.content for chunk in pending])
+        
         updated_count = 0
-        for chunk in chunks:
-            if not chunk.vector:  # Only process chunks without vectors
-                # Generate vector embedding for chunk content
-                # This is a placeholder - implement your actual embedding logic
-                vector_data = [0.0] * 768  # Example placeholder vector
-                
-                # Update chunk with vector data
-                update_chunk_vector(db, chunk.id, vector_data)
-                updated_count += 1
+        for chunk, vector in zip(pending, vectors):
+            update_chunk_vector(db, chunk.id, vector.tolist())
+            updated_count += 1
         
         return {
             "status": "success",
             "document_id": document_id,
             "chunks_updated": updated_count,
-            "total_chunks": len(chunks)
+            "total_chunks": len(chunks),
+            "embedding": embedder.info()
         }
     except Exception as e:
         db.rollback()
@@ -293,38 +381,54 @@ class ChunkFilterParams(BaseModel):
     document_id: Optional[int] = None
     has_vector: Optional[bool] = None
     limit: Optional[int] = 100
-    offset: Optional[int] = 0
+    cursor: Optional[str] = None
+
+MAX_CHUNK_PAGE_SIZE = 1000
+
+def encode_chunk_cursor(row) -> str:
+    return f"{row.document_id}:{row.chunk_index}:{row.id}"
+
+def decode_chunk_cursor(cursor: str) -> tuple:
+    try:
+        document_id, chunk_index, chunk_id = (int(part) for part in cursor.split(":"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
+    return document_id, chunk_index, chunk_id
 
 @router.get("/chunks")
 async def list_chunks(
     document_id: Optional[int] = None,
     has_vector: Optional[bool] = None,
     limit: int = 100,
-    offset: int = 0,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None
 ):
     """
-    List chunks with optional filtering
+    List chunks with optional filtering.
+
+    Pages are keyset-paginated: pass the returned `next_cursor` back as
+    `cursor` to fetch the following page.
     """
+    after = decode_chunk_cursor(cursor) if cursor else None
+    limit = max(1, min(limit, MAX_CHUNK_PAGE_SIZE))
     try:
-        chunks = get_chunks(
-            db, 
+        chunks = await fetch_chunk_page(
             document_id=document_id,
             has_vector=has_vector,
             limit=limit,
-            offset=offset
+            after=after
         )
         
         return {
             "status": "success",
             "count": len(chunks),
+            "next_cursor": encode_chunk_cursor(chunks[-1]) if len(chunks) == limit else None,
             "chunks": [
                 {
                     "id": chunk.id,
                     "document_id": chunk.document_id,
                     "chunk_index": chunk.chunk_index,
-                    "content": chunk.content[:100] + "..." if chunk.content and len(chunk.content) > 100 else chunk.content,
-                    "has_vector": chunk.vector is not None,
+                    "content": chunk.preview + "..." if chunk.truncated else chunk.preview,
+                    "has_vector": chunk.has_vector,
                     "vector_id": chunk.vector_id
                 }
                 for chunk in chunks
@@ -335,3 +439,40 @@ async def list_chunks(
             status_code=500,
             detail=f"Error retrieving chunks: {str(e)}"
         )
+
+@router.get("/chunks/export")
+async def export_chunks(
+    format: str = "ndjson",
+    document_id: Optional[int] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    cursor: Optional[str] = None
+):
+    """
+    Stream chunks and their vectors as NDJSON or an Arrow IPC stream.
+
+    Rows are read through a server-side cursor and encoded batch by batch,
+    so exports of any size run in constant memory. Rows come in the same
+    keyset order as /upload/chunks; to resume an interrupted export pass the
+    last row received as `cursor` ("document_id:chunk_index:id").
+    """
+    batch_size = max(1, min(batch_size, 50000))
+    after = decode_chunk_cursor(cursor) if cursor else None
+    if format == "ndjson":
+        body = ndjson_stream(iter_chunk_batches(document_id, batch_size, after))
+        media_type = "application/x-ndjson"
+    elif format == "arrow":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=501, detail="Arrow export requires pyarrow to be installed")
+        body = arrow_stream(iter_chunk_batches(document_id, batch_size, after))
+        media_type = "application/vnd.apache.arrow.stream"
+    else:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'arrow'")
+
+    filename = f"chunks.{'arrows' if format == 'arrow' else 'ndjson'}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
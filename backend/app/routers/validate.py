@@ -1,30 +1,46 @@
+import io
+import time
+import asyncio
 import logging
+import zipfile
 import traceback
-from typing import Dict, Any
+from typing import Dict, Any, List
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 import os
 import hashlib
 import json
-import ollama
+import httpx
 import numpy as np
 from app.utils.critical_clause_detector import detect_critical_clauses, build_validation_prompt
+from app.utils.chunking import chunk_document
+from app.utils.ocr import extract_pdf_text_with_ocr
+from app.utils.tracing import traced, span
+from app.utils.embeddings import get_embedder, EmbeddingBatcher
+from app.utils.llm_client import get_llm_client, LLMOverloaded
+from app.utils.prompt_compression import prompt_text
+from app.utils.structured_output import VALIDATION_SCHEMA, parse_validation_output
+from app.validation.fields import evaluate_document
+from app.validation.rules import DEFAULT_PRODUCT_TYPE
+from app.utils.reference_library import SEED_CLAUSES, get_reference_store
 from app.dependencies import get_db
-from app.schemas import SimpleValidationResult, ValidationResult, ValidationError, ClauseMatch, Severity
+from app.schemas import SimpleValidationResult, ValidationResult, ValidationError, ClauseMatch
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+# Documents validated concurrently by /validate/batch
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_DOCUMENTS = int(os.getenv("BATCH_MAX_DOCUMENTS", "1000"))
+BATCH_EXTENSIONS = {".pdf", ".docx", ".txt", ".png", ".jpg", ".jpeg", ".tif", ".tiff"}
+
 router = APIRouter(prefix="/validate", tags=["Validation"])
 
 # ---------- Document Reading Functions ----------
 def read_pdf(file: UploadFile) -> str:
-    from PyPDF2 import PdfReader
-    content = ""
-    reader = PdfReader(file.file)
-    for page in reader.pages:
-        content += page.extract_text() or ""
-    return content
+    return extract_pdf_text_with_ocr(file.file.read()).text
 
 def read_docx(file: UploadFile) -> str:
     import docx
@@ -34,6 +50,7 @@ def read_docx(file: UploadFile) -> str:
 def read_txt(file: UploadFile) -> str:
     return file.file.read().decode("utf-8")
 
+@traced("extract_text")
 def extract_text_from_file(file: UploadFile) -> str:
     ext = os.path.splitext(file.filename)[1].lower()
     file.file.seek(0)
@@ -47,20 +64,12 @@ def extract_text_from_file(file: UploadFile) -> str:
     else:
         raise ValueError("Unsupported file type")
 
-# ---------- Basic Validation ----------
-def validate_termsheet_content(text: str) -> list:
-    required_sections = ["Interest", "Collateral", "Maturity", "Issuer"]
-    missing = [section for section in required_sections if section.lower() not in text.lower()]
-    return missing
-
 # ---------- Embedding Utilities ----------
 def get_embedding(text: str) -> np.ndarray:
-    result = ollama.embeddings(model="nomic-embed-text", prompt=text)
-    return np.array(result['embedding'], dtype=np.float32)
+    return get_embedder().embed_one(text)
 
-def chunk_text(text: str, max_length: int = 300) -> list:
-    paragraphs = [p.strip() for p in text.split("\n") if p.strip()]
-    return paragraphs
+def chunk_text(text: str, max_tokens: int = None) -> list:
+    return chunk_document(text, max_tokens=max_tokens)
 
 # ---------- LLM Validator ----------
 class TermsheetValidator:
@@ -69,12 +78,11 @@ class TermsheetValidator:
         Analyze this term sheet as a senior banking compliance officer:
         {text}
 
-        Validate these aspects:
-        1. Interest rate calculations (verify math)
-        2. Date formats (must be YYYY-MM-DD)
-        3. Missing collateral clauses
-        4. Compliance with SEC Rule 10b-5 and MiFID II
-        5. Cross-referencing with base prospectus
+        Validate these aspects (interest and coupon arithmetic is checked separately):
+        1. Date formats (must be YYYY-MM-DD)
+        2. Missing collateral clauses
+        3. Compliance with SEC Rule 10b-5 and MiFID II
+        4. Cross-referencing with base prospectus
 
         Respond with this exact JSON structure:
         {{
@@ -91,46 +99,59 @@ class TermsheetValidator:
         }}
         """
 
+    @traced("llm_validate")
     async def validate_with_ollama(self, text: str) -> dict:
         try:
-            response = ollama.generate(
-                model="mistral",
-                prompt=self.validation_prompt.format(text=text),
-                format="json",
-                options={"temperature": 0.0, "num_ctx": 16000}
-            )
-            # Extract JSON from response
-            result = json.loads(response["response"])
-            return result
+            # Headers, footers, repeated disclaimers and layout whitespace only cost prompt-eval time
+            document = await run_in_threadpool(prompt_text, text)
+
+            async def generate() -> str:
+                # Constrained to the result schema, so malformed JSON is rare
+                response = await get_llm_client().generate(
+                    model="mistral",
+                    prompt=self.validation_prompt.format(text=document),
+                    format=VALIDATION_SCHEMA,
+                    options={"temperature": 0.0, "num_ctx": 16000}
+                )
+                return response["response"]
+
+            # Repair what still comes back broken, re-asking only for the broken parts
+            return await parse_validation_output(await generate(), model="mistral", regenerate=generate)
+        except LLMOverloaded as e:
+            logger.warning(str(e))
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+        except httpx.TimeoutException as e:
+            logger.error(f"LLM validation timed out: {e!r}")
+            raise HTTPException(status_code=504, detail="LLM validation timed out")
         except Exception as e:
             logger.error(f"LLM validation failed: {traceback.format_exc()}")
             raise HTTPException(status_code=500, detail=f"LLM validation failed: {str(e)}")
 
 # ---------- FAISS Clause Matcher ----------
 class FaissClauseMatcher:
-    def __init__(self, reference_clauses: list):
+    def __init__(self, reference_clauses: list, vectors: np.ndarray = None):
         import faiss
         self.ref_clauses = reference_clauses
-        self.index = faiss.IndexFlatL2(768)  # Dimension of nomic-embed-text
+        self.embedder = get_embedder()
+        self.index = faiss.IndexFlatL2(self.embedder.dimension)
         self.clause_text_map = {}
-        self._build_index()
+        self._build_index(vectors)
 
-    def _build_index(self):
-        embeddings = []
+    def _build_index(self, vectors: np.ndarray = None):
         for clause in self.ref_clauses:
-            emb = get_embedding(clause)
             hash_id = hashlib.md5(clause.encode()).hexdigest()
             self.clause_text_map[hash_id] = clause
-            embeddings.append(emb)
-        embeddings = np.vstack(embeddings)
-        self.index.add(embeddings)
+        # Stored library embeddings skip the embedding backend entirely
+        self.index.add(vectors if vectors is not None else self.embedder.embed(self.ref_clauses))
 
+    @traced("clause_match")
     def match(self, uploaded_clauses: list) -> list:
         matches = []
-        for clause in uploaded_clauses:
-            emb = get_embedding(clause).reshape(1, -1)
-            D, I = self.index.search(emb, 1)
-            similarity = 1 / (1 + D[0][0])
+        if not uploaded_clauses:
+            return matches
+        D, I = self.index.search(self.embedder.embed(uploaded_clauses), 1)
+        for clause, distances in zip(uploaded_clauses, D):
+            similarity = 1 / (1 + distances[0])
             match_type = "match" if similarity > 0.9 else "partial" if similarity > 0.75 else "missing"
             matches.append(ClauseMatch(
                 clause=clause, 
@@ -139,6 +160,18 @@ class FaissClauseMatcher:
             ))
         return matches
 
+# Seed reference clauses; the library itself lives in the reference_clauses table
+REFERENCE_CLAUSES = SEED_CLAUSES
+
+def get_reference_matcher(product_type: str = DEFAULT_PRODUCT_TYPE) -> FaissClauseMatcher:
+    """Reference clause index for the product's latest library version, built once per version"""
+    return get_reference_store().matcher(FaissClauseMatcher, product_type)
+
+def get_reference_engine_matcher(product_type: str = DEFAULT_PRODUCT_TYPE):
+    """Reference clause index for the validation engine, shared by every batch"""
+    from app.utils.clause_matcher import FaissClauseMatcher as EngineClauseMatcher
+    return get_reference_store().matcher(EngineClauseMatcher, product_type)
+
 # ---------- Endpoints ----------
 @router.post("/simple", response_model=SimpleValidationResult)
 async def simple_validate_termsheet(file: UploadFile = File(...)):
@@ -169,19 +202,21 @@ async def full_validate_termsheet(
         logger.error(f"File parsing failed: {traceback.format_exc()}")
         raise HTTPException(status_code=400, detail=f"File parsing failed: {str(e)}")
 
-    # Step 0: Basic keyword check
-    missing_keywords = validate_termsheet_content(text)
-    if missing_keywords:
+    return await run_full_validation(text)
+
+async def run_full_validation(text: str) -> ValidationResult:
+    """
+    The /validate/full pipeline on extracted text; also run by queued jobs
+    """
+    # Step 0: Field extraction and rule packs; a conclusive failure (e.g. missing sections) skips the LLM
+    fields, rules = await evaluate_document(text)
+    if rules.conclusive:
         return ValidationResult(
-            errors=[ValidationError(
-                type="STRUCTURE",
-                description=f"Missing required sections: {', '.join(missing_keywords)}",
-                section="Header",
-                severity=Severity.CRITICAL
-            )],
-            criticality_score=100,
+            errors=rules.errors,
+            criticality_score=rules.criticality_score,
             validation_summary="Invalid document structure",
-            clause_matches=[]
+            clause_matches=[],
+            extracted_fields=fields.values
         )
 
     # Step 1: LLM Validation
@@ -189,26 +224,117 @@ async def full_validate_termsheet(
     llm_result = await validator.validate_with_ollama(text)
 
     # Step 2: Clause-Level Matching
-    uploaded_clauses = chunk_text(text)
-    reference_clauses = [
-        "The interest rate shall be 5.5% per annum.",
-        "The issuer shall provide collateral in the form of government bonds.",
-        "The maturity date shall not exceed 2029-12-31."
-    ]
-    
-    matcher = FaissClauseMatcher(reference_clauses)
+    with span("chunking"):
+        uploaded_clauses = chunk_text(text)
+    with span("reference_index"):
+        matcher = await run_in_threadpool(get_reference_matcher, rules.product_type)
     clause_matches = matcher.match(uploaded_clauses)
 
     # Log successful validation
     logger.info(f"Successfully validated termsheet with criticality score: {llm_result['criticality_score']}")
 
-    # Create and return final result
+    # Create and return final result, with the non-conclusive rule findings
     return ValidationResult(
-        errors=llm_result["errors"],
-        criticality_score=llm_result["criticality_score"],
+        errors=rules.errors + [ValidationError(**e) for e in llm_result["errors"]],
+        criticality_score=max(rules.criticality_score, llm_result["criticality_score"]),
         validation_summary=llm_result["validation_summary"],
-        clause_matches=clause_matches
+        clause_matches=clause_matches,
+        extracted_fields=fields.values
+    )
+
+def _batch_documents(files: List[UploadFile]) -> List[tuple]:
+    """
+    Read the uploaded files into (filename, bytes) pairs, expanding zip
+    archives into their supported members.
+    """
+    documents = []
+    for upload in files:
+        data = upload.file.read()
+        if os.path.splitext(upload.filename or "")[1].lower() == ".zip":
+            try:
+                with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                    for info in archive.infolist():
+                        ext = os.path.splitext(info.filename)[1].lower()
+                        if not info.is_dir() and ext in BATCH_EXTENSIONS and not os.path.basename(info.filename).startswith("."):
+                            documents.append((f"{upload.filename}/{info.filename}", archive.read(info)))
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail=f"{upload.filename} is not a valid zip archive")
+        else:
+            documents.append((upload.filename, data))
+    return documents
+
+@router.post("/batch")
+async def batch_validate_termsheets(files: List[UploadFile] = File(...)):
+    """
+    Validate a portfolio of term sheets uploaded as several files and/or zip archives.
+
+    Documents run through the validation engine BATCH_CONCURRENCY at a time,
+    sharing one reference clause index and one embedding batcher. Results are
+    streamed as NDJSON in completion order, one line per document, followed
+    by a summary line.
+    """
+    from app.utils.validation_helpers import extract_text_from_file as extract_any
+    from app.validation.engine import TermsheetValidationEngine
+
+    documents = await run_in_threadpool(_batch_documents, files)
+    if not documents:
+        raise HTTPException(status_code=400, detail="No supported documents in the upload")
+    if len(documents) > BATCH_MAX_DOCUMENTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch has {len(documents)} documents; the limit is {BATCH_MAX_DOCUMENTS}"
+        )
+
+    matcher = await run_in_threadpool(get_reference_engine_matcher)
+    engine = TermsheetValidationEngine(
+        matcher.ref_clauses,
+        matcher=matcher,
+        batcher=EmbeddingBatcher(matcher.embedder)
     )
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def validate_one(index: int, filename: str, data: bytes) -> Dict[str, Any]:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                upload = UploadFile(file=io.BytesIO(data), filename=os.path.basename(filename))
+                text = await run_in_threadpool(extract_any, upload)
+                result = await engine.validate(None, text)
+                outcome = {"status": "ok", "result": result.model_dump(mode="json")}
+            except HTTPException as e:
+                outcome = {"status": "error", "error": e.detail}
+            except Exception as e:
+                logger.error(f"Batch validation of {filename} failed: {traceback.format_exc()}")
+                outcome = {"status": "error", "error": str(e)}
+            return {
+                "index": index,
+                "filename": filename,
+                **outcome,
+                "seconds": round(time.perf_counter() - start, 3)
+            }
+
+    async def stream():
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(validate_one(i, name, data)) for i, (name, data) in enumerate(documents)]
+        failed = 0
+        try:
+            for finished in asyncio.as_completed(tasks):
+                line = await finished
+                failed += line["status"] != "ok"
+                yield json.dumps(line) + "\n"
+        finally:
+            # Client went away: don't keep validating for nobody
+            for task in tasks:
+                task.cancel()
+        yield json.dumps({"summary": {
+            "documents": len(documents),
+            "succeeded": len(documents) - failed,
+            "failed": failed,
+            "seconds": round(time.perf_counter() - start, 3),
+            "embedding_calls": engine.batcher.backend_calls
+        }}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 # In app/routers/validate.py
 @router.post("/critical", response_model=Dict[str, Any])
@@ -222,7 +348,7 @@ async def detect_critical_clauses_endpoint(
     try:
         text = extract_text_from_file(file)
         chunks = chunk_text(text)
-        result = detect_critical_clauses(chunks)
+        result = await run_in_threadpool(detect_critical_clauses, chunks)
         return result
     except Exception as e:
         logger.error(f"Critical clause detection failed: {traceback.format_exc()}")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from enum import Enum
 from typing import List, Optional, Dict, Any
 
@@ -76,6 +76,13 @@ class ValidationResult(BaseModel):
     criticality_score: int
     validation_summary: str
     clause_matches: List[ClauseMatch] = []
+    extracted_fields: Dict[str, Any] = {}
+
+# Shape the LLM must produce; clause matches are added by the pipeline
+class LLMValidationOutput(BaseModel):
+    errors: List[ValidationError]
+    criticality_score: int = Field(ge=0, le=100)
+    validation_summary: str
 
 class SimpleValidationResult(BaseModel):
     is_valid: bool
@@ -85,4 +92,24 @@ class AuditLog(BaseModel):
     validation_id: int
     action: str
     timestamp: str
-    user_id: str
\ No newline at end of file
+    user_id: str
+# Schema for queued background jobs
+class JobStatus(BaseModel):
+    job_id: str
+    kind: str
+    status: str  # 'queued', 'running', 'succeeded', 'failed'
+    priority: int
+    attempts: int
+    max_attempts: int
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+# Schemas for publishing a reference clause library version
+class ReferenceClauseIn(BaseModel):
+    text: str = Field(min_length=1)
+    critical: bool = False
+
+class ReferenceLibraryIn(BaseModel):
+    jurisdiction: str = "global"
+    clauses: List[ReferenceClauseIn] = Field(min_length=1)
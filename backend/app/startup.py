@@ -0,0 +1,188 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Dict
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.database import Base as DatabaseBase, database, engine
+from app.models.base import Base as ModelsBase
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+DB_CONNECT_RETRY_SECONDS = float(os.getenv("DB_CONNECT_RETRY_SECONDS", "5"))
+# Ollama models to page in at startup, by kind of call
+WARMUP_LLM_MODELS = [m for m in os.getenv("WARMUP_LLM_MODELS", "mistral").split(",") if m]
+WARMUP_EMBED_MODELS = [m for m in os.getenv("WARMUP_EMBED_MODELS", "nomic-embed-text").split(",") if m]
+# Re-ping the Ollama models this often so idle periods don't unload them (0 = only at startup)
+WARMUP_REFRESH_SECONDS = float(os.getenv("WARMUP_REFRESH_SECONDS", "0"))
+# Health-check the Ollama hosts this often (0 = never; failures are then found by requests)
+LLM_HEALTH_INTERVAL = float(os.getenv("LLM_HEALTH_INTERVAL", "15"))
+
+# Process readiness, reported by /health/ready
+readiness: Dict[str, Any] = {
+    "started_at": time.time(),
+    "database": False,
+    "models_warm": False,
+    "warmup_seconds": None,
+    "warmup_steps": {},
+    "errors": {},
+    "llm_hosts": [],
+}
+
+_background_tasks = set()
+
+
+def create_tables():
+    """Create the tables of both declarative bases"""
+    import app.models  # noqa: F401  register every model before create_all
+    for base in (DatabaseBase, ModelsBase):
+        base.metadata.create_all(bind=engine)
+
+
+async def connect_database():
+    """
+    Create tables and open the async pool, retrying in the background until
+    the database is reachable so the process can start before Postgres does.
+    """
+    while True:
+        try:
+            await run_in_threadpool(create_tables)
+            if not database.is_connected:
+                await database.connect()
+            readiness["database"] = True
+            readiness["errors"].pop("database", None)
+            return
+        except Exception as e:
+            readiness["errors"]["database"] = str(e)
+            logger.warning(f"Database not ready, retrying in {DB_CONNECT_RETRY_SECONDS}s: {e}")
+            await asyncio.sleep(DB_CONNECT_RETRY_SECONDS)
+
+
+def _load_embedder():
+    """Import faiss and load the query and chunk embedding models"""
+    import faiss  # noqa: F401
+    from app.utils.embeddings import get_embedder, get_chunk_embedder
+
+    embedder = get_embedder()
+    embedder.embed_one("warm-up")
+    chunk_embedder = get_chunk_embedder()
+    if chunk_embedder is not embedder:
+        chunk_embedder.embed_one("warm-up")
+
+
+def _ping_ollama():
+    """
+    Page the Ollama models into memory on every host in the pool. An empty
+    prompt loads a model without generating; keep_alive sets how long it
+    stays resident afterwards.
+    """
+    from app.utils.llm_client import get_llm_client, OLLAMA_KEEP_ALIVE
+
+    for backend in get_llm_client().backends:
+        http = backend.client()
+        for model in WARMUP_LLM_MODELS:
+            http.post("/api/generate", json={"model": model, "prompt": "", "keep_alive": OLLAMA_KEEP_ALIVE}).raise_for_status()
+        for model in WARMUP_EMBED_MODELS:
+            http.post(
+                "/api/embeddings", json={"model": model, "prompt": "warm-up", "keep_alive": OLLAMA_KEEP_ALIVE}
+            ).raise_for_status()
+
+
+def _prime_reference_index():
+    """
+    Seed an empty reference library, then build the base library's indexes
+    so the first /validate/full or /validate/batch doesn't
+    """
+    from app.routers.validate import get_reference_matcher, get_reference_engine_matcher
+    from app.utils.reference_library import seed_reference_library
+
+    try:
+        seeded = seed_reference_library()
+        if seeded:
+            logger.info(f"Seeded reference clause library: {seeded}")
+    except Exception as e:
+        logger.warning(f"Could not seed the reference clause library, using the built-in clauses: {e}")
+    get_reference_matcher()
+    get_reference_engine_matcher()
+
+
+WARMUP_STEPS = [
+    ("embedding_model", _load_embedder),
+    ("ollama_keep_alive", _ping_ollama),
+    ("reference_index", _prime_reference_index),
+]
+
+
+async def warm_up(steps=None):
+    """
+    Run each warm-up step off the request path and record its duration.
+    models_warm is set only if every step succeeded; a failed step is
+    logged and its work happens lazily on first use instead.
+    """
+    start = time.perf_counter()
+    ok = True
+    for name, step in steps or WARMUP_STEPS:
+        step_start = time.perf_counter()
+        try:
+            await run_in_threadpool(step)
+            readiness["errors"].pop(name, None)
+        except Exception as e:
+            ok = False
+            readiness["errors"][name] = str(e)
+            logger.warning(f"Warm-up step '{name}' failed, it will run on first use: {e}")
+        readiness["warmup_steps"][name] = round(time.perf_counter() - step_start, 3)
+    readiness["models_warm"] = ok
+    readiness["warmup_seconds"] = round(time.perf_counter() - start, 3)
+
+
+async def keep_models_resident():
+    """Periodically re-ping Ollama so its models outlive idle periods"""
+    while True:
+        await asyncio.sleep(WARMUP_REFRESH_SECONDS)
+        try:
+            await run_in_threadpool(_ping_ollama)
+        except Exception as e:
+            logger.warning(f"Ollama keep-alive ping failed: {e}")
+
+
+async def monitor_llm_hosts():
+    """Probe the Ollama pool so dead hosts leave rotation and recovered ones rejoin"""
+    from app.utils.llm_client import get_llm_client
+
+    while True:
+        try:
+            readiness["llm_hosts"] = await get_llm_client().check_health()
+        except Exception as e:
+            logger.warning(f"Ollama health check failed: {e}")
+        await asyncio.sleep(LLM_HEALTH_INTERVAL)
+
+
+def start_background(coro):
+    """Run a startup coroutine without blocking the server from accepting requests"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def on_startup():
+    start_background(connect_database())
+    if WARMUP_ON_STARTUP:
+        start_background(warm_up())
+    if WARMUP_REFRESH_SECONDS > 0:
+        start_background(keep_models_resident())
+    if LLM_HEALTH_INTERVAL > 0:
+        start_background(monitor_llm_hosts())
+
+
+async def on_shutdown():
+    for task in list(_background_tasks):
+        task.cancel()
+    from app.utils.llm_client import get_llm_client
+
+    await get_llm_client().aclose()
+    if database.is_connected:
+        await database.disconnect()
@@ -0,0 +1,117 @@
+import io
+import json
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select, tuple_
+
+from app.database import engine
+from app.models.pdf_chunk import PDFChunk
+
+EXPORT_BATCH_SIZE = 2000
+
+chunks_table = PDFChunk.__table__
+
+
+def export_query(document_id: Optional[int] = None, after: Optional[Tuple[int, int, int]] = None):
+    """
+    Chunks in keyset order (document_id, chunk_index, id), starting after the
+    key `after` when given, so an interrupted export can resume from the last
+    row it received.
+    """
+    c = chunks_table.c
+    query = select(c.id, c.document_id, c.chunk_index, c.content, c.vector_id, c.vector)
+    if document_id is not None:
+        query = query.where(c.document_id == document_id)
+    if after is not None:
+        query = query.where(tuple_(c.document_id, c.chunk_index, c.id) > tuple_(*after))
+    return query.order_by(c.document_id, c.chunk_index, c.id)
+
+
+def iter_chunk_batches(
+    document_id: Optional[int] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    after: Optional[Tuple[int, int, int]] = None
+) -> Iterator[list]:
+    """
+    Yield lists of chunk rows read through a server-side cursor.
+
+    Only `batch_size` rows are held in memory at a time, so the whole
+    pdf_chunks table can be exported without materialising it.
+    """
+    query = export_query(document_id, after)
+
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+        for partition in result.partitions():
+            yield partition
+
+
+def ndjson_stream(batches: Iterator[list]) -> Iterator[bytes]:
+    """Encode chunk batches as newline-delimited JSON, one chunk per line"""
+    for rows in batches:
+        lines = [
+            json.dumps({
+                "id": row.id,
+                "document_id": row.document_id,
+                "chunk_index": row.chunk_index,
+                "content": row.content,
+                "vector_id": row.vector_id,
+                "vector": row.vector,
+            })
+            for row in rows
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _arrow_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("id", pa.int64()),
+        ("document_id", pa.int64()),
+        ("chunk_index", pa.int32()),
+        ("content", pa.string()),
+        ("vector_id", pa.int64()),
+        ("vector", pa.list_(pa.float32())),
+    ])
+
+
+def _vector_column(rows: List):
+    """Build a list<float32> Arrow column from row vectors with a single copy"""
+    import pyarrow as pa
+
+    lengths = np.fromiter((len(row.vector) if row.vector is not None else 0 for row in rows),
+                          dtype=np.int32, count=len(rows))
+    offsets = np.zeros(len(rows) + 1, dtype=np.int32)
+    np.cumsum(lengths, out=offsets[1:])
+    values = np.fromiter(
+        (value for row in rows if row.vector is not None for value in row.vector),
+        dtype=np.float32,
+        count=int(offsets[-1]),
+    )
+    mask = pa.array([row.vector is None for row in rows])
+    return pa.ListArray.from_arrays(pa.array(offsets), pa.array(values), mask=mask)
+
+
+def arrow_stream(batches: Iterator[list]) -> Iterator[bytes]:
+    """Encode chunk batches as an Arrow IPC stream, one record batch per DB batch"""
+    import pyarrow as pa
+
+    schema = _arrow_schema()
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for rows in batches:
+            batch = pa.record_batch([
+                pa.array([row.id for row in rows], pa.int64()),
+                pa.array([row.document_id for row in rows], pa.int64()),
+                pa.array([row.chunk_index for row in rows], pa.int32()),
+                pa.array([row.content for row in rows], pa.string()),
+                pa.array([row.vector_id for row in rows], pa.int64()),
+                _vector_column(rows),
+            ], schema=schema)
+            writer.write_batch(batch)
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    # End-of-stream marker written when the writer closes
+    yield sink.getvalue()
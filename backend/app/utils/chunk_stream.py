@@ -0,0 +1,155 @@
+import json
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import AsyncIterator, Dict, Any, Optional
+
+import ijson
+from fastapi import HTTPException, UploadFile
+
+READ_SIZE = 64 * 1024
+INSERT_BATCH_SIZE = 500
+MAX_TRACKED_UPLOADS = 1000
+
+REQUIRED_CHUNK_FIELDS = ("document_id", "chunk_index", "content")
+
+# upload_id -> progress dict, oldest entries evicted first
+upload_progress: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def start_progress(upload_id: Optional[str], filename: str) -> Dict[str, Any]:
+    """Register a new upload and return its mutable progress record"""
+    upload_id = upload_id or uuid.uuid4().hex
+    progress = {
+        "upload_id": upload_id,
+        "filename": filename,
+        "status": "running",
+        "chunks_processed": 0,
+        "chunks_with_vectors": 0,
+        "bytes_read": 0,
+        "started_at": datetime.utcnow().isoformat(),
+    }
+    upload_progress[upload_id] = progress
+    while len(upload_progress) > MAX_TRACKED_UPLOADS:
+        upload_progress.popitem(last=False)
+    return progress
+
+
+class CountingReader:
+    """
+    Async file wrapper that supports peeking at the first non-blank byte
+    and counts bytes consumed into the upload's progress record.
+    """
+
+    def __init__(self, file: UploadFile, progress: Dict[str, Any]):
+        self.file = file
+        self.progress = progress
+        self._buffer = b""
+
+    async def peek(self) -> bytes:
+        """Return the first non-whitespace byte without consuming it"""
+        while True:
+            stripped = self._buffer.lstrip()
+            if stripped:
+                return stripped[:1]
+            data = await self.file.read(READ_SIZE)
+            if not data:
+                return b""
+            self._buffer += data
+
+    async def read(self, size: int = READ_SIZE) -> bytes:
+        if size == 0:
+            # ijson probes with read(0) to detect bytes vs text streams
+            return b""
+        if self._buffer:
+            data, self._buffer = self._buffer, b""
+        else:
+            data = await self.file.read(size)
+        self.progress["bytes_read"] += len(data)
+        return data
+
+    async def lines(self) -> AsyncIterator[bytes]:
+        """Yield complete lines, holding at most one partial line in memory"""
+        pending = b""
+        while True:
+            data = await self.read()
+            if not data:
+                break
+            pending += data
+            *complete, pending = pending.split(b"\n")
+            for line in complete:
+                yield line
+        if pending:
+            yield pending
+
+
+def validate_chunk(chunk: Any, position: int) -> Dict[str, Any]:
+    """Check one streamed chunk has the fields needed for insertion"""
+    if not isinstance(chunk, dict):
+        raise HTTPException(status_code=400, detail=f"Chunk {position} is not a JSON object")
+    if not all(key in chunk for key in REQUIRED_CHUNK_FIELDS):
+        raise HTTPException(
+            status_code=400,
+            detail="Each chunk requires document_id, chunk_index, and content"
+        )
+    vector = chunk.get("vector")
+    if vector is not None and not isinstance(vector, list):
+        raise HTTPException(status_code=400, detail=f"Chunk {position} has a non-array vector")
+    return chunk
+
+
+async def iter_uploaded_chunks(reader: CountingReader) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Incrementally parse chunks from a JSON array or NDJSON upload.
+
+    A body starting with `[` is parsed with ijson; anything else is treated
+    as one JSON chunk object per line.
+    """
+    first = await reader.peek()
+    position = 0
+    if first == b"[":
+        async for chunk in ijson.items_async(reader, "item", use_float=True):
+            yield validate_chunk(chunk, position)
+            position += 1
+    elif first == b"{":
+        async for line in reader.lines():
+            if not line.strip():
+                continue
+            yield validate_chunk(json.loads(line), position)
+            position += 1
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid JSON format: expected an array of chunks or NDJSON"
+        )
+
+
+async def iter_document_pages(reader: CountingReader, header: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream `pages` items from a JSON document upload.
+
+    Top-level scalar keys (`document_id`, `title`) seen before the pages
+    array are recorded into `header` so callers can resolve the document
+    before the first page is processed.
+    """
+    builder = None
+    async for prefix, event, value in ijson.parse_async(reader, use_float=True):
+        if builder is not None:
+            if prefix == "pages" and event == "end_array":
+                builder = None
+                continue
+            builder.event(event, value)
+            if prefix == "pages.item" and event == "end_map":
+                yield builder.value
+                builder = ijson.ObjectBuilder()
+        elif prefix == "pages" and event == "start_array":
+            builder = ijson.ObjectBuilder()
+        elif prefix in ("document_id", "title") and event in ("number", "string"):
+            if prefix == "document_id" and header.get("pages_started"):
+                raise HTTPException(
+                    status_code=400,
+                    detail="document_id must appear before pages in streamed uploads"
+                )
+            header[prefix] = value
+        elif prefix == "" and event not in ("start_map", "map_key", "end_map"):
+            raise HTTPException(status_code=400, detail="Invalid JSON format: expected an object")
@@ -0,0 +1,300 @@
+"""
+Section- and sentence-aware chunking for term sheets.
+
+Text is first cut into blocks at section headings (numbered clauses,
+"Section"/"Article" headings, ALL CAPS titles and "Label:" field lines).
+Blocks are then packed greedily into chunks that fit the token budget of
+the target embedding model. A block is only split when it is larger than
+the budget on its own: first at sentence boundaries, then at token
+boundaries for run-on sentences. All work is done on offsets into the
+original string, so chunks are contiguous, ordered and cover the text.
+"""
+import math
+import re
+from typing import Iterator, List, Optional, Tuple
+
+DEFAULT_EMBEDDING_MODEL = "nomic-embed-text"
+
+# Per-model chunk budgets, kept below each model's hard input limit to leave
+# room for special tokens and for the word-piece splits the estimate misses.
+MODEL_TOKEN_BUDGETS = {
+    "nomic-embed-text": 512,
+    "all-MiniLM-L6-v2": 200,
+}
+DEFAULT_TOKEN_BUDGET = 256
+
+# Estimated WordPiece/BPE tokens per whitespace-separated word in term-sheet
+# prose (numbers, percentages and punctuation split into several tokens).
+TOKENS_PER_WORD = 1.3
+
+WORD_RE = re.compile(r"\S+")
+
+HEADING_RE = re.compile(
+    r"""^[ \t]*(?:
+        (?:\d+(?:\.\d+)*\.?|[IVXLC]+\.|\([a-zA-Z0-9]{1,4}\))[ \t]+[A-Z]     # 1. / 2.3 / IV. / (a) Heading
+      | (?:SECTION|Section|ARTICLE|Article|CLAUSE|Clause|SCHEDULE|Schedule|ANNEX|Annex|PART|Part)[ \t]+\w+
+      | [A-Z][A-Z0-9&/,()'\- ]{2,80}[ \t]*$                                  # ALL CAPS title line
+      | [A-Z][\w&/()'\- ]{1,60}:                                            # Term-sheet field label
+    )""",
+    re.MULTILINE | re.VERBOSE,
+)
+
+# Candidate sentence ends: terminal punctuation, semicolons and line breaks
+# followed by the start of a new sentence. _sentence_ends drops the false
+# positives (no whitespace after the stop, or a clause number such as "1.").
+SENTENCE_BREAK_RE = re.compile(r"[.!?;\n]\s*(?=[A-Z0-9(\"'])")
+
+Span = Tuple[int, int]
+
+
+def token_budget(model: Optional[str] = None, max_tokens: Optional[int] = None) -> int:
+    """Resolve the chunk token budget for an embedding model"""
+    if max_tokens:
+        return max_tokens
+    return MODEL_TOKEN_BUDGETS.get(model or DEFAULT_EMBEDDING_MODEL, DEFAULT_TOKEN_BUDGET)
+
+
+def estimate_tokens(text: str, start: int = 0, end: Optional[int] = None) -> int:
+    """
+    Approximate the embedding-model token count of text[start:end].
+
+    Counts separators in place with str.count, so no substring is copied.
+    """
+    end = len(text) if end is None else end
+    if end <= start:
+        return 0
+    words = text.count(" ", start, end) + text.count("\n", start, end) + 1
+    return math.ceil(words * TOKENS_PER_WORD)
+
+
+def _section_spans(text: str) -> List[Span]:
+    """Cut text into blocks that each start at a section heading"""
+    starts = [m.start() for m in HEADING_RE.finditer(text) if m.start() > 0]
+    bounds = [0] + starts + [len(text)]
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+
+def _sentence_ends(text: str, start: int, end: int) -> List[int]:
+    """Offsets just past each sentence boundary inside text[start:end]"""
+    return [
+        m.end()
+        for m in SENTENCE_BREAK_RE.finditer(text, start, end)
+        if text[m.start()] in ";\n"
+        or (m.end() > m.start() + 1 and not text[m.start() - 1].isdigit())
+    ]
+
+
+def _word_window_spans(text: str, start: int, end: int, budget: int) -> List[Span]:
+    """Split a run-on span into pieces of at most `budget` estimated tokens"""
+    words_per_window = max(1, int(budget / TOKENS_PER_WORD) - 1)
+    spans = []
+    cursor = start
+    count = 0
+    for m in WORD_RE.finditer(text, start, end):
+        if count == words_per_window:
+            spans.append((cursor, m.start()))
+            cursor = m.start()
+            count = 0
+        count += 1
+    if cursor < end:
+        spans.append((cursor, end))
+    return spans
+
+
+def _split_oversize(text: str, start: int, end: int, budget: int) -> List[Span]:
+    """
+    Pack the sentences of an oversize section into budget-sized spans.
+
+    The furthest sentence end that still fits is found by binary search over
+    the sentence-end offsets, so the cost per emitted span is logarithmic in
+    the number of sentences. Sentences longer than the budget on their own
+    fall back to word windows.
+    """
+    ends = _sentence_ends(text, start, end)
+    ends.append(end)
+    spans = []
+    cursor = start
+    first = 0  # index of the first sentence end beyond `cursor`
+    while cursor < end:
+        lo, hi = first, len(ends)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if estimate_tokens(text, cursor, ends[mid]) <= budget:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == first:
+            # Even the next sentence alone is over budget
+            spans.extend(_word_window_spans(text, cursor, ends[first], budget))
+            cursor = ends[first]
+            first += 1
+        else:
+            spans.append((cursor, ends[lo - 1]))
+            cursor = ends[lo - 1]
+            first = lo
+    return spans
+
+
+def _units(text: str, budget: int) -> List[Tuple[int, int, int, bool]]:
+    """
+    (start, end, tokens, breaks) units, none of which exceeds the budget.
+
+    `breaks` marks units that must start a new chunk: the pieces of a
+    section too large to fit whole, and whatever section follows them, so
+    a split section never shares a chunk with its neighbours.
+    """
+    units = []
+    after_split = False
+    for start, end in _section_spans(text):
+        tokens = estimate_tokens(text, start, end)
+        if tokens <= budget:
+            units.append((start, end, tokens, after_split))
+            after_split = False
+            continue
+        for p_start, p_end in _split_oversize(text, start, end, budget):
+            units.append((p_start, p_end, budget, True))
+        after_split = True
+    return units
+
+
+def chunk_spans(
+    text: str,
+    max_tokens: Optional[int] = None,
+    model: Optional[str] = None
+) -> List[Span]:
+    """
+    Compute (start, end) offsets of semantic chunks of `text`.
+
+    Args:
+        text: Document text
+        max_tokens: Token budget per chunk (defaults to the model's budget)
+        model: Embedding model the chunks are destined for
+
+    Returns:
+        Contiguous spans covering the whole text, in order
+    """
+    budget = token_budget(model, max_tokens)
+    spans = []
+    chunk_start = None
+    chunk_end = 0
+    chunk_tokens = 0
+    for start, end, tokens, breaks in _units(text, budget):
+        if chunk_start is not None and (breaks or chunk_tokens + tokens > budget):
+            spans.append((chunk_start, chunk_end))
+            chunk_start = None
+        if chunk_start is None:
+            chunk_start, chunk_tokens = start, 0
+        chunk_end = end
+        chunk_tokens += tokens
+    if chunk_start is not None:
+        spans.append((chunk_start, chunk_end))
+    return spans
+
+
+def chunk_document(
+    text: str,
+    max_tokens: Optional[int] = None,
+    model: Optional[str] = None
+) -> List[str]:
+    """
+    Split text into section-aware chunks sized for the embedding model.
+
+    Whitespace-only chunks are dropped and surrounding whitespace is trimmed.
+    """
+    chunks = []
+    for start, end in chunk_spans(text, max_tokens, model):
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+    return chunks
+
+
+# ---------- Fixed-size overlapping windows ----------
+def _last_break(text, lo: int, hi: int, space, newline) -> int:
+    """Offset just after the last space/newline in text[lo:hi], or -1"""
+    found = max(text.rfind(space, lo, hi), text.rfind(newline, lo, hi))
+    return found + 1 if found != -1 else -1
+
+
+def _first_break(text, lo: int, hi: int, space, newline) -> int:
+    """Offset just after the first space/newline in text[lo:hi], or -1"""
+    hits = [i for i in (text.find(space, lo, hi), text.find(newline, lo, hi)) if i != -1]
+    return min(hits) + 1 if hits else -1
+
+
+def iter_window_spans(text, chunk_size: int = 1000, overlap: int = 100) -> Iterator[Span]:
+    """
+    Lazily yield (start, end) offsets of overlapping fixed-size windows.
+
+    Window ends snap back to the last word boundary when one exists in the
+    second half of the window; otherwise the window is cut hard. Overlap is
+    capped at a quarter of the window, so every window advances by at least
+    chunk_size // 4 and a text of length n yields at most
+    ceil(n / (chunk_size // 2 - overlap)) + 1 windows. Boundary searches are
+    confined to half a window, so the whole pass is linear in len(text).
+
+    Args:
+        text: str or bytes-like object to split
+        chunk_size: Maximum window length
+        overlap: Characters shared between consecutive windows
+
+    Yields:
+        Spans covering the whole text, with strictly increasing starts
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    if isinstance(text, memoryview):
+        # memoryview has no find/rfind; search a bytes copy, offsets are identical
+        text = text.tobytes()
+    space, newline = (" ", "\n") if isinstance(text, str) else (b" ", b"\n")
+    text_len = len(text)
+    min_chunk = max(1, chunk_size // 2)
+    overlap = max(0, min(overlap, chunk_size // 4))
+
+    start = 0
+    while start < text_len:
+        end = start + chunk_size
+        if end >= text_len:
+            yield start, text_len
+            return
+        boundary = _last_break(text, start + min_chunk, end, space, newline)
+        if boundary != -1:
+            end = boundary
+        yield start, end
+
+        next_start = end - overlap
+        if overlap:
+            # Start the overlap at a word boundary where possible
+            boundary = _first_break(text, next_start, end - 1, space, newline)
+            if boundary != -1:
+                next_start = boundary
+        start = next_start
+
+
+def window_offsets(text, chunk_size: int = 1000, overlap: int = 100):
+    """
+    All window boundaries at once as (starts, ends) int64 NumPy arrays.
+    """
+    import numpy as np
+
+    flat = np.fromiter(
+        (offset for span in iter_window_spans(text, chunk_size, overlap) for offset in span),
+        dtype=np.int64,
+    )
+    return flat[0::2], flat[1::2]
+
+
+def iter_windows(text, chunk_size: int = 1000, overlap: int = 100):
+    """
+    Lazily yield overlapping windows of `text`.
+
+    Bytes-like input yields zero-copy memoryview slices; str input yields
+    str slices (Python strings do not expose a buffer to slice into).
+    """
+    if isinstance(text, (bytes, bytearray, memoryview)):
+        view = memoryview(text)
+        for start, end in iter_window_spans(text, chunk_size, overlap):
+            yield view[start:end]
+    else:
+        for start, end in iter_window_spans(text, chunk_size, overlap):
+            yield text[start:end]
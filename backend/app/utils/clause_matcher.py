@@ -1,75 +1,75 @@
 import hashlib
 import numpy as np
-import faiss
 from typing import List, Dict, Any
 from app.schemas import ClauseMatch
+from app.utils.tracing import traced
+from app.utils.embeddings import get_embedder
 
 class FaissClauseMatcher:
     """
     Semantic clause matching using FAISS vector search for termsheet validation.
     """
     
-    def __init__(self, reference_clauses: List[str]):
+    def __init__(self, reference_clauses: List[str], vectors: np.ndarray = None):
         """
         Initialize the clause matcher with reference clauses.
         
         Args:
             reference_clauses: List of standard clauses to match against
+            vectors: Stored embeddings of the clauses, one row each; the
+                clauses are embedded when not given
         """
         self.ref_clauses = reference_clauses
-        # Dimension for nomic-embed-text embeddings
-        self.index = faiss.IndexFlatL2(768)
+        import faiss
+        self.embedder = get_embedder()
+        # Index dimension follows the configured embedding backend
+        self.index = faiss.IndexFlatL2(self.embedder.dimension)
         self.clause_text_map = {}
-        self._build_index()
+        self._build_index(vectors)
 
-    def _build_index(self):
+    def _build_index(self, vectors: np.ndarray = None):
         """Build FAISS index from reference clauses"""
-        from app.utils.validation_helpers import get_embedding
-        
-        embeddings = []
         for i, clause in enumerate(self.ref_clauses):
-            # Generate embedding for reference clause
-            emb = get_embedding(clause)
             # Create a unique identifier for the clause
             hash_id = hashlib.md5(clause.encode()).hexdigest()
             self.clause_text_map[hash_id] = {
                 "text": clause,
                 "index": i
             }
-            embeddings.append(emb)
         
-        # Add embeddings to FAISS index if we have any
-        if embeddings:
-            embeddings_array = np.vstack(embeddings).astype('float32')
-            self.index.add(embeddings_array)
+        # Add the stored embeddings, or embed all reference clauses in batches
+        if vectors is not None:
+            self.index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+        elif self.ref_clauses:
+            self.index.add(self.embedder.embed(self.ref_clauses))
 
-    def match(self, uploaded_clauses: List[str]) -> List[ClauseMatch]:
+    @traced("clause_match")
+    def match(self, uploaded_clauses: List[str], vectors: np.ndarray = None) -> List[ClauseMatch]:
         """
         Find semantic matches for each clause in the document.
         
         Args:
             uploaded_clauses: List of clauses extracted from uploaded termsheet
+            vectors: Precomputed embeddings, one row per uploaded clause
             
         Returns:
             List of ClauseMatch objects with similarity scores and match types
         """
-        from app.utils.validation_helpers import get_embedding
-        
         matches = []
         
-        for clause in uploaded_clauses:
-            # Skip very short clauses (likely not meaningful)
-            if len(clause.strip()) < 20:
-                continue
-                
-            # Get embedding for the clause
-            emb = get_embedding(clause).reshape(1, -1)
-            
-            # Search for nearest neighbor in FAISS index
-            D, I = self.index.search(emb, 1)
-            
+        # Skip very short clauses (likely not meaningful)
+        keep = [i for i, clause in enumerate(uploaded_clauses) if len(clause.strip()) >= 20]
+        if not keep:
+            return matches
+        clauses = [uploaded_clauses[i] for i in keep]
+        
+        # Embed all clauses at once and search for each nearest neighbour
+        query = vectors[keep] if vectors is not None else self.embedder.embed(clauses)
+        D, I = self.index.search(np.ascontiguousarray(query, dtype=np.float32), 1)
+        
+        for clause, distances in zip(clauses, D):
             # Calculate similarity score (inverse of distance)
-            similarity = 1 / (1 + D[0][0])
+            similarity = 1 / (1 + distances[0])
             
             # Determine match type based on similarity threshold
             match_type = (
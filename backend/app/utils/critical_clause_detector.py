@@ -1,8 +1,9 @@
 import json
 import numpy as np
-import faiss
 import os
-from app.utils.validation_helpers import get_embedding
+from typing import Dict, Tuple
+from app.utils.embeddings import Embedder, get_embedder
+from app.utils.tracing import traced
 
 # Critical financial clause keywords
 CRITICAL_KEYWORDS = [
@@ -11,6 +12,19 @@ CRITICAL_KEYWORDS = [
     "Floating Rate", "Zero Coupon", "Fixed Rate", "Interest Commencement", "Maturity Date"
 ]
 
+# Chunks nearest this query are checked for critical keywords
+CRITICAL_QUERY = "financial terms and conditions"
+# CRITICAL_QUERY embedded once per (backend, model) instead of once per document
+QUERY_VECTORS: Dict[Tuple[str, str], np.ndarray] = {}
+
+def critical_query_vector(embedder: Embedder = None) -> np.ndarray:
+    """Embedding of CRITICAL_QUERY, computed on first use"""
+    embedder = embedder or get_embedder()
+    key = (embedder.name, embedder.model)
+    if key not in QUERY_VECTORS:
+        QUERY_VECTORS[key] = embedder.embed_one(CRITICAL_QUERY)
+    return QUERY_VECTORS[key]
+
 def is_critical_clause(text):
     """Check if text contains critical financial terms"""
     for keyword in CRITICAL_KEYWORDS:
@@ -18,32 +32,32 @@ def is_critical_clause(text):
             return True
     return False
 
-def detect_critical_clauses(chunks, top_k=5):
+@traced("critical_detect")
+def detect_critical_clauses(chunks, top_k=5, vectors=None, query_vector=None):
     """
     Detect critical clauses in chunked text
     
     Args:
         chunks: List of text chunks from the termsheet
         top_k: Number of top matches to consider
+        vectors: Precomputed chunk embeddings, one row per chunk
+        query_vector: Embedding of CRITICAL_QUERY in the same space as `vectors`
         
     Returns:
         Dictionary with is_critical flag and list of critical chunks
     """
-    # Create vectors for chunks
-    vectors = []
-    for chunk in chunks:
-        vector = get_embedding(chunk)
-        vectors.append(vector)
+    # Create vectors for chunks in batches unless the caller already has them
+    vectors_array = vectors if vectors is not None else get_embedder().embed(list(chunks))
     
     # Build FAISS index
-    vectors_array = np.array(vectors).astype('float32')
     dim = vectors_array.shape[1]
+    import faiss
     index = faiss.IndexFlatL2(dim)
     index.add(vectors_array)
     
     # Query for financial terms
-    query_text = "financial terms and conditions"
-    query_vector = get_embedding(query_text)
+    if query_vector is None:
+        query_vector = critical_query_vector()
     query_vector = np.array(query_vector).astype('float32').reshape(1, -1)
     
     # Search for similar chunks
@@ -0,0 +1,361 @@
+import os
+import re
+import json
+import asyncio
+import hashlib
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.utils.tracing import span
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "ollama")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")  # backend default when unset
+# Stored chunk vectors and the chatbot index built from them (shipped in
+# app/indices/chatbot) are MiniLM vectors, so chunk retrieval keeps its own space
+CHUNK_EMBEDDING_BACKEND = os.getenv("CHUNK_EMBEDDING_BACKEND", "sentence-transformers")
+CHUNK_EMBEDDING_MODEL = os.getenv("CHUNK_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+ONNX_QUANTIZED = os.getenv("EMBEDDING_ONNX_QUANTIZED", "true").lower() in ("1", "true", "yes")
+ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", str(os.cpu_count() or 1)))
+
+# Output sizes of the models we ship with, so index dimensions are known without loading a model
+KNOWN_DIMENSIONS = {
+    "nomic-embed-text": 768,
+    "all-MiniLM-L6-v2": 384,
+    "sentence-transformers/all-MiniLM-L6-v2": 384,
+    "all-mpnet-base-v2": 768,
+    "bge-small-en-v1.5": 384,
+}
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+class Embedder:
+    """
+    Base class for embedding backends.
+
+    Subclasses implement `_embed(texts)` returning a float32 array of shape
+    (len(texts), dimension). `name`, `model` and `dimension` describe the
+    vector space and are stored alongside every index built from it.
+    """
+
+    name = "base"
+
+    def __init__(self, model: str, dimension: Optional[int] = None, batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.model = model
+        self._dimension = dimension or KNOWN_DIMENSIONS.get(model)
+        self.batch_size = batch_size
+
+    @property
+    def dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = int(self.embed_one("dimension probe").shape[0])
+        return self._dimension
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts in batches; returns a (len(texts), dimension) float32 array"""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        with span("embedding"):
+            batches = [
+                self._embed(texts[i:i + self.batch_size])
+                for i in range(0, len(texts), self.batch_size)
+            ]
+        return np.ascontiguousarray(np.vstack(batches), dtype=np.float32)
+
+    def embed_one(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+    def info(self) -> Dict[str, object]:
+        return {"backend": self.name, "model": self.model, "dimension": self.dimension}
+
+
+_BACKENDS: Dict[str, Callable[..., Embedder]] = {}
+
+
+def register_backend(name: str):
+    """Class decorator adding an Embedder to the backend registry"""
+    def decorator(cls):
+        cls.name = name
+        _BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+def available_backends() -> List[str]:
+    return sorted(_BACKENDS)
+
+
+@register_backend("ollama")
+class OllamaEmbedder(Embedder):
+    """Embeddings from the local Ollama server"""
+
+    def __init__(self, model: Optional[str] = None, **kwargs):
+        super().__init__(model or "nomic-embed-text", **kwargs)
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        from app.utils.llm_client import get_llm_client
+
+        client = get_llm_client()
+        return np.array([client.embeddings_sync(self.model, text) for text in texts], dtype=np.float32)
+
+
+@register_backend("sentence-transformers")
+class SentenceTransformerEmbedder(Embedder):
+    """In-process sentence-transformers model on CPU"""
+
+    def __init__(self, model: Optional[str] = None, **kwargs):
+        super().__init__(model or "all-MiniLM-L6-v2", **kwargs)
+        self._model = None
+
+    def _load(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+
+            self._model = SentenceTransformer(self.model, device="cpu")
+            self._dimension = self._model.get_sentence_embedding_dimension()
+        return self._model
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        return self._load().encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
+
+
+@register_backend("onnx")
+class OnnxEmbedder(Embedder):
+    """
+    The sentence-transformers model exported to ONNX and run with onnxruntime on CPU.
+
+    Model files live in `model_dir` (EMBEDDING_ONNX_DIR, default
+    models/<model>-onnx), produced by `python -m app.utils.onnx_export`:
+    `model.onnx`, its int8 variant `model.int8.onnx` and the model's own
+    `tokenizer.json`, so tokenization is identical to the PyTorch path.
+    Token embeddings are mean-pooled over the attention mask and
+    L2-normalised, as the sentence-transformers pipeline does.
+    """
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        model_dir: Optional[str] = None,
+        quantized: bool = ONNX_QUANTIZED,
+        threads: int = ONNX_THREADS,
+        max_length: Optional[int] = None,
+        **kwargs
+    ):
+        super().__init__(model or "all-MiniLM-L6-v2", **kwargs)
+        self.model_dir = model_dir or os.getenv("EMBEDDING_ONNX_DIR", os.path.join("models", f"{self.model}-onnx"))
+        self.quantized = quantized
+        self.threads = threads
+        self.max_length = max_length or _max_seq_length(self.model_dir)
+        self._session = None
+        self._tokenizer = None
+
+    @property
+    def model_path(self) -> str:
+        return os.path.join(self.model_dir, "model.int8.onnx" if self.quantized else "model.onnx")
+
+    def _load(self):
+        if self._session is None:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+
+            tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, "tokenizer.json"))
+            tokenizer.enable_truncation(self.max_length)
+            tokenizer.enable_padding()
+
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            options.intra_op_num_threads = self.threads
+            # One graph per call: parallelism comes from the intra-op threads
+            options.inter_op_num_threads = 1
+            options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+            self._session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+            self._input_names = {i.name for i in self._session.get_inputs()}
+            self._tokenizer = tokenizer
+        return self._session
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        session = self._load()
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        token_embeddings = session.run(None, feeds)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        self._dimension = pooled.shape[1]
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def info(self) -> Dict[str, object]:
+        return {**super().info(), "quantized": self.quantized}
+
+
+def _max_seq_length(model_dir: str, default: int = 256) -> int:
+    """The sentence-transformers max_seq_length saved with the export, so truncation matches"""
+    try:
+        with open(os.path.join(model_dir, "sentence_bert_config.json")) as f:
+            return int(json.load(f)["max_seq_length"])
+    except (OSError, KeyError, ValueError):
+        return default
+
+
+@register_backend("hashing")
+class HashingEmbedder(Embedder):
+    """
+    Deterministic offline embeddings via signed feature hashing of word tokens.
+
+    Needs no model or network; texts sharing words get similar vectors, which
+    is enough for tests, CI and benchmarking the rest of the pipeline.
+    """
+
+    def __init__(self, model: Optional[str] = None, dimension: int = 768, **kwargs):
+        super().__init__(model or f"hashing-{dimension}", dimension=dimension, **kwargs)
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        dim = self._dimension
+        out = np.zeros((len(texts), dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in TOKEN_RE.findall(text.lower()):
+                h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+                out[row, h % dim] += 1.0 if (h >> 63) & 1 else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms == 0, 1.0, norms)
+
+
+_embedders: Dict[tuple, Embedder] = {}
+
+
+def get_embedder(backend: Optional[str] = None, model: Optional[str] = None) -> Embedder:
+    """
+    Return the shared embedder for a backend (EMBEDDING_BACKEND by default).
+    """
+    backend = backend or EMBEDDING_BACKEND
+    model = model or (EMBEDDING_MODEL if backend == EMBEDDING_BACKEND else None)
+    key = (backend, model)
+    embedder = _embedders.get(key)
+    if embedder is None:
+        if backend not in _BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{backend}'. Available: {', '.join(available_backends())}")
+        embedder = _embedders[key] = _BACKENDS[backend](model)
+    return embedder
+
+
+def get_chunk_embedder() -> Embedder:
+    """
+    The embedder for document chunks and chat queries (CHUNK_EMBEDDING_BACKEND).
+
+    To move chunk retrieval to another space, set CHUNK_EMBEDDING_BACKEND/MODEL,
+    clear the chunk vectors, regenerate them with PUT /upload/vectors/{id} and
+    rebuild the chatbot index with POST /db/build-chatbot-index.
+    """
+    return get_embedder(CHUNK_EMBEDDING_BACKEND, CHUNK_EMBEDDING_MODEL)
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embed requests into shared backend calls.
+
+    Callers (e.g. documents validated in parallel) await `embed(texts)`;
+    requests arriving within `max_wait` seconds of each other are
+    concatenated into one `Embedder.embed` call run off the event loop, and
+    a batch is flushed early once it reaches `max_batch` texts. Backend calls
+    are serialised so CPU models aren't oversubscribed.
+    """
+
+    def __init__(self, embedder: Optional[Embedder] = None, max_batch: int = 4 * EMBEDDING_BATCH_SIZE, max_wait: float = 0.005):
+        self.embedder = embedder or get_embedder()
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.backend_calls = 0
+        self._pending = []  # (texts, future)
+        self._pending_count = 0
+        self._timer = None
+        self._backend_lock = asyncio.Lock()
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.embedder.dimension), dtype=np.float32)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((list(texts), future))
+        self._pending_count += len(texts)
+        if self._pending_count >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_count = self._pending, [], 0
+        if batch:
+            asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch):
+        from fastapi.concurrency import run_in_threadpool
+
+        texts = [text for request, _ in batch for text in request]
+        try:
+            async with self._backend_lock:
+                self.backend_calls += 1
+                vectors = await run_in_threadpool(self.embedder.embed, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        offset = 0
+        for request, future in batch:
+            if not future.done():
+                future.set_result(vectors[offset:offset + len(request)])
+            offset += len(request)
+
+
+# ---------- Index metadata ----------
+
+def _metadata_path(index_path: str) -> str:
+    return index_path + ".meta.json"
+
+
+def write_index_metadata(index_path: str, embedder: Embedder, **extra) -> Dict[str, object]:
+    """Record the vector space an index was built in next to the index file"""
+    metadata = {**embedder.info(), **extra}
+    with open(_metadata_path(index_path), "w") as f:
+        json.dump(metadata, f)
+    return metadata
+
+
+def read_index_metadata(index_path: str) -> Optional[Dict[str, object]]:
+    path = _metadata_path(index_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def check_index_compatible(index_path: str, index_dimension: int, embedder: Embedder):
+    """
+    Raise ValueError if an index can't be queried with `embedder`'s vectors.
+
+    Indexes written before metadata existed are checked on dimension only.
+    """
+    metadata = read_index_metadata(index_path)
+    if index_dimension != embedder.dimension:
+        raise ValueError(
+            f"Index {index_path} has dimension {index_dimension} but the "
+            f"{embedder.name}:{embedder.model} embedder produces {embedder.dimension}; rebuild the index"
+        )
+    if metadata and (metadata.get("backend"), metadata.get("model")) != (embedder.name, embedder.model):
+        raise ValueError(
+            f"Index {index_path} was built with {metadata.get('backend')}:{metadata.get('model')}, "
+            f"not {embedder.name}:{embedder.model}; rebuild the index"
+        )
@@ -1,32 +1,44 @@
-def process_json_data(json_data, document_id, chunk_size=500):
+from app.utils.chunking import chunk_document
+
+def chunk_page(page, document_id, start_index=0, max_tokens=None):
+    """
+    Split a single JSON page into chunk dictionaries
+
+    Args:
+        page: Page object with a "content" field
+        document_id: ID of the document
+        start_index: chunk_index to assign to the first chunk
+        max_tokens: Token budget per chunk (defaults to the embedding model's)
+
+    Returns:
+        List of chunk dictionaries
+    """
+    return [
+        {
+            "document_id": document_id,
+            "chunk_index": start_index + offset,
+            "content": chunk_text
+        }
+        for offset, chunk_text in enumerate(chunk_document(page.get("content", ""), max_tokens=max_tokens))
+    ]
+
+def process_json_data(json_data, document_id, max_tokens=None):
     """
     Process JSON document into text chunks
-    
+
     Args:
         json_data: Parsed JSON document
         document_id: ID of the document
-        chunk_size: Maximum size of each chunk
-    
+        max_tokens: Token budget per chunk (defaults to the embedding model's)
+
     Returns:
         List of chunk dictionaries
     """
     chunks = []
-    chunk_index = 0
-    
+
     # Extract text based on your JSON structure
     if "pages" in json_data:
         for page in json_data["pages"]:
-            content = page.get("content", "")
-            
-            # Simple chunking by size
-            for i in range(0, len(content), chunk_size):
-                chunk_text = content[i:i+chunk_size]
-                if chunk_text.strip():  # Skip empty chunks
-                    chunks.append({
-                        "document_id": document_id,
-                        "chunk_index": chunk_index,
-                        "content": chunk_text
-                    })
-                    chunk_index += 1
-    
+            chunks.extend(chunk_page(page, document_id, len(chunks), max_tokens))
+
     return chunks
@@ -0,0 +1,488 @@
+"""
+Shared client for the Ollama HTTP API.
+
+Every generate/embeddings call goes through one LLMClient so that:
+
+- HTTP connections to Ollama are kept alive and reused
+- each model has at most LLM_MAX_CONCURRENCY requests in flight, with the
+  rest waiting in a bounded per-model queue
+- a request that finds the queue full (or waits longer than
+  LLM_QUEUE_TIMEOUT for a slot) fails fast with LLMOverloaded, which the
+  routers turn into 503 + Retry-After instead of piling more work onto a
+  saturated server
+- requests are balanced over the OLLAMA_HOSTS pool by least outstanding
+  requests, with per-host circuit breakers, health checks and failover
+- queue depth, in-flight requests, queue wait, rejections and per-host
+  load and circuit state are exported on /metrics
+"""
+import os
+import time
+import asyncio
+import threading
+import logging
+import weakref
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import httpx
+
+from app.utils.tracing import Histogram, record_span
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434")
+# Comma-separated pool of Ollama hosts to balance across; defaults to OLLAMA_HOST alone
+OLLAMA_HOSTS = [h.strip() for h in os.getenv("OLLAMA_HOSTS", OLLAMA_HOST).split(",") if h.strip()]
+# How long Ollama keeps a model resident after a call ("30m", "1h", -1 for forever)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Requests per model sent to each Ollama host at once; match OLLAMA_NUM_PARALLEL on the servers
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+# Requests per model allowed to wait for a slot before new ones are rejected
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "16"))
+# Longest a request waits for a slot before it is rejected
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+# Upper bound on one generation, including model load
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "180"))
+# Suggested client back-off when rejecting with 503
+LLM_RETRY_AFTER_SECONDS = int(os.getenv("LLM_RETRY_AFTER_SECONDS", "10"))
+# Consecutive failures that take a host out of rotation, and how long it stays out
+LLM_CIRCUIT_FAILURES = int(os.getenv("LLM_CIRCUIT_FAILURES", "3"))
+LLM_CIRCUIT_COOLDOWN = float(os.getenv("LLM_CIRCUIT_COOLDOWN", "30"))
+LLM_HEALTH_TIMEOUT = float(os.getenv("LLM_HEALTH_TIMEOUT", "5"))
+
+QUEUE_WAIT = Histogram(
+    "termsheet_llm_queue_wait_seconds",
+    "Time LLM requests waited for a per-model slot",
+    ("model",),
+)
+
+
+class LLMOverloaded(Exception):
+    """The model's queue is full or a slot didn't free up in time"""
+
+    def __init__(self, model: str, reason: str):
+        super().__init__(f"LLM model '{model}' is overloaded: {reason}")
+        self.model = model
+        self.retry_after = LLM_RETRY_AFTER_SECONDS
+
+
+class LLMUnavailable(LLMOverloaded):
+    """Every Ollama host is out of rotation or failed the request"""
+
+
+def _base_url(host: str) -> str:
+    # OLLAMA_HOST is often set as host:port, as the ollama CLI accepts
+    return host if "://" in host else f"http://{host}"
+
+
+class ModelGate:
+    """
+    Concurrency limit and bounded wait queue for one model. A thread
+    semaphore, so sync callers (embedders in the threadpool, warm-up) and
+    async callers share the same limit.
+    """
+
+    def __init__(self, model: str, limit: int, max_queue: int):
+        self.model = model
+        self.limit = limit
+        self.max_queue = max_queue
+        self.waiting = 0
+        self.in_flight = 0
+        self.rejected = 0
+        self._slots = threading.Semaphore(limit)
+        self._lock = threading.Lock()
+
+    def _enqueue(self):
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise LLMOverloaded(self.model, f"{self.waiting} requests already queued")
+            self.waiting += 1
+
+    def _dequeue(self, acquired: bool):
+        with self._lock:
+            self.waiting -= 1
+            if not acquired:
+                self.rejected += 1
+
+    def _started(self, waited: float):
+        with self._lock:
+            self.in_flight += 1
+        QUEUE_WAIT.observe((self.model,), waited)
+        if waited:
+            record_span("llm.queue_wait", waited)
+
+    def acquire(self, timeout: float = LLM_QUEUE_TIMEOUT):
+        if self._slots.acquire(blocking=False):
+            self._started(0.0)
+            return
+        self._enqueue()
+        start = time.perf_counter()
+        acquired = False
+        try:
+            acquired = self._slots.acquire(timeout=timeout)
+        finally:
+            self._dequeue(acquired)
+        if not acquired:
+            raise LLMOverloaded(self.model, f"no slot within {timeout}s")
+        self._started(time.perf_counter() - start)
+
+    async def acquire_async(self, timeout: float = LLM_QUEUE_TIMEOUT):
+        if self._slots.acquire(blocking=False):
+            self._started(0.0)
+            return
+        self._enqueue()
+        start = time.perf_counter()
+        acquired = False
+        waiter = asyncio.get_running_loop().run_in_executor(None, self._slots.acquire, True, timeout)
+        try:
+            acquired = await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            # The waiting thread can't be interrupted: hand back its slot when it gets one
+            waiter.add_done_callback(lambda f: f.result() and self._slots.release())
+            raise
+        finally:
+            self._dequeue(acquired)
+        if not acquired:
+            raise LLMOverloaded(self.model, f"no slot within {timeout}s")
+        self._started(time.perf_counter() - start)
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+
+class LLMBackend:
+    """
+    One Ollama host: its connection pools, outstanding request count and
+    circuit breaker. The circuit opens after LLM_CIRCUIT_FAILURES
+    consecutive failures; after LLM_CIRCUIT_COOLDOWN it lets one trial
+    request (or health check) through, which closes it again on success.
+    """
+
+    def __init__(self, host: str, timeout: httpx.Timeout, limits: httpx.Limits, transport=None, async_transport=None):
+        self.url = _base_url(host)
+        self.timeout = timeout
+        self.limits = limits
+        self.outstanding = 0
+        self.failures = 0
+        self.total_failures = 0
+        self.open_until = 0.0
+        self.trial = False
+        self._transport = transport
+        self._async_transport = async_transport
+        self._sync_client: Optional[httpx.Client] = None
+        self._client_lock = threading.Lock()
+        # Async connections belong to the event loop that opened them; job
+        # workers run each job in a fresh loop, so keep one client per loop
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def state(self, now: Optional[float] = None) -> str:
+        if self.failures < LLM_CIRCUIT_FAILURES:
+            return "closed"
+        return "open" if (now or time.time()) < self.open_until else "half_open"
+
+    def available(self, now: float) -> bool:
+        state = self.state(now)
+        return state == "closed" or (state == "half_open" and not self.trial)
+
+    def client(self) -> httpx.Client:
+        with self._client_lock:
+            if self._sync_client is None:
+                self._sync_client = httpx.Client(
+                    base_url=self.url, timeout=self.timeout, limits=self.limits, transport=self._transport
+                )
+            return self._sync_client
+
+    def async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = httpx.AsyncClient(
+                base_url=self.url, timeout=self.timeout, limits=self.limits, transport=self._async_transport
+            )
+        return client
+
+    async def aclose(self):
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+        with self._client_lock:
+            if self._sync_client is not None:
+                self._sync_client.close()
+                self._sync_client = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "state": self.state(),
+            "outstanding": self.outstanding,
+            "consecutive_failures": self.failures,
+        }
+
+
+def _should_fail_over(error: Exception) -> bool:
+    """
+    Errors after which the request can safely go to another host: it never
+    reached the model (connection refused, connect timeout) or the host said
+    it can't serve it (5xx). A read timeout means a long generation already
+    ran on that host, so it is not repeated elsewhere.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, httpx.RemoteProtocolError))
+
+
+class LLMClient:
+    """
+    Ollama API client with pooled keep-alive connections, per-model
+    backpressure and load balancing over a pool of hosts. Use
+    get_llm_client() for the process-wide instance.
+
+    Each request goes to the available host with the fewest outstanding
+    requests; if that host refuses the connection or answers 5xx, the
+    request fails over to the next one.
+    """
+
+    def __init__(
+        self,
+        hosts: Union[str, Sequence[str]] = OLLAMA_HOSTS,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_queue: int = LLM_MAX_QUEUE,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT,
+        timeout: float = LLM_REQUEST_TIMEOUT,
+        transport: Optional[httpx.BaseTransport] = None,
+        async_transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        if isinstance(hosts, str):
+            hosts = [hosts]
+        if not hosts:
+            raise ValueError("LLMClient needs at least one Ollama host")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.timeout = httpx.Timeout(timeout, connect=LLM_CONNECT_TIMEOUT)
+        self.limits = httpx.Limits(
+            max_connections=None,
+            max_keepalive_connections=max(max_concurrency * 4, 10),
+            keepalive_expiry=60
+        )
+        self.backends = [
+            LLMBackend(host, self.timeout, self.limits, transport, async_transport) for host in hosts
+        ]
+        self._next = 0
+        self._gates: Dict[str, ModelGate] = {}
+        self._lock = threading.Lock()
+
+    def gate(self, model: str) -> ModelGate:
+        """Per-model slots: max_concurrency per host in the pool"""
+        with self._lock:
+            gate = self._gates.get(model)
+            if gate is None:
+                limit = self.max_concurrency * len(self.backends)
+                gate = self._gates[model] = ModelGate(model, limit, self.max_queue)
+            return gate
+
+    def _pick(self, tried) -> Optional[LLMBackend]:
+        """Reserve the available host with the fewest outstanding requests"""
+        now = time.time()
+        with self._lock:
+            # Rotate the starting point so ties spread across hosts
+            count = len(self.backends)
+            ordered = [self.backends[(self._next + i) % count] for i in range(count)]
+            self._next = (self._next + 1) % count
+            candidates = [b for b in ordered if b not in tried and b.available(now)]
+            if not candidates:
+                return None
+            backend = min(candidates, key=lambda b: b.outstanding)
+            if backend.state(now) == "half_open":
+                backend.trial = True
+            backend.outstanding += 1
+            return backend
+
+    def _record(self, backend: LLMBackend, ok: bool, finished: bool = True):
+        with self._lock:
+            if finished:
+                backend.outstanding -= 1
+            backend.trial = False
+            if ok:
+                backend.failures = 0
+                backend.open_until = 0.0
+            else:
+                backend.failures += 1
+                backend.total_failures += 1
+                if backend.failures >= LLM_CIRCUIT_FAILURES:
+                    backend.open_until = time.time() + LLM_CIRCUIT_COOLDOWN
+
+    def _handle_error(self, backend: LLMBackend, error: Exception, model: str) -> bool:
+        """Record the outcome of a failed call; True if it should be retried on another host"""
+        if isinstance(error, httpx.HTTPStatusError) and error.response.status_code < 500:
+            # The host is fine, the request isn't (e.g. unknown model)
+            self._record(backend, ok=True)
+            return False
+        self._record(backend, ok=False)
+        logger.warning(f"Ollama host {backend.url} failed for '{model}': {error!r}")
+        return _should_fail_over(error)
+
+    def _unavailable(self, model: str, error: Optional[Exception]):
+        reason = "no healthy Ollama host" if error is None else f"every Ollama host failed, last error: {error!r}"
+        return LLMUnavailable(model, reason)
+
+    def _post(self, path: str, model: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        gate = self.gate(model)
+        gate.acquire(self.queue_timeout)
+        try:
+            tried, error = set(), None
+            while (backend := self._pick(tried)) is not None:
+                tried.add(backend)
+                try:
+                    response = backend.client().post(path, json={"model": model, **body})
+                    response.raise_for_status()
+                except Exception as e:
+                    if not self._handle_error(backend, e, model):
+                        raise
+                    error = e
+                    continue
+                self._record(backend, ok=True)
+                return response.json()
+            raise self._unavailable(model, error) from error
+        finally:
+            gate.release()
+
+    async def _post_async(self, path: str, model: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        gate = self.gate(model)
+        await gate.acquire_async(self.queue_timeout)
+        try:
+            tried, error = set(), None
+            while (backend := self._pick(tried)) is not None:
+                tried.add(backend)
+                try:
+                    response = await backend.async_client().post(path, json={"model": model, **body})
+                    response.raise_for_status()
+                except asyncio.CancelledError:
+                    self._record(backend, ok=True)
+                    raise
+                except Exception as e:
+                    if not self._handle_error(backend, e, model):
+                        raise
+                    error = e
+                    continue
+                self._record(backend, ok=True)
+                return response.json()
+            raise self._unavailable(model, error) from error
+        finally:
+            gate.release()
+
+    @staticmethod
+    def _generate_body(prompt, format, options, keep_alive) -> Dict[str, Any]:
+        body = {"prompt": prompt, "stream": False, "keep_alive": keep_alive}
+        if format is not None:
+            body["format"] = format
+        if options:
+            body["options"] = options
+        return body
+
+    async def generate(
+        self,
+        model: str,
+        prompt: str,
+        format: Optional[Any] = None,
+        options: Optional[Dict[str, Any]] = None,
+        keep_alive: str = OLLAMA_KEEP_ALIVE
+    ) -> Dict[str, Any]:
+        """Non-streaming /api/generate; the reply text is in ["response"]"""
+        return await self._post_async("/api/generate", model, self._generate_body(prompt, format, options, keep_alive))
+
+    def generate_sync(
+        self,
+        model: str,
+        prompt: str,
+        format: Optional[Any] = None,
+        options: Optional[Dict[str, Any]] = None,
+        keep_alive: str = OLLAMA_KEEP_ALIVE
+    ) -> Dict[str, Any]:
+        return self._post("/api/generate", model, self._generate_body(prompt, format, options, keep_alive))
+
+    async def embeddings(self, model: str, prompt: str, keep_alive: str = OLLAMA_KEEP_ALIVE) -> List[float]:
+        response = await self._post_async("/api/embeddings", model, {"prompt": prompt, "keep_alive": keep_alive})
+        return response["embedding"]
+
+    def embeddings_sync(self, model: str, prompt: str, keep_alive: str = OLLAMA_KEEP_ALIVE) -> List[float]:
+        return self._post("/api/embeddings", model, {"prompt": prompt, "keep_alive": keep_alive})["embedding"]
+
+    async def check_health(self) -> List[Dict[str, Any]]:
+        """
+        Probe every host (GET /api/tags). A passing probe closes the host's
+        circuit; a failing one counts towards opening it, so a dead host is
+        taken out of rotation before a request has to discover it.
+        """
+        async def probe(backend: LLMBackend):
+            try:
+                response = await backend.async_client().get("/api/tags", timeout=LLM_HEALTH_TIMEOUT)
+                response.raise_for_status()
+                self._record(backend, ok=True, finished=False)
+            except Exception as e:
+                if backend.state() != "open":
+                    self._record(backend, ok=False, finished=False)
+                logger.warning(f"Ollama host {backend.url} failed its health check: {e!r}")
+
+        await asyncio.gather(*(probe(backend) for backend in self.backends))
+        return self.status()
+
+    def status(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [backend.status() for backend in self.backends]
+
+    def metrics(self) -> List[str]:
+        """Prometheus lines for per-model queues and per-host load and circuit state"""
+        with self._lock:
+            gates = sorted(self._gates.items())
+            backends = [(b.url, b.outstanding, int(b.state() != "closed"), b.total_failures) for b in self.backends]
+        lines = []
+        for name, help_text, kind, attr in (
+            ("termsheet_llm_queue_depth", "LLM requests waiting for a slot", "gauge", "waiting"),
+            ("termsheet_llm_in_flight", "LLM requests being served by Ollama", "gauge", "in_flight"),
+            ("termsheet_llm_rejected_total", "LLM requests rejected by backpressure", "counter", "rejected"),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            lines += [f'{name}{{model="{model}"}} {getattr(gate, attr)}' for model, gate in gates]
+        for name, help_text, kind, index in (
+            ("termsheet_llm_backend_outstanding", "Requests outstanding per Ollama host", "gauge", 1),
+            ("termsheet_llm_backend_circuit_open", "1 while an Ollama host is out of rotation", "gauge", 2),
+            ("termsheet_llm_backend_failures_total", "Failed requests and health checks per Ollama host", "counter", 3),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            lines += [f'{name}{{host="{backend[0]}"}} {backend[index]}' for backend in backends]
+        return lines
+
+    async def aclose(self):
+        for backend in self.backends:
+            await backend.aclose()
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+        return _client
+
+
+def set_llm_client(client: Optional[LLMClient]) -> Optional[LLMClient]:
+    """Swap the process-wide client (tests, benchmarks); returns the previous one"""
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+        return previous
+
+
+def render_llm_metrics() -> str:
+    """Prometheus lines for the process-wide client's queues and hosts"""
+    if _client is None:
+        return ""
+    return "\n".join(_client.metrics()) + "\n"
@@ -1,22 +1,15 @@
 import os
 import json
 from typing import Dict, Any
-import ollama
-from sentence_transformers import SentenceTransformer
-
-# Initialize model once for efficiency
-_model = None
-
-def get_embedding_model():
-    global _model
-    if _model is None:
-        _model = SentenceTransformer('all-MiniLM-L6-v2')
-    return _model
+from fastapi.concurrency import run_in_threadpool
+from app.utils.embeddings import get_chunk_embedder
+from app.utils.llm_client import get_llm_client, LLMOverloaded
+from app.utils.prompt_compression import prompt_text
+from app.utils.structured_output import VALIDATION_SCHEMA, parse_validation_output
 
 def embed_text(text: str) -> list[float]:
-    """Generate embedding for text using sentence transformer"""
-    model = get_embedding_model()
-    embedding = model.encode(text)
+    """Generate embedding for text in the chunk vector space, for chunk retrieval"""
+    embedding = get_chunk_embedder().embed_one(text)
     return embedding.tolist()  # Convert to list for JSON storage
 
 class LLMValidator:
@@ -30,27 +23,24 @@ class LLMValidator:
         Validate document text using LLM
         """
         # Get the prompt template
-        prompt = self.templates["validation_prompt"].format(text=text)
+        document = await run_in_threadpool(prompt_text, text)
+        prompt = self.templates["validation_prompt"].format(text=document)
         
-        try:
-            # Call the Ollama API
-            response = ollama.generate(
+        async def generate() -> str:
+            # Call the Ollama API, constrained to the result schema
+            response = await get_llm_client().generate(
                 model=self.model,
                 prompt=prompt,
-                format="json",
+                format=VALIDATION_SCHEMA,
                 options={"temperature": 0.0, "num_ctx": 16000}
             )
+            return response["response"]
+        
+        try:
+            # Parse the response, repairing it and re-asking only for missing fields
+            return await parse_validation_output(await generate(), model=self.model, regenerate=generate)
             
-            # Parse the response
-            result = json.loads(response["response"])
-            
-            # Validate the result has all required fields
-            required_fields = ["errors", "criticality_score", "validation_summary"]
-            for field in required_fields:
-                if field not in result:
-                    raise ValueError(f"LLM response missing required field: {field}")
-            
-            return result
-            
+        except LLMOverloaded:
+            raise
         except Exception as e:
             raise Exception(f"LLM validation failed: {str(e)}")
\ No newline at end of file
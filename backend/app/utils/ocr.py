@@ -1,8 +1,150 @@
+import io
+import os
+import hashlib
+import logging
+from typing import List
+
+from app.utils.pdf_extract import PdfText, extract_pdf_pages, get_process_pool
+from app.utils.redis_cache import get_cache
+
+logger = logging.getLogger(__name__)
+
+OCR_ENABLED = os.getenv("OCR_ENABLED", "true").lower() in ("1", "true", "yes")
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+# Pages with fewer extractable characters than this are treated as scanned
+OCR_MIN_CHARS = int(os.getenv("OCR_MIN_CHARS", "20"))
+OCR_CACHE_TTL = int(os.getenv("OCR_CACHE_TTL", str(30 * 24 * 3600)))
+
+
 def extract_text_from_file(file_path: str) -> str:
-    # Example OCR logic here, such as using pytesseract or another OCR tool
+    """OCR a single image file from disk"""
+    with open(file_path, "rb") as f:
+        return ocr_image_bytes(f.read())
+
+
+def ocr_image_bytes(data: bytes, lang: str = OCR_LANG) -> str:
+    """OCR an in-memory image (PNG, JPEG, TIFF, ...)"""
     import pytesseract
     from PIL import Image
 
-    image = Image.open(file_path)
-    text = pytesseract.image_to_string(image)
-    return text
+    image = Image.open(io.BytesIO(data))
+    return pytesseract.image_to_string(image, lang=lang)
+
+
+def _ocr_pdf_page(data: bytes, page_number: int, dpi: int, lang: str) -> str:
+    """Rasterise one 1-based PDF page and OCR it - runs inside a worker process"""
+    import pytesseract
+    from pdf2image import convert_from_bytes
+
+    images = convert_from_bytes(data, dpi=dpi, first_page=page_number, last_page=page_number)
+    return "\n".join(pytesseract.image_to_string(image, lang=lang) for image in images)
+
+
+def _hash_xobjects(digest, resources, seen: set):
+    """Feed every image and form XObject reachable from `resources` into `digest`"""
+    xobjects = (resources or {}).get("/XObject") or {}
+    for name in sorted(xobjects):
+        reference = xobjects[name]
+        xobject = reference.get_object()
+        key = (reference.idnum, reference.generation) if hasattr(reference, "idnum") else id(xobject)
+        digest.update(name.encode())
+        if key in seen:
+            continue
+        seen.add(key)
+        try:
+            digest.update(xobject.get_data())
+        except NotImplementedError:
+            # Filters PyPDF2 can't decode (e.g. JBIG2); the cache key's document hash still applies
+            digest.update(str(xobject.get("/Length")).encode())
+        # Form XObjects wrap their own resources, often the page's scanned image
+        if xobject.get("/Subtype") == "/Form":
+            _hash_xobjects(digest, xobject.get("/Resources"), seen)
+
+
+def page_fingerprint(page) -> str:
+    """
+    Hash a PDF page's content stream and the decoded data of every image it
+    draws, including images nested in form XObjects.
+    """
+    digest = hashlib.sha256()
+    contents = page.get_contents()
+    if contents is not None:
+        digest.update(contents.get_data())
+    _hash_xobjects(digest, page.get("/Resources"), set())
+    return digest.hexdigest()
+
+
+def page_cache_key(document_digest: str, page_number: int, page, dpi: int, lang: str) -> str:
+    """
+    OCR cache key for one page. The document hash and page number scope it
+    to a single page of a single PDF, so a page never gets another page's or
+    another document's text, even when their drawing operators are identical.
+    """
+    return f"{document_digest}:{page_number}:{page_fingerprint(page)}:{dpi}:{lang}"
+
+
+def find_scanned_pages(pages: List[str], min_chars: int = OCR_MIN_CHARS) -> List[int]:
+    """0-based indexes of pages with no meaningful extractable text"""
+    return [i for i, page in enumerate(pages) if len(page.strip()) < min_chars]
+
+
+def ocr_missing_pages(data: bytes, pages: List[str], dpi: int = OCR_DPI, lang: str = OCR_LANG) -> List[int]:
+    """
+    Replace the text of scanned pages in `pages` with OCR output, in place.
+
+    Only pages without extractable text are rasterised. OCR output is cached
+    per page (see page_cache_key); cache misses are OCR'd in the shared
+    process pool. Returns the indexes of pages filled by OCR; a page whose
+    OCR fails keeps its native text and is left out.
+    """
+    scanned = find_scanned_pages(pages)
+    if not scanned:
+        return []
+
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    cache = get_cache("ocr")
+    document = hashlib.sha256(data).hexdigest()
+    keys = {i: page_cache_key(document, i + 1, reader.pages[i], dpi, lang) for i in scanned}
+
+    filled, misses = [], []
+    for i in scanned:
+        cached = cache.get(keys[i])
+        if cached is not None:
+            pages[i] = cached
+            filled.append(i)
+        else:
+            misses.append(i)
+
+    if misses:
+        executor = get_process_pool()
+        futures = {i: executor.submit(_ocr_pdf_page, data, i + 1, dpi, lang) for i in misses}
+        for i, future in futures.items():
+            try:
+                pages[i] = future.result()
+            except Exception as e:
+                logger.warning(f"OCR failed for page {i + 1}: {e}")
+                continue
+            cache.set(keys[i], pages[i], ttl=OCR_CACHE_TTL)
+            filled.append(i)
+
+    return sorted(filled)
+
+
+def extract_pdf_text_with_ocr(data: bytes, dpi: int = OCR_DPI) -> PdfText:
+    """
+    Native PDF text extraction with an OCR fallback for scanned pages.
+
+    If the OCR toolchain (pdf2image/poppler, pytesseract/tesseract) is not
+    available the native text is returned unchanged.
+    """
+    pages = extract_pdf_pages(data)
+    ocr_pages = []
+    if OCR_ENABLED:
+        try:
+            ocr_pages = ocr_missing_pages(data, pages, dpi=dpi)
+        except Exception as e:
+            logger.warning(f"OCR fallback skipped: {e}")
+    return PdfText(pages, ocr_pages)
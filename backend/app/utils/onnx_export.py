@@ -0,0 +1,134 @@
+"""
+Export a sentence-transformers model to ONNX, quantize it to int8 and check
+that its embeddings haven't drifted from the PyTorch model.
+
+    python -m app.utils.onnx_export --model all-MiniLM-L6-v2 --out models/all-MiniLM-L6-v2-onnx
+
+Needs torch, sentence-transformers and onnxruntime at export time only;
+serving needs just onnxruntime and tokenizers.
+"""
+import os
+import json
+import argparse
+from typing import Dict, List
+
+import numpy as np
+
+# Minimum cosine similarity between ONNX and PyTorch embeddings of the same text
+DRIFT_MIN_COSINE = float(os.getenv("EMBEDDING_DRIFT_MIN_COSINE", "0.98"))
+
+DRIFT_SAMPLE_TEXTS = [
+    "The Notes bear interest from the Interest Commencement Date at 5.50% per annum.",
+    "Upon a Change of Control each Noteholder shall have a Put Option.",
+    "Maturity Date: 2030-03-15",
+    "The obligations of the Issuer are secured by collateral in the form of government bonds.",
+    "Governing Law: English law",
+    "If an Event of Default occurs the Notes shall become immediately due and repayable.",
+    "Aggregate Nominal Amount: USD 250,000,000",
+    "What is the redemption price if the issuer calls the notes early?",
+]
+
+
+def export_onnx(model_name: str, out_dir: str, opset: int = 14) -> str:
+    """Export the model's transformer to `out_dir/model.onnx` with its tokenizer"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(out_dir, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    # The fast tokenizer's tokenizer.json is what OnnxEmbedder loads
+    tokenizer.save_pretrained(out_dir)
+    with open(os.path.join(out_dir, "sentence_bert_config.json"), "w") as f:
+        json.dump({"max_seq_length": st_model.max_seq_length, "model": model_name}, f)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic = {0: "batch", 1: "sequence"}
+    path = os.path.join(out_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={**{name: dynamic for name in input_names}, "last_hidden_state": dynamic},
+            opset_version=opset,
+        )
+    return path
+
+
+def quantize_onnx(out_dir: str) -> str:
+    """Dynamic int8 quantization of model.onnx to model.int8.onnx"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    path = os.path.join(out_dir, "model.int8.onnx")
+    quantize_dynamic(os.path.join(out_dir, "model.onnx"), path, weight_type=QuantType.QInt8)
+    return path
+
+
+def embedding_drift(reference, candidate, texts: List[str] = DRIFT_SAMPLE_TEXTS) -> Dict[str, float]:
+    """
+    Compare two embedders on the same texts.
+
+    Returns the min and mean cosine similarity between paired embeddings and
+    whether the nearest-neighbour ranking among the texts is preserved.
+    """
+    a = reference.embed(texts)
+    b = candidate.embed(texts)
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    cosine = (a * b).sum(axis=1)
+
+    def neighbours(vectors):
+        sims = vectors @ vectors.T
+        np.fill_diagonal(sims, -np.inf)
+        return sims.argmax(axis=1)
+
+    return {
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean()),
+        "neighbours_agree": float((neighbours(a) == neighbours(b)).mean()),
+    }
+
+
+def check_drift(reference, candidate, min_cosine: float = DRIFT_MIN_COSINE, **kwargs) -> Dict[str, float]:
+    """embedding_drift, raising ValueError if any text falls below `min_cosine`"""
+    drift = embedding_drift(reference, candidate, **kwargs)
+    if drift["min_cosine"] < min_cosine:
+        raise ValueError(
+            f"{candidate.name}:{candidate.model} drifted from {reference.name}:{reference.model}: "
+            f"min cosine {drift['min_cosine']:.4f} < {min_cosine}"
+        )
+    return drift
+
+
+def main():
+    from app.utils.embeddings import OnnxEmbedder, SentenceTransformerEmbedder
+
+    parser = argparse.ArgumentParser(description="Export, quantize and drift-check an ONNX embedder")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--out", help="Output directory (default models/<model>-onnx)")
+    parser.add_argument("--skip-export", action="store_true", help="Only drift-check an existing export")
+    parser.add_argument("--min-cosine", type=float, default=DRIFT_MIN_COSINE)
+    args = parser.parse_args()
+
+    out_dir = args.out or os.path.join("models", f"{args.model}-onnx")
+    if not args.skip_export:
+        print(f"exported {export_onnx(args.model, out_dir)}")
+        print(f"quantized {quantize_onnx(out_dir)}")
+
+    reference = SentenceTransformerEmbedder(args.model)
+    for quantized in (False, True):
+        candidate = OnnxEmbedder(args.model, model_dir=out_dir, quantized=quantized)
+        drift = check_drift(reference, candidate, min_cosine=args.min_cosine)
+        label = "int8" if quantized else "fp32"
+        print(f"{label}: min cosine {drift['min_cosine']:.4f}, mean {drift['mean_cosine']:.4f}, "
+              f"neighbours agree {drift['neighbours_agree']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import io
+import os
+import bisect
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+# Below this page count the pool's start-up and pickling cost outweighs the gain
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "24"))
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+# Page ranges per worker; more than one evens out pages of uneven cost
+PARTITIONS_PER_WORKER = 2
+
+PAGE_SEPARATOR = "\n"
+
+# One shared pool per worker count, created on first use
+_executors: Dict[int, ProcessPoolExecutor] = {}
+
+
+def get_process_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Shared process pool of `workers` processes (default PDF_EXTRACT_WORKERS)"""
+    workers = workers or PDF_EXTRACT_WORKERS
+    if workers not in _executors:
+        # spawn avoids forking a multi-threaded server process
+        _executors[workers] = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executors[workers]
+
+
+def _extract_page_range(data: bytes, first: int, last: int) -> List[str]:
+    """Extract text of pages [first, last) - runs inside a worker process"""
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    return [reader.pages[i].extract_text() or "" for i in range(first, last)]
+
+
+def _page_ranges(page_count: int, partitions: int) -> List[Tuple[int, int]]:
+    size = -(-page_count // partitions)  # ceil division
+    return [(first, min(first + size, page_count)) for first in range(0, page_count, size)]
+
+
+class PdfText:
+    """
+    Extracted document text with the character offset at which each page starts.
+    """
+
+    def __init__(self, pages: List[str], ocr_pages: Optional[List[int]] = None):
+        self.pages = pages
+        self.ocr_pages = ocr_pages or []  # 0-based indexes of pages filled by OCR
+        self.page_offsets = []
+        offset = 0
+        for page in pages:
+            self.page_offsets.append(offset)
+            offset += len(page) + len(PAGE_SEPARATOR)
+        self.text = PAGE_SEPARATOR.join(pages)
+
+    def page_for_offset(self, offset: int) -> int:
+        """1-based page number containing character `offset` of `text`"""
+        return max(1, bisect.bisect_right(self.page_offsets, offset))
+
+    def page_range(self, start: int, end: int) -> Tuple[int, int]:
+        """First and last 1-based page numbers touched by text[start:end]"""
+        return self.page_for_offset(start), self.page_for_offset(max(start, end - 1))
+
+
+def extract_pdf_pages(
+    data: bytes,
+    workers: Optional[int] = None,
+    min_pages: int = PARALLEL_MIN_PAGES
+) -> List[str]:
+    """
+    Extract the text of every page, in page order.
+
+    Documents with at least `min_pages` pages are partitioned into page
+    ranges and extracted across a pool of `workers` processes (default
+    PDF_EXTRACT_WORKERS); smaller ones are read sequentially in-process.
+    """
+    from PyPDF2 import PdfReader
+
+    page_count = len(PdfReader(io.BytesIO(data)).pages)
+    workers = workers or PDF_EXTRACT_WORKERS
+    if workers < 2 or page_count < max(min_pages, 2):
+        return _extract_page_range(data, 0, page_count)
+
+    ranges = _page_ranges(page_count, workers * PARTITIONS_PER_WORKER)
+    executor = get_process_pool(workers)
+    futures = [executor.submit(_extract_page_range, data, first, last) for first, last in ranges]
+    pages = []
+    for future in futures:  # submission order == page order
+        pages.extend(future.result())
+    return pages
+
+
+def extract_pdf_text(data: bytes, **kwargs) -> PdfText:
+    """Extract a PDF into text with page offsets preserved"""
+    return PdfText(extract_pdf_pages(data, **kwargs))
@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, Any
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+# Number of recent latency samples kept for percentile estimates
+SAMPLE_WINDOW = 2048
+
+
+def _percentiles(samples) -> Dict[str, float]:
+    """Return p50/p95/p99 (milliseconds) for a sequence of second-valued samples"""
+    if not samples:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+
+    def pick(pct: float) -> float:
+        return round(ordered[min(last, int(round(pct * last)))] * 1000, 3)
+
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+class PoolMetrics:
+    """
+    Thread-safe counters and latency windows for a SQLAlchemy connection pool.
+    """
+
+    def __init__(self, window: int = SAMPLE_WINDOW):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.waits = 0
+        self.connects = 0
+        self.invalidations = 0
+        self._acquire_latency = deque(maxlen=window)
+        self._connect_latency = deque(maxlen=window)
+
+    def record_acquire(self, seconds: float, waited: bool):
+        with self._lock:
+            self.checkouts += 1
+            if waited:
+                self.waits += 1
+            self._acquire_latency.append(seconds)
+
+    def record_connect(self, seconds: float):
+        with self._lock:
+            self.connects += 1
+            self._connect_latency.append(seconds)
+
+    def record_checkin(self):
+        with self._lock:
+            self.checkins += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "waits": self.waits,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "acquire_latency": _percentiles(list(self._acquire_latency)),
+                "connect_latency": _percentiles(list(self._connect_latency)),
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that times every checkout and counts checkouts that had to
+    wait because all pooled and overflow connections were in use.
+    """
+
+    def _do_get(self):
+        saturated = self.checkedout() >= self.size() + max(self._max_overflow, 0)
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_metrics.record_acquire(time.perf_counter() - start, waited=saturated)
+
+
+def instrument_engine(engine):
+    """Attach connect/checkin listeners that feed `pool_metrics`"""
+
+    @event.listens_for(engine, "do_connect")
+    def _timed_connect(dialect, conn_rec, cargs, cparams):
+        start = time.perf_counter()
+        connection = dialect.connect(*cargs, **cparams)
+        pool_metrics.record_connect(time.perf_counter() - start)
+        return connection
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        pool_metrics.record_checkin()
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        pool_metrics.record_invalidation()
+
+    return engine
+
+
+def pool_status(engine) -> Dict[str, Any]:
+    """Current occupancy of the engine's pool plus accumulated metrics"""
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+    status.update(pool_metrics.snapshot())
+    return status
@@ -0,0 +1,231 @@
+"""
+Compaction of extracted term-sheet text before it is sent to the LLM.
+
+Prompt evaluation time grows with prompt length, and extracted text carries
+a lot the model doesn't need: page headers and footers repeated on every
+page, disclaimers pasted into several sections, and layout whitespace. The
+stages below remove those without touching the terms themselves:
+
+1. collapse runs of spaces and blank lines
+2. drop short lines that recur at the top or bottom of several pages
+   (page headers and footers; page numbers are ignored so "Page 3 of 12"
+   matches "Page 4 of 12"). Pages are split at form feeds or, failing
+   those, after page-number lines; text without page breaks is left alone
+3. drop repeated paragraphs, keeping the first occurrence
+4. optionally keep only the chunks detect_critical_clauses flags, plus
+   their neighbours
+
+Token counts are word-based estimates (see chunking.TOKENS_PER_WORD).
+"""
+import os
+import re
+import math
+import logging
+from typing import Dict, List
+
+from app.utils.chunking import TOKENS_PER_WORD, chunk_document
+from app.utils.tracing import Histogram, traced
+
+logger = logging.getLogger(__name__)
+
+PROMPT_COMPRESSION = os.getenv("PROMPT_COMPRESSION", "true").lower() in ("1", "true", "yes")
+# Send only critical chunks and their neighbours instead of the whole document
+PROMPT_CRITICAL_ONLY = os.getenv("PROMPT_CRITICAL_ONLY", "false").lower() in ("1", "true", "yes")
+PROMPT_CONTEXT_CHUNKS = int(os.getenv("PROMPT_CONTEXT_CHUNKS", "1"))
+# A line at the edge of this many pages is treated as a page header/footer...
+HEADER_MIN_REPEATS = int(os.getenv("PROMPT_HEADER_MIN_REPEATS", "3"))
+# ...if it is no longer than this and among the first or last HEADER_EDGE_LINES
+# non-blank lines of each page. Lines elsewhere on a page are never removed.
+HEADER_MAX_CHARS = 120
+HEADER_EDGE_LINES = int(os.getenv("PROMPT_HEADER_EDGE_LINES", "2"))
+# Shorter paragraphs ("N/A", "None") are legitimate repeated values, not boilerplate
+DEDUPE_MIN_CHARS = 80
+
+PROMPT_TOKENS = Histogram(
+    "termsheet_llm_prompt_tokens",
+    "Estimated document tokens per LLM prompt, before and after compaction",
+    ("stage",),
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000),
+)
+
+SPACES_RE = re.compile(r"[ \t\u00a0]+")
+BLANK_LINES_RE = re.compile(r"\n{3,}")
+PARAGRAPH_SPLIT_RE = re.compile(r"\n\s*\n")
+PAGE_BREAK = "\f"
+# "Page 3", "page 3 of 12" inside a line; the digits are the only part that changes per page
+PAGE_REF_RE = re.compile(r"\bpage\s+\d+(?:\s*(?:of|/)\s*\d+)?\b", re.IGNORECASE)
+# Lines that are nothing but a page number: "3", "- 3 -", "3 of 12", "3/12", "Page 3 of 12"
+PAGE_NUMBER_LINE_RE = re.compile(
+    r"^(?:page\s+)?[-–(\[]?\s*\d+\s*(?:(?:of|/)\s*\d+)?\s*[-–)\]]?$", re.IGNORECASE
+)
+
+
+class CompressedText:
+    """Compacted document text and what each stage removed"""
+
+    def __init__(self, text: str, original_tokens: int, removed: Dict[str, int]):
+        self.text = text
+        self.original_tokens = original_tokens
+        self.tokens = estimate_tokens(text)
+        self.removed = removed
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.tokens
+
+    def report(self) -> Dict[str, object]:
+        return {
+            "original_tokens": self.original_tokens,
+            "tokens": self.tokens,
+            "tokens_saved": self.tokens_saved,
+            "removed": self.removed,
+        }
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text.split()) * TOKENS_PER_WORD)
+
+
+def _collapse_page(text: str) -> str:
+    lines = [SPACES_RE.sub(" ", line).strip() for line in text.splitlines()]
+    return BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+def collapse_whitespace(text: str) -> str:
+    """Collapse spaces and blank lines; form feeds are kept as lines of their own"""
+    return f"\n{PAGE_BREAK}\n".join(_collapse_page(page) for page in text.split(PAGE_BREAK)).strip()
+
+
+def _line_key(line: str) -> str:
+    if PAGE_NUMBER_LINE_RE.match(line):
+        return "<page number>"
+    return PAGE_REF_RE.sub("page #", line.lower())
+
+
+def _pages(lines: List[str]) -> List[List[int]]:
+    """
+    Indexes of the non-blank lines of each page: pages end at form feeds if
+    there are any, otherwise after lines that carry a page number
+    """
+    if PAGE_BREAK in lines:
+        ends_page = lambda line: line == PAGE_BREAK
+    else:
+        ends_page = lambda line: bool(PAGE_NUMBER_LINE_RE.match(line) or PAGE_REF_RE.search(line))
+    pages, page = [], []
+    for number, line in enumerate(lines):
+        if line and line != PAGE_BREAK:
+            page.append(number)
+        if ends_page(line):
+            pages.append(page)
+            page = []
+    pages.append(page)
+    return [page for page in pages if page]
+
+
+def strip_repeated_lines(
+    text: str,
+    min_repeats: int = HEADER_MIN_REPEATS,
+    edge_lines: int = HEADER_EDGE_LINES
+):
+    """
+    Remove page headers and footers; returns (text, lines removed).
+
+    Only lines among the first or last `edge_lines` of a page are considered,
+    and one is removed when the same line sits at the edge of `min_repeats`
+    pages. "Label:" lines and the line right after them (the value) are
+    always kept.
+    """
+    lines = text.split("\n")
+    pages = _pages(lines)
+    edges: Dict[str, list] = {}
+    for page_number, page in enumerate(pages):
+        for index in set(page[:edge_lines] + page[-edge_lines:]):
+            line = lines[index]
+            previous = next((lines[i] for i in range(index - 1, -1, -1) if lines[i]), "")
+            if len(line) > HEADER_MAX_CHARS or line.endswith(":") or previous.endswith(":"):
+                continue
+            edges.setdefault(_line_key(line), []).append((page_number, index))
+    removed = {
+        index
+        for found in edges.values() if len({page for page, _ in found}) >= min_repeats
+        for _, index in found
+    }
+    kept = [line for number, line in enumerate(lines) if number not in removed and line != PAGE_BREAK]
+    return "\n".join(kept), len(removed)
+
+
+def dedupe_paragraphs(text: str):
+    """Keep the first copy of each repeated paragraph; returns (text, paragraphs removed)"""
+    seen = set()
+    kept = []
+    removed = 0
+    for paragraph in PARAGRAPH_SPLIT_RE.split(text):
+        key = " ".join(paragraph.lower().split())
+        if len(key) >= DEDUPE_MIN_CHARS:
+            if key in seen:
+                removed += 1
+                continue
+            seen.add(key)
+        kept.append(paragraph)
+    return "\n\n".join(kept), removed
+
+
+def keep_critical_chunks(text: str, neighbors: int = PROMPT_CONTEXT_CHUNKS):
+    """
+    Keep the chunks detect_critical_clauses flags plus `neighbors` chunks on
+    each side, in document order. Returns (text, chunks removed); the text is
+    unchanged when nothing is flagged.
+    """
+    from app.utils.critical_clause_detector import detect_critical_clauses
+
+    chunks = chunk_document(text)
+    if not chunks:
+        return text, 0
+    flagged = detect_critical_clauses(chunks)["critical_chunks"]
+    if not flagged:
+        return text, 0
+    keep = set()
+    for chunk in flagged:
+        index = int(chunk["chunk_id"])
+        keep.update(range(max(0, index - neighbors), min(len(chunks), index + neighbors + 1)))
+    kept = [chunks[i].strip() for i in sorted(keep)]
+    return "\n\n".join(kept), len(chunks) - len(kept)
+
+
+@traced("prompt_compress")
+def compress_text(
+    text: str,
+    critical_only: bool = PROMPT_CRITICAL_ONLY,
+    neighbors: int = PROMPT_CONTEXT_CHUNKS
+) -> CompressedText:
+    """
+    Run the compaction stages on document text bound for an LLM prompt.
+
+    Args:
+        text: Extracted document text
+        critical_only: Also reduce the text to critical chunks and neighbours
+        neighbors: Chunks kept either side of each critical chunk
+    """
+    original_tokens = estimate_tokens(text)
+    removed: Dict[str, int] = {}
+    compact = collapse_whitespace(text)
+    compact, removed["header_footer_lines"] = strip_repeated_lines(compact)
+    compact, removed["duplicate_paragraphs"] = dedupe_paragraphs(compact)
+    if critical_only:
+        compact, removed["non_critical_chunks"] = keep_critical_chunks(compact, neighbors)
+    result = CompressedText(compact, original_tokens, removed)
+
+    PROMPT_TOKENS.observe(("original",), result.original_tokens)
+    PROMPT_TOKENS.observe(("compressed",), result.tokens)
+    logger.info(
+        f"Prompt compaction: {result.original_tokens} -> {result.tokens} estimated tokens "
+        f"({result.tokens_saved} saved; removed {removed})"
+    )
+    return result
+
+
+def prompt_text(text: str) -> str:
+    """Document text to embed in an LLM prompt, compacted unless PROMPT_COMPRESSION is off"""
+    if not PROMPT_COMPRESSION:
+        return text
+    return compress_text(text).text
@@ -1,5 +1,5 @@
-import faiss
 import numpy as np
+from app.utils.embeddings import get_chunk_embedder, check_index_compatible
 from typing import Tuple, List, Dict, Any
 import os
 
@@ -19,8 +19,10 @@ class ChatbotRetriever:
                 "Chatbot index not found. Please run build_chatbot_index first."
             )
             
+        import faiss
         self.index = faiss.read_index(index_path)
         self.id_map = np.load(ids_path)
+        check_index_compatible(index_path, self.index.d, get_chunk_embedder())
         
     def query(self, query_vector: np.ndarray, top_k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
         """
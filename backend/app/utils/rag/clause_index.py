@@ -1,11 +1,13 @@
-import faiss
 import numpy as np
-from typing import List
+from typing import List, Optional
+from app.utils.embeddings import get_embedder
 
 class ClauseIndex:
-    def __init__(self, dimension: int = 384):
-        self.dimension = dimension
-        self.index = faiss.IndexFlatL2(dimension)
+    def __init__(self, dimension: Optional[int] = None):
+        import faiss
+        # Defaults to the configured embedding backend's dimension
+        self.dimension = dimension or get_embedder().dimension
+        self.index = faiss.IndexFlatL2(self.dimension)
         self.clause_map = {}
 
     def add_clauses(self, clauses: List[dict]):
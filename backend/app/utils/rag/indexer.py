@@ -1,4 +1,4 @@
-import faiss
+from app.utils.embeddings import get_chunk_embedder, write_index_metadata
 import numpy as np
 from sqlalchemy.orm import Session
 from app.crud.chunk_ops import get_chunks
@@ -45,23 +45,32 @@ def build_faiss_index(doc_id: int, output_dir: str = "app/indices"):
         vectors_array = np.vstack(vectors)
         ids_array = np.array(chunk_ids, dtype=np.int64)
         
-        # Get dimensionality
+        # Get dimensionality; it must match the embedder queries will use
         dim = vectors_array.shape[1]
+        embedder = get_chunk_embedder()
+        if dim != embedder.dimension:
+            raise ValueError(
+                f"Stored vectors have dimension {dim} but the {embedder.name} embedder "
+                f"produces {embedder.dimension}; regenerate the vectors first"
+            )
         
         # Create and train index
+        import faiss
         index = faiss.IndexFlatL2(dim)  # L2 distance
         index.add(vectors_array)
         
         # Save index and ID mapping
         faiss.write_index(index, index_path)
         np.save(ids_path, ids_array)
+        metadata = write_index_metadata(index_path, embedder, document_id=doc_id, vectors=len(vectors))
         
         return {
             "status": "success",
             "document_id": doc_id,
             "vectors_indexed": len(vectors),
             "index_path": index_path,
-            "ids_path": ids_path
+            "ids_path": ids_path,
+            "embedding": metadata
         }
     
     except Exception as e:
@@ -1,5 +1,5 @@
-import faiss
 import numpy as np
+from app.utils.embeddings import get_chunk_embedder, check_index_compatible
 from typing import Tuple, List
 
 class FaissRetriever:
@@ -11,8 +11,10 @@ class FaissRetriever:
             index_path: Path to the saved FAISS index
             ids_path: Path to numpy array of chunk IDs
         """
+        import faiss
         self.index = faiss.read_index(index_path)
         self.id_map = np.load(ids_path)  # maps row-idx → chunk_id
+        check_index_compatible(index_path, self.index.d, get_chunk_embedder())
         
     def query(self, query_vector: np.ndarray, top_k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -0,0 +1,79 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+MEMORY_CACHE_SIZE = int(os.getenv("MEMORY_CACHE_SIZE", "4096"))
+
+
+class MemoryCache:
+    """
+    Thread-safe in-process LRU used when Redis isn't configured.
+    """
+
+    def __init__(self, namespace: str, maxsize: int = MEMORY_CACHE_SIZE):
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class RedisCache:
+    """
+    String cache backed by Redis, keys prefixed with a namespace.
+    """
+
+    def __init__(self, namespace: str, url: str):
+        import redis
+
+        self.namespace = namespace
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[str]:
+        return self.client.get(self._key(key))
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        self.client.set(self._key(key), value, ex=ttl)
+
+
+_caches: Dict[str, object] = {}
+
+
+def get_cache(namespace: str):
+    """
+    Return the cache for a namespace: Redis when REDIS_URL is set and
+    reachable, otherwise an in-process LRU.
+    """
+    cache = _caches.get(namespace)
+    if cache is None:
+        cache = MemoryCache(namespace)
+        if REDIS_URL:
+            try:
+                redis_cache = RedisCache(namespace, REDIS_URL)
+                redis_cache.client.ping()
+                cache = redis_cache
+            except Exception as e:
+                logger.warning(f"Redis unavailable for '{namespace}' cache, using memory: {e}")
+        _caches[namespace] = cache
+    return cache
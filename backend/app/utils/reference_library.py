@@ -0,0 +1,231 @@
+"""
+Reference clause libraries, loaded from the database into prebuilt indexes.
+
+Standard clauses live in the reference_clauses table, one library per
+(product_type, jurisdiction), versioned on every publish. Their embeddings
+are computed once when a version is published and stored as float32 bytes,
+so loading a version is a single query plus one buffer copy into a FAISS
+index, never an embedding call. Matching a document against the library is
+then one matrix search however many clauses it holds.
+
+Indexes are cached per library version. The latest versions are re-read
+every REFERENCE_LIBRARY_REFRESH_SECONDS, so a version published by another
+process is picked up without a restart. Until any library is published (or
+while the database is unreachable) the built-in SEED_CLAUSES are used.
+"""
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.embeddings import get_embedder
+from app.validation.rules import DEFAULT_PRODUCT_TYPE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JURISDICTION = "global"
+# Jurisdiction whose libraries documents are matched against
+REFERENCE_JURISDICTION = os.getenv("REFERENCE_JURISDICTION", DEFAULT_JURISDICTION)
+REFERENCE_LIBRARY_REFRESH_SECONDS = float(os.getenv("REFERENCE_LIBRARY_REFRESH_SECONDS", "60"))
+
+# Standard clauses every term sheet is matched against until a library is published;
+# they also seed the base library of an empty database
+SEED_CLAUSES = (
+    "The interest rate shall be 5.5% per annum.",
+    "The issuer shall provide collateral in the form of government bonds.",
+    "The maturity date shall not exceed 2029-12-31."
+)
+
+
+class ReferenceLibrary:
+    """The clauses of one library version and their stored embeddings"""
+
+    def __init__(
+        self,
+        product_type: str,
+        jurisdiction: str,
+        version: int,
+        clauses: List[str],
+        vectors: Optional[np.ndarray] = None,
+        critical: Optional[List[bool]] = None
+    ):
+        self.product_type = product_type
+        self.jurisdiction = jurisdiction
+        # 0 for the built-in seed clauses
+        self.version = version
+        self.clauses = clauses
+        # None when the clauses still have to be embedded (seed, or another vector space)
+        self.vectors = vectors
+        self.critical = critical or [False] * len(clauses)
+
+    @property
+    def key(self) -> Tuple[str, str, int]:
+        return (self.product_type, self.jurisdiction, self.version)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "product_type": self.product_type,
+            "jurisdiction": self.jurisdiction,
+            "version": self.version,
+            "clauses": len(self.clauses),
+            "precomputed": self.vectors is not None,
+        }
+
+
+SEED_LIBRARY = ReferenceLibrary(DEFAULT_PRODUCT_TYPE, DEFAULT_JURISDICTION, 0, list(SEED_CLAUSES))
+
+
+class ReferenceLibraryStore:
+    """Latest library versions, their loaded clauses and the matchers built on them"""
+
+    def __init__(self, session_factory: Optional[Callable] = None, refresh_seconds: float = REFERENCE_LIBRARY_REFRESH_SECONDS):
+        self._session_factory = session_factory
+        self.refresh_seconds = refresh_seconds
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._checked_at: Optional[float] = None
+        self._libraries: Dict[Tuple[str, str, int], ReferenceLibrary] = {}
+        self._matchers: Dict[Tuple[Any, Tuple[str, str, int]], Any] = {}
+        self._lock = threading.Lock()
+
+    def session(self):
+        if self._session_factory is None:
+            from app.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def versions(self) -> Dict[Tuple[str, str], int]:
+        """Latest version of each library, re-read at most every refresh_seconds"""
+        from app.crud.reference_clause_ops import latest_versions
+
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.refresh_seconds:
+            try:
+                with self.session() as db:
+                    self._versions = latest_versions(db)
+            except Exception as e:
+                logger.warning(f"Could not read reference library versions, keeping {self._versions}: {e}")
+            self._checked_at = now
+        return self._versions
+
+    def invalidate(self):
+        """Re-read the latest versions on next use (after publishing one)"""
+        self._checked_at = None
+
+    def clear(self):
+        with self._lock:
+            self._versions, self._checked_at = {}, None
+            self._libraries.clear()
+            self._matchers.clear()
+
+    def _load(self, product_type: str, jurisdiction: str, version: int) -> ReferenceLibrary:
+        from app.crud.reference_clause_ops import decode_vectors, load_library
+
+        with self.session() as db:
+            rows = load_library(db, product_type, jurisdiction, version)
+        embedder = get_embedder()
+        spaces = {(row.embedding_backend, row.embedding_model) for row in rows}
+        vectors = None
+        if spaces == {(embedder.name, embedder.model)}:
+            vectors = decode_vectors([row.embedding for row in rows], len(rows[0].embedding) // 4)
+        else:
+            logger.warning(
+                f"Reference library {product_type}/{jurisdiction} v{version} was embedded with {sorted(spaces)}, "
+                f"not {embedder.name}:{embedder.model}; embedding it in memory. Republish it to store matching vectors."
+            )
+        return ReferenceLibrary(
+            product_type, jurisdiction, version,
+            [row.text for row in rows], vectors, [row.critical for row in rows]
+        )
+
+    def library(
+        self,
+        product_type: str = DEFAULT_PRODUCT_TYPE,
+        jurisdiction: str = REFERENCE_JURISDICTION
+    ) -> ReferenceLibrary:
+        """
+        The latest library for a product and jurisdiction, falling back to
+        the jurisdiction-agnostic library, then to the base product's, then
+        to the seed clauses
+        """
+        versions = self.versions()
+        candidates = [
+            (product_type, jurisdiction), (product_type, DEFAULT_JURISDICTION),
+            (DEFAULT_PRODUCT_TYPE, jurisdiction), (DEFAULT_PRODUCT_TYPE, DEFAULT_JURISDICTION),
+        ]
+        found = next((c for c in candidates if c in versions), None)
+        if found is None:
+            return SEED_LIBRARY
+        key = (*found, versions[found])
+        library = self._libraries.get(key)
+        if library is None:
+            with self._lock:
+                library = self._libraries.get(key)
+                if library is None:
+                    try:
+                        library = self._load(*key)
+                    except Exception as e:
+                        logger.warning(f"Could not load reference library {key}, using the seed clauses: {e}")
+                        return SEED_LIBRARY
+                    self._libraries[key] = library
+        return library
+
+    def matcher(
+        self,
+        factory: Callable[..., Any],
+        product_type: str = DEFAULT_PRODUCT_TYPE,
+        jurisdiction: str = REFERENCE_JURISDICTION
+    ):
+        """
+        `factory(clauses, vectors=...)` built on the library version, once per
+        version: a newer version gets a new index, older ones are dropped
+        """
+        library = self.library(product_type, jurisdiction)
+        key = (factory, library.key)
+        matcher = self._matchers.get(key)
+        if matcher is None:
+            with self._lock:
+                matcher = self._matchers.get(key)
+                if matcher is None:
+                    matcher = factory(library.clauses, vectors=library.vectors)
+                    stale = [k for k in self._matchers if k[0] is factory and k[1][:2] == library.key[:2]]
+                    for k in stale:
+                        del self._matchers[k]
+                    self._matchers[key] = matcher
+                    logger.info(f"Built reference clause index for {library.info()}")
+        return matcher
+
+
+_store: Optional[ReferenceLibraryStore] = None
+
+
+def get_reference_store() -> ReferenceLibraryStore:
+    global _store
+    if _store is None:
+        _store = ReferenceLibraryStore()
+    return _store
+
+
+def seed_reference_library() -> Optional[Dict[str, Any]]:
+    """
+    Publish SEED_CLAUSES as version 1 of the base library if no library
+    exists yet. Workers starting together race for that one version; the
+    losers find it taken and publish nothing.
+    """
+    from app.crud.reference_clause_ops import LibraryVersionConflict, latest_versions, publish_library
+
+    store = get_reference_store()
+    with store.session() as db:
+        if latest_versions(db):
+            return None
+        try:
+            published = publish_library(
+                db, [{"text": clause} for clause in SEED_CLAUSES], DEFAULT_PRODUCT_TYPE, DEFAULT_JURISDICTION,
+                version=1
+            )
+        except LibraryVersionConflict:
+            return None
+    store.invalidate()
+    return published
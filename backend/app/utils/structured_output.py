@@ -0,0 +1,272 @@
+"""
+Schema-constrained validation output from the LLM, with local repair.
+
+Generations are constrained to the LLMValidationOutput JSON schema (Ollama
+`format`), which removes most malformed output at the source. Whatever
+still comes back broken is handled from cheapest to dearest:
+
+1. repair locally: code fences, surrounding prose, trailing commas, Python
+   literals and output truncated mid-object
+2. coerce field by field: severities in the wrong case, scores as strings,
+   a missing section
+3. re-ask only for what is still missing: a malformed finding is rewritten
+   on its own, a missing summary is written from the findings, and a
+   missing score is derived from the severities without calling the model
+4. regenerate in full only when no findings list can be recovered at all
+"""
+import re
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, ValidationError as SchemaError
+
+from app.schemas import LLMValidationOutput, ValidationError
+from app.utils.llm_client import get_llm_client
+from app.utils.tracing import span
+from app.validation.rules import SEVERITY_SCORES
+
+logger = logging.getLogger(__name__)
+
+# Cheap settings for the small follow-up prompts
+PARTIAL_OPTIONS = {"temperature": 0.0, "num_ctx": 4096, "num_predict": 512}
+
+FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL)
+TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+# Common alternative key names for the finding fields
+ERROR_KEY_ALIASES = {
+    "error_type": "type", "category": "type",
+    "message": "description", "details": "description", "issue": "description",
+    "location": "section", "clause": "section",
+    "level": "severity", "priority": "severity",
+}
+
+
+def json_schema(model: type[BaseModel]) -> Dict[str, Any]:
+    """The model's JSON schema with $refs inlined, as Ollama's `format` expects"""
+    schema = model.model_json_schema()
+    definitions = schema.pop("$defs", {})
+
+    def resolve(node):
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return resolve(definitions[node["$ref"].rsplit("/", 1)[-1]])
+            return {key: resolve(value) for key, value in node.items() if key != "title"}
+        if isinstance(node, list):
+            return [resolve(item) for item in node]
+        return node
+
+    return resolve(schema)
+
+
+VALIDATION_SCHEMA = json_schema(LLMValidationOutput)
+ERROR_SCHEMA = json_schema(ValidationError)
+SUMMARY_SCHEMA = {
+    "type": "object",
+    "properties": {"validation_summary": {"type": "string"}},
+    "required": ["validation_summary"],
+}
+
+
+def _balance(text: str) -> str:
+    """
+    Cut text to its first complete JSON value, or close whatever a truncated
+    one left open. Python literals outside strings become JSON literals.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = escaped = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            i += 1
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                out.append(char)
+                return "".join(out)
+        else:
+            literal = next((lit for lit in PY_LITERALS if text.startswith(lit, i)), None)
+            if literal:
+                out.append(PY_LITERALS[literal])
+                i += len(literal)
+                continue
+        out.append(char)
+        i += 1
+    # Truncated: close the open string, drop a dangling key or separator, close brackets
+    repaired = "".join(out) + ('"' if in_string else "")
+    repaired = re.sub(r'(,\s*"[^"]*"\s*:?\s*|,\s*|:\s*)$', "", repaired.rstrip())
+    return repaired + "".join(reversed(stack))
+
+
+def repair_json(raw: str) -> Any:
+    """Parse model output as JSON, repairing common formatting failures; raises ValueError"""
+    try:
+        return json.loads(raw)
+    except (TypeError, json.JSONDecodeError):
+        pass
+    text = raw or ""
+    fence = FENCE_RE.search(text)
+    if fence:
+        text = fence.group(1)
+    start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        raise ValueError("No JSON object in LLM output")
+    text = TRAILING_COMMA_RE.sub(r"\1", _balance(text[start:]))
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Unrepairable LLM output: {e}")
+
+
+def coerce_error(item: Any) -> Optional[ValidationError]:
+    """A finding from loosely-shaped model output, or None if it can't be read"""
+    if not isinstance(item, dict):
+        return None
+    item = {ERROR_KEY_ALIASES.get(key, key): value for key, value in item.items()}
+    if isinstance(item.get("severity"), str):
+        item["severity"] = item["severity"].strip().upper()
+    item.setdefault("section", "Document")
+    try:
+        return ValidationError(**item)
+    except (SchemaError, TypeError):
+        return None
+
+
+def coerce_score(value: Any) -> Optional[int]:
+    try:
+        return max(0, min(100, int(float(value))))
+    except (TypeError, ValueError):
+        return None
+
+
+def coerce_summary(value: Any) -> Optional[str]:
+    if isinstance(value, str) and value.strip():
+        return value.strip()
+    if isinstance(value, dict) and value:
+        return "; ".join(f"{key}: {val}" for key, val in value.items())
+    return None
+
+
+def coerce_output(data: Any) -> Tuple[Dict[str, Any], List[Any]]:
+    """
+    Read what can be read from parsed model output. Returns the recovered
+    fields (absent when unusable) and the findings that couldn't be read.
+    """
+    recovered: Dict[str, Any] = {}
+    bad_errors: List[Any] = []
+    if not isinstance(data, dict):
+        return recovered, bad_errors
+    raw_errors = data.get("errors")
+    if isinstance(raw_errors, dict):
+        raw_errors = [raw_errors]
+    if isinstance(raw_errors, list):
+        recovered["errors"] = []
+        for item in raw_errors:
+            error = coerce_error(item)
+            if error is None:
+                bad_errors.append(item)
+            else:
+                recovered["errors"].append(error)
+    score = coerce_score(data.get("criticality_score"))
+    if score is not None:
+        recovered["criticality_score"] = score
+    summary = coerce_summary(data.get("validation_summary"))
+    if summary is not None:
+        recovered["validation_summary"] = summary
+    return recovered, bad_errors
+
+
+async def _ask(model: str, prompt: str, schema: Dict[str, Any]) -> Any:
+    response = await get_llm_client().generate(model=model, prompt=prompt, format=schema, options=PARTIAL_OPTIONS)
+    return repair_json(response["response"])
+
+
+async def _rewrite_error(model: str, item: Any) -> Optional[ValidationError]:
+    prompt = (
+        "Rewrite this term sheet validation finding as a JSON object with the fields "
+        "type, description, section and severity (CRITICAL, HIGH, MEDIUM or LOW). "
+        f"Keep its meaning.\n\nFinding: {json.dumps(item, default=str)}"
+    )
+    try:
+        return coerce_error(await _ask(model, prompt, ERROR_SCHEMA))
+    except Exception as e:
+        logger.warning(f"Could not rewrite malformed finding {item!r}: {e}")
+        return None
+
+
+async def _write_summary(model: str, errors: List[ValidationError], score: int) -> str:
+    findings = "\n".join(f"- [{e.severity.value}] {e.section}: {e.description}" for e in errors) or "- none"
+    prompt = (
+        "Write a brief risk assessment (two sentences) of a term sheet with criticality score "
+        f"{score}/100 and these validation findings:\n{findings}"
+    )
+    try:
+        summary = coerce_summary((await _ask(model, prompt, SUMMARY_SCHEMA)).get("validation_summary"))
+    except Exception as e:
+        logger.warning(f"Could not generate validation summary: {e}")
+        summary = None
+    return summary or f"Document validation complete. Found {len(errors)} issues."
+
+
+def derive_score(errors: List[ValidationError]) -> int:
+    """Criticality implied by the worst finding, for when the model omits the score"""
+    return max((SEVERITY_SCORES[e.severity] for e in errors), default=0)
+
+
+async def parse_validation_output(
+    raw: str,
+    model: str,
+    regenerate: Optional[Callable[[], Awaitable[str]]] = None
+) -> Dict[str, Any]:
+    """
+    Turn a validation generation into an LLMValidationOutput dict, repairing
+    and re-asking for only the broken parts. `regenerate` re-runs the full
+    generation; it is used once, and only if no findings list is recoverable.
+    """
+    with span("llm.repair"):
+        try:
+            recovered, bad_errors = coerce_output(repair_json(raw))
+        except ValueError:
+            recovered, bad_errors = {}, []
+
+    if "errors" not in recovered:
+        if regenerate is None:
+            raise ValueError("LLM output has no readable findings")
+        logger.warning("LLM output had no readable findings, regenerating")
+        with span("llm.regenerate"):
+            raw = await regenerate()
+        recovered, bad_errors = coerce_output(repair_json(raw))
+        if "errors" not in recovered:
+            raise ValueError("LLM output has no readable findings after regeneration")
+
+    if bad_errors:
+        logger.info(f"Re-asking for {len(bad_errors)} malformed findings")
+        with span("llm.partial_retry"):
+            for item in bad_errors:
+                error = await _rewrite_error(model, item)
+                if error is not None:
+                    recovered["errors"].append(error)
+
+    recovered.setdefault("criticality_score", derive_score(recovered["errors"]))
+    if "validation_summary" not in recovered:
+        with span("llm.partial_retry"):
+            recovered["validation_summary"] = await _write_summary(
+                model, recovered["errors"], recovered["criticality_score"]
+            )
+    return LLMValidationOutput(**recovered).model_dump(mode="json")
@@ -0,0 +1,197 @@
+import os
+import time
+import asyncio
+import functools
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+TIMING_HEADER_ENABLED = os.getenv("TIMING_HEADER_ENABLED", "false").lower() in ("1", "true", "yes")
+# Clients can opt into the breakdown per request by sending this header
+TIMING_REQUEST_HEADER = "x-request-timing"
+
+# Upper bounds in seconds; spans cover sub-millisecond DB calls to minute-long LLM runs
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Spans recorded during the current request, or None outside a request
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+
+# Every histogram created, in creation order, for /metrics
+HISTOGRAMS: List["Histogram"] = []
+
+
+class Histogram:
+    """
+    Prometheus-style cumulative histogram keyed by a tuple of label values.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], list] = {}
+        HISTOGRAMS.append(self)
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # per-bucket counts (+Inf last), sum, count
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+            items = [(labels, (list(s[0]), s[1], s[2])) for labels, s in items]
+        for labels, (counts, total, count) in items:
+            label_str = ",".join(f'{k}="{v}"' for k, v in zip(self.label_names, labels))
+            sep = "," if label_str else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{label_str}{sep}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_str}}} {total}")
+            lines.append(f"{self.name}_count{{{label_str}}} {count}")
+        return lines
+
+
+STAGE_DURATION = Histogram(
+    "termsheet_stage_duration_seconds",
+    "Time spent in each validation pipeline stage",
+    ("stage",),
+)
+REQUEST_DURATION = Histogram(
+    "termsheet_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("method", "route", "status"),
+)
+
+
+def record_span(name: str, seconds: float):
+    """Record a finished span in the stage histogram and the current request"""
+    STAGE_DURATION.observe((name,), seconds)
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((name, seconds))
+
+
+@contextmanager
+def span(name: str):
+    """Time a block of code as pipeline stage `name`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - start)
+
+
+def traced(name: str):
+    """Decorator timing every call of a sync or async function as stage `name`"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_sqlalchemy(engine, name: str = "db.query"):
+    """Time every statement executed through a SQLAlchemy engine"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("trace_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("trace_start")
+        if starts:
+            record_span(name, time.perf_counter() - starts.pop())
+
+    return engine
+
+
+def server_timing_header(spans: List[Tuple[str, float]]) -> str:
+    """Aggregate spans by stage into a Server-Timing header value"""
+    totals: Dict[str, List[float]] = {}
+    for name, seconds in spans:
+        entry = totals.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+    return ", ".join(
+        f'{name.replace(".", "_")};dur={total * 1000:.1f};desc="{count}x"'
+        for name, (total, count) in totals.items()
+    )
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware collecting per-request spans and route latency.
+
+    When TIMING_HEADER_ENABLED is set, or the client sends
+    `X-Request-Timing: 1`, the stage breakdown is returned in a
+    Server-Timing response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans: List[Tuple[str, float]] = []
+        token = _request_spans.set(spans)
+        wants_header = TIMING_HEADER_ENABLED or any(
+            key == TIMING_REQUEST_HEADER.encode() for key, _ in scope.get("headers", [])
+        )
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if wants_header:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing_header(
+                        spans + [("total", time.perf_counter() - start)]
+                    ).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_spans.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            REQUEST_DURATION.observe(
+                (scope["method"], route_path, str(status["code"])),
+                time.perf_counter() - start,
+            )
+
+
+def render_metrics() -> str:
+    """Prometheus text exposition of all histograms"""
+    lines = [line for histogram in HISTOGRAMS for line in histogram.expose()]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,192 @@
+"""
+Deterministic interest and coupon arithmetic on extracted termsheet fields.
+
+The coupon schedule is rolled back from the maturity date in steps of
+12 / frequency months (a short first period absorbs any stub), then every
+period's year fraction and coupon amount is computed at once with NumPy.
+Against that schedule we check:
+
+- the stated fixed coupon amount against notional x rate x day count
+  fraction, within COUPON_TOLERANCE; the amount may be stated per
+  Calculation Amount or for the aggregate nominal amount, so a match on
+  either basis passes
+- the stated interest payment dates against the dates the maturity date
+  and frequency imply
+- the stated frequency against the number of stated payment dates
+
+Day counts: 30/360 (bond basis), 30E/360, ACT/360, ACT/365 and ACT/ACT
+(ICMA: a regular period is exactly 1 / frequency of a year).
+"""
+import os
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.schemas import ValidationError, Severity
+from app.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# Relative difference tolerated between a stated and a computed coupon amount
+COUPON_TOLERANCE = float(os.getenv("COUPON_TOLERANCE", "0.001"))
+# Longest schedule built; guards against a garbled maturity date
+MAX_PERIODS = 1200
+FREQUENCIES = (1, 2, 4, 12)
+
+
+def _parts(dates: np.ndarray):
+    """Year, month (1-12) and day-of-month arrays of a datetime64[D] array"""
+    months = dates.astype("datetime64[M]")
+    years = months.astype("datetime64[Y]").astype(int) + 1970
+    return years, months.astype(int) % 12 + 1, (dates - months.astype("datetime64[D]")).astype(int) + 1
+
+
+def add_months(dates, months) -> np.ndarray:
+    """`dates` shifted by `months` (broadcast), each day clamped to its month's end"""
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    shifted = dates.astype("datetime64[M]") + months
+    month_length = ((shifted + 1).astype("datetime64[D]") - shifted.astype("datetime64[D]")).astype(int)
+    return shifted.astype("datetime64[D]") + (np.minimum(_parts(dates)[2], month_length) - 1)
+
+
+class CouponSchedule:
+    """Accrual periods of a fixed-rate note and their coupon amounts"""
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, fractions: np.ndarray, amounts: np.ndarray, regular: np.ndarray):
+        self.starts = starts
+        self.ends = ends
+        self.fractions = fractions
+        self.amounts = amounts
+        # False for a stub (shortened first period)
+        self.regular = regular
+
+    def __len__(self) -> int:
+        return len(self.ends)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [
+            {"start": str(s), "end": str(e), "year_fraction": round(float(f), 8), "coupon": round(float(a), 2)}
+            for s, e, f, a in zip(self.starts, self.ends, self.fractions, self.amounts)
+        ]
+
+
+def roll_dates(issue_date: str, maturity_date: str, frequency: int) -> np.ndarray:
+    """
+    Roll dates rolled back from maturity every 12 / frequency months, from
+    the last one on or before the issue date up to maturity
+    """
+    step = 12 // frequency
+    issue, maturity = np.datetime64(issue_date, "D"), np.datetime64(maturity_date, "D")
+    span_months = int((np.datetime64(maturity, "M") - np.datetime64(issue, "M")).astype(int))
+    rolls = add_months(maturity, -step * np.arange(span_months // step + 2)[::-1])
+    return rolls[np.searchsorted(rolls, issue, side="right") - 1:]
+
+
+def year_fractions(starts: np.ndarray, ends: np.ndarray, rolls: np.ndarray, day_count: str, frequency: int) -> np.ndarray:
+    """
+    Year fraction of each period under `day_count`; `rolls` holds the roll
+    date before each period end (the start of the regular period it belongs to)
+    """
+    days = (ends - starts).astype(int)
+    if day_count == "ACT/360":
+        return days / 360.0
+    if day_count == "ACT/365":
+        return days / 365.0
+    if day_count == "ACT/ACT":
+        # ICMA: actual days over the days of the regular period
+        return days / (ends - rolls).astype(int) / frequency
+    y1, m1, d1 = _parts(starts)
+    y2, m2, d2 = _parts(ends)
+    if day_count == "30E/360":
+        d2 = np.minimum(d2, 30)
+    else:
+        d2 = np.where(d1 >= 30, np.minimum(d2, 30), d2)
+    d1 = np.minimum(d1, 30)
+    return (360 * (y2 - y1) + 30 * (m2 - m1) + (d2 - d1)) / 360.0
+
+
+def _frequency(fields: Dict[str, Any]) -> Optional[int]:
+    frequency = fields.get("frequency")
+    if frequency is None and fields.get("payment_dates"):
+        frequency = len(fields["payment_dates"])
+    return frequency if frequency in FREQUENCIES else None
+
+
+def build_schedule(fields: Dict[str, Any]) -> Optional[CouponSchedule]:
+    """The coupon schedule the fields describe, or None if they don't describe one"""
+    frequency = _frequency(fields)
+    try:
+        issue, maturity = np.datetime64(fields["issue_date"], "D"), np.datetime64(fields["maturity_date"], "D")
+        rate, notional = float(fields["coupon_rate"]), float(fields.get("calculation_amount") or fields["amount"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if frequency is None or not issue < maturity:
+        return None
+    rolls = roll_dates(str(issue), str(maturity), frequency)
+    if len(rolls) > MAX_PERIODS:
+        return None
+    ends = rolls[1:]
+    starts = np.concatenate(([issue], ends[:-1]))
+    fractions = year_fractions(starts, ends, rolls[:-1], fields.get("day_count") or "30/360", frequency)
+    # Every period is regular except a first one that starts after its roll date (a short stub)
+    return CouponSchedule(starts, ends, fractions, notional * rate / 100.0 * fractions, starts == rolls[:-1])
+
+
+@traced("calculations")
+def check_calculations(fields: Dict[str, Any]) -> List[ValidationError]:
+    """Numeric cross-checks of the coupon terms; fields that aren't there are not checked"""
+    errors: List[ValidationError] = []
+    frequency, stated_dates = fields.get("frequency"), fields.get("payment_dates")
+    if frequency in FREQUENCIES and stated_dates and len(stated_dates) != frequency:
+        errors.append(ValidationError(
+            type="DATE",
+            description=f"{frequency} interest payments a year, but {len(stated_dates)} payment dates are stated",
+            section="Interest",
+            severity=Severity.MEDIUM
+        ))
+
+    schedule = build_schedule(fields)
+    if schedule is None:
+        return errors
+
+    if stated_dates:
+        _, months, days = _parts(schedule.ends)
+        month_ends = _parts(add_months(schedule.ends.astype("datetime64[M]").astype("datetime64[D]"), 1) - 1)[2]
+        stated_months = np.array([int(d[:2]) for d in stated_dates])
+        stated_days = np.array([int(d[3:]) for d in stated_dates])
+        # A stated date past the end of a short month means that month's last day
+        on_stated = (months[:, None] == stated_months) & (
+            (days[:, None] == stated_days) | ((days == month_ends)[:, None] & (stated_days >= 28))
+        )
+        off_schedule = ~on_stated.any(axis=1)
+        if off_schedule.any():
+            errors.append(ValidationError(
+                type="DATE",
+                description=(
+                    f"Interest payment dates {', '.join(stated_dates)} do not line up with the maturity date "
+                    f"{fields['maturity_date']}; {int(off_schedule.sum())} of {len(schedule)} scheduled payments "
+                    f"fall on other dates (first: {schedule.ends[off_schedule][0]})"
+                ),
+                section="Interest",
+                severity=Severity.HIGH
+            ))
+
+    stated = fields.get("coupon_amount")
+    if stated is not None and schedule.regular.any():
+        basis = fields.get("calculation_amount") or fields["amount"]
+        expected = schedule.amounts[schedule.regular]
+        # The schedule is on `basis`; coupons scale linearly with notional
+        bases = {float(basis), float(fields.get("amount") or basis)}
+        candidates = np.concatenate([expected * (b / float(basis)) for b in bases])
+        if not np.isclose(candidates, float(stated), rtol=COUPON_TOLERANCE, atol=0.0).any():
+            errors.append(ValidationError(
+                type="CALCULATION",
+                description=(
+                    f"Coupon amount {stated:,.2f} does not match {fields['coupon_rate']}% of {basis:,.2f} "
+                    f"under {fields.get('day_count') or '30/360'}: a regular period pays {expected[0]:,.2f}"
+                ),
+                section="Interest",
+                severity=Severity.HIGH
+            ))
+    return errors
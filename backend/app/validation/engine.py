@@ -1,12 +1,19 @@
 import json
 import asyncio
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 
+from fastapi.concurrency import run_in_threadpool
+
 from app.schemas import ValidationResult, ValidationError, ClauseMatch, Severity
-from app.utils.validation_helpers import chunk_text
+from app.utils.chunking import chunk_document
 from app.utils.clause_matcher import FaissClauseMatcher
-from app.utils.critical_clause_detector import detect_critical_clauses, build_validation_prompt
+from app.utils.critical_clause_detector import (
+    CRITICAL_QUERY, QUERY_VECTORS, detect_critical_clauses, build_validation_prompt
+)
+from app.utils.embeddings import EmbeddingBatcher, get_embedder
+from app.validation.fields import evaluate_document
+from app.validation.rules import evaluate_rules
 
 class TermsheetValidationEngine:
     """
@@ -14,55 +21,93 @@ class TermsheetValidationEngine:
     rule-based validation, LLM-based validation, and clause matching.
     """
     
-    def __init__(self, reference_clauses: List[str]):
+    def __init__(
+        self,
+        reference_clauses: List[str],
+        matcher: Optional[FaissClauseMatcher] = None,
+        batcher: Optional[EmbeddingBatcher] = None
+    ):
         """
         Initialize the validation engine with reference clauses.
         
         Args:
             reference_clauses: List of standard clauses to match against
+            matcher: Prebuilt reference clause index to share between engines
+            batcher: Embedding batcher shared by documents validated concurrently
         """
-        from app.crud.validation_ops import ValidationOperations
-        
-        self.rule_validator = ValidationOperations()
         self.reference_clauses = reference_clauses
+        self._matcher = matcher
+        self.batcher = batcher
+
+    @property
+    def matcher(self) -> FaissClauseMatcher:
+        """Reference clause index, built on first use and reused for every document"""
+        if self._matcher is None:
+            self._matcher = FaissClauseMatcher(self.reference_clauses)
+        return self._matcher
+
+    async def _embed_chunks(self, chunks: List[str]):
+        if self.batcher is not None:
+            return await self.batcher.embed(chunks)
+        return await run_in_threadpool(get_embedder().embed, chunks)
 
-    async def validate(self, termsheet_data: Dict[str, Any], text: str) -> ValidationResult:
+    async def _critical_query_vector(self):
+        """The critical clause query, embedded once per embedder through the batcher"""
+        embedder = self.batcher.embedder if self.batcher is not None else get_embedder()
+        key = (embedder.name, embedder.model)
+        if key not in QUERY_VECTORS:
+            QUERY_VECTORS[key] = (await self._embed_chunks([CRITICAL_QUERY]))[0]
+        return QUERY_VECTORS[key]
+
+    async def validate(self, termsheet_data: Optional[Dict[str, Any]], text: str) -> ValidationResult:
         """
         Perform comprehensive validation of a termsheet.
         
         Args:
-            termsheet_data: Structured data extracted from the termsheet
+            termsheet_data: Structured data extracted from the termsheet;
+                extracted from the text when None
             text: Raw text of the termsheet
             
         Returns:
             ValidationResult with errors, criticality score, and clause matches
         """
-        # 1. Rule-based validation
-        rule_result = self.rule_validator.validate_termsheet(termsheet_data)
-        
-        # 2. LLM validation
-        from app.routers.validate import TermsheetValidator
-        validator = TermsheetValidator()
-        llm_result = await validator.validate_with_ollama(text)
-        
-        # 3. Clause-level matching
-        matcher = FaissClauseMatcher(self.reference_clauses)
-        chunks = chunk_text(text)
-        clause_matches = matcher.match(chunks)
-        
-        # 4. Add critical clause detection
-        critical_result = detect_critical_clauses(chunks)
+        # 1. Rule packs over the text and extracted fields
+        if termsheet_data is None:
+            fields, rule_result = await evaluate_document(text)
+            termsheet_data = fields.values
+        else:
+            rule_result = await run_in_threadpool(evaluate_rules, text, termsheet_data)
+        
+        # 2. LLM validation, skipped when the rules are already conclusive
+        if rule_result.conclusive:
+            llm_result = {}
+        else:
+            from app.routers.validate import TermsheetValidator
+            validator = TermsheetValidator()
+            llm_result = await validator.validate_with_ollama(text)
+        
+        # 3. Clause-level matching (chunks are embedded once for steps 3 and 4)
+        chunks = chunk_document(text)
+        vectors = await self._embed_chunks(chunks)
+        clause_matches = await run_in_threadpool(self.matcher.match, chunks, vectors=vectors)
+        
+        # 4. Add critical clause detection (FAISS search off the event loop)
+        if chunks:
+            critical_result = await run_in_threadpool(
+                detect_critical_clauses, chunks, vectors=vectors, query_vector=await self._critical_query_vector()
+            )
+        else:
+            critical_result = {"is_critical": False, "critical_chunks": []}
         
         # 5. Combine errors from all sources
         errors = []
         
         # Add rule-based errors
-        if isinstance(rule_result, dict) and "errors" in rule_result:
-            errors.extend(rule_result["errors"])
+        errors.extend(rule_result.errors)
         
         # Add LLM-based errors
         if isinstance(llm_result, dict) and "errors" in llm_result:
-            errors.extend(llm_result["errors"])
+            errors.extend(ValidationError(**e) for e in llm_result["errors"])
         
         # Add errors from missing critical clauses
         critical_clauses_missing = any(
@@ -89,7 +134,7 @@ class TermsheetValidationEngine:
             ))
         
         # 6. Calculate overall criticality score
-        rule_criticality = rule_result.get("criticality_score", 0) if isinstance(rule_result, dict) else 0
+        rule_criticality = rule_result.criticality_score
         llm_criticality = llm_result.get("criticality_score", 0) if isinstance(llm_result, dict) else 0
         
         criticality_score = max(rule_criticality, llm_criticality)
@@ -120,5 +165,6 @@ class TermsheetValidationEngine:
             errors=errors,
             criticality_score=criticality_score,
             validation_summary=validation_summary,
-            clause_matches=clause_matches
+            clause_matches=clause_matches,
+            extracted_fields=termsheet_data
         )
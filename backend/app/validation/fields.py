@@ -0,0 +1,330 @@
+"""
+Structured field extraction: the termsheet_data the field rules check.
+
+Term sheets state their key terms as "Label: value" lines (or two-column
+tables, which extract as "Label<tab>value"). One pattern holding every known
+label is run over the text in a single pass; the first occurrence of each
+field wins and its value is normalised (ISO dates, numeric amounts and
+rates, ISO currency codes). Only fields in FIELD_FALLBACK_FIELDS that the
+pass could not find are asked of the LLM, in one small schema-constrained
+call, so a well-formatted term sheet needs no LLM call here at all.
+
+Fields: deal_name, issuer, amount (the notional), currency, issue_date,
+maturity_date, coupon_rate (percent), day_count, payment_dates ("MM-DD"
+list), frequency (payments a year), coupon_amount and calculation_amount
+(what the coupon amount is quoted on).
+"""
+import os
+import re
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+
+from app.utils.llm_client import get_llm_client, LLMOverloaded
+from app.utils.prompt_compression import prompt_text
+from app.utils.structured_output import PARTIAL_OPTIONS, repair_json
+from app.utils.tracing import span, traced
+from app.validation.rules import RuleReport, evaluate_rules
+
+logger = logging.getLogger(__name__)
+
+FIELD_LLM_FALLBACK = os.getenv("FIELD_LLM_FALLBACK", "true").lower() in ("1", "true", "yes")
+FIELD_FALLBACK_MODEL = os.getenv("FIELD_FALLBACK_MODEL", "mistral")
+# Fields worth an LLM call when missing: those the base rule pack requires
+FIELD_FALLBACK_FIELDS = tuple(
+    os.getenv("FIELD_FALLBACK_FIELDS", "deal_name,issuer,amount,currency,maturity_date").split(",")
+)
+# Key terms sit at the top of a term sheet; only this much text goes to the fallback
+FIELD_FALLBACK_CHARS = int(os.getenv("FIELD_FALLBACK_CHARS", "8000"))
+# Longest value kept for free-text fields
+MAX_VALUE_CHARS = 200
+
+# Label as written in term sheets -> field
+LABELS = {
+    "deal name": "deal_name", "deal": "deal_name", "transaction": "deal_name", "transaction name": "deal_name",
+    "title": "deal_name", "title of the notes": "deal_name", "title of notes": "deal_name",
+    "description of the notes": "deal_name", "issue name": "deal_name", "series name": "deal_name",
+    "issuer": "issuer", "issuer name": "issuer", "borrower": "issuer",
+    "aggregate nominal amount": "amount", "aggregate principal amount": "amount", "nominal amount": "amount",
+    "principal amount": "amount", "notional amount": "amount", "notional": "amount", "issue size": "amount",
+    "issue amount": "amount", "amount": "amount", "size": "amount",
+    "currency": "currency", "specified currency": "currency", "settlement currency": "currency",
+    "issue date": "issue_date", "issue/settlement date": "issue_date", "settlement date": "issue_date",
+    "maturity date": "maturity_date", "maturity": "maturity_date", "final maturity date": "maturity_date",
+    "interest rate": "coupon_rate", "rate of interest": "coupon_rate", "coupon": "coupon_rate",
+    "coupon rate": "coupon_rate", "fixed rate": "coupon_rate",
+    "day count fraction": "day_count", "day count": "day_count", "day count convention": "day_count",
+    "interest payment dates": "payment_dates", "coupon payment dates": "payment_dates",
+    "interest payment date": "payment_dates", "payment dates": "payment_dates",
+    "interest payment frequency": "frequency", "coupon frequency": "frequency", "payment frequency": "frequency",
+    "frequency": "frequency",
+    "fixed coupon amount": "coupon_amount", "coupon amount": "coupon_amount", "interest amount": "coupon_amount",
+    "calculation amount": "calculation_amount", "specified denomination": "calculation_amount",
+    "denomination": "calculation_amount",
+}
+FIELDS = tuple(dict.fromkeys(LABELS.values()))
+# What each field means, for the fallback prompt
+FIELD_DESCRIPTIONS = {
+    "deal_name": "name or title of the deal or notes",
+    "issuer": "legal name of the issuer",
+    "amount": "aggregate nominal/notional amount, with its currency",
+    "currency": "ISO currency code of the notes",
+    "issue_date": "issue or settlement date",
+    "maturity_date": "maturity date",
+    "coupon_rate": "fixed interest rate, in percent per annum",
+    "day_count": "day count fraction",
+    "payment_dates": "interest payment dates",
+    "frequency": "interest payments per year",
+    "coupon_amount": "fixed coupon amount per period",
+    "calculation_amount": "calculation amount or denomination the coupon amount is quoted on",
+}
+
+LINE_RE = re.compile(
+    r"^[ \t]*(?P<label>"
+    + "|".join(re.escape(label).replace(r"\ ", r"\s+") for label in sorted(LABELS, key=len, reverse=True))
+    + r")[ \t]*(?::|\t|[ ]{2,}|[-–—][ \t])[ \t]*(?P<value>\S[^\n]*)",
+    re.IGNORECASE | re.MULTILINE
+)
+CURRENCY_CODES = (
+    "USD", "EUR", "GBP", "JPY", "CHF", "CAD", "AUD", "NZD", "SEK", "NOK", "DKK", "HKD", "SGD",
+    "CNY", "CNH", "INR", "ZAR", "BRL", "MXN", "PLN", "CZK", "HUF", "TRY", "KRW",
+)
+CURRENCY_NAMES = {
+    "$": "USD", "€": "EUR", "£": "GBP", "¥": "JPY",
+    "dollar": "USD", "euro": "EUR", "sterling": "GBP", "pound": "GBP", "yen": "JPY", "swiss franc": "CHF",
+}
+CURRENCY_RE = re.compile(
+    r"(?<![A-Za-z])(" + "|".join(CURRENCY_CODES) + r")(?![A-Za-z])"
+    r"|(?i:(" + "|".join(re.escape(name) for name in CURRENCY_NAMES) + "))"
+)
+AMOUNT_RE = re.compile(
+    r"(\d[\d,.' ]*\d|\d)\s*(billion|bn|million|mn|mm|m|thousand|k)?(?![a-z])", re.IGNORECASE
+)
+SCALES = {"billion": 1e9, "bn": 1e9, "million": 1e6, "mn": 1e6, "mm": 1e6, "m": 1e6, "thousand": 1e3, "k": 1e3}
+PERCENT_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:%|per\s*cent|percent)", re.IGNORECASE)
+# A rate quoted against a benchmark is a margin, not a fixed coupon
+FLOATING_RE = re.compile(r"euribor|libor|sofr|sonia|\bestr\b|€str|floating|benchmark|reference rate", re.IGNORECASE)
+DATE_RE = re.compile(
+    r"\d{4}-\d{2}-\d{2}"
+    r"|\d{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]{3,9}\.?,?\s+\d{4}"
+    r"|[A-Za-z]{3,9}\.?\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}"
+    r"|\d{1,2}[/.]\d{1,2}[/.]\d{4}"
+)
+DATE_FORMATS = ("%Y-%m-%d", "%d %B %Y", "%d %b %Y", "%B %d %Y", "%b %d %Y", "%d/%m/%Y", "%d.%m.%Y")
+ORDINAL_RE = re.compile(r"(?<=\d)(?:st|nd|rd|th)\b|[.,]")
+MONTHS = ("january", "february", "march", "april", "may", "june", "july", "august",
+          "september", "october", "november", "december")
+_MONTH = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+# "15 March and 15 September" / "March 15 and September 15"
+DAY_MONTH_RE = re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+{_MONTH}|\b{_MONTH}\s+(\d{{1,2}})(?!\d)", re.IGNORECASE)
+DAY_COUNT_PATTERNS = (
+    ("30E/360", re.compile(r"30e/360|eurobond basis", re.IGNORECASE)),
+    ("30/360", re.compile(r"30/360|bond basis", re.IGNORECASE)),
+    ("ACT/360", re.compile(r"act(?:ual)?/360", re.IGNORECASE)),
+    ("ACT/365", re.compile(r"act(?:ual)?/365", re.IGNORECASE)),
+    ("ACT/ACT", re.compile(r"act(?:ual)?/act(?:ual)?", re.IGNORECASE)),
+)
+FREQUENCIES = (
+    (2, re.compile(r"semi[- ]?annual|twice", re.IGNORECASE)),
+    (4, re.compile(r"quarter", re.IGNORECASE)),
+    (12, re.compile(r"month", re.IGNORECASE)),
+    (1, re.compile(r"annual|yearly|once a year", re.IGNORECASE)),
+)
+# LLM answers meaning "not stated"
+EMPTY_VALUES = {"", "null", "none", "n/a", "na", "not stated", "not specified", "unknown"}
+
+
+def parse_date(value: str) -> Optional[str]:
+    """The first date in `value` as YYYY-MM-DD; day-first for numeric dates"""
+    found = DATE_RE.search(value)
+    if not found:
+        return None
+    text = found.group()
+    if re.search(r"[A-Za-z]", text):
+        text = " ".join(ORDINAL_RE.sub(" ", text).split())
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_number(text: str) -> Optional[float]:
+    """A number written with thousands separators: 250,000,000 / 250.000.000 / 1,234.5"""
+    digits = text.replace(" ", "").replace("'", "")
+    if digits.count(".") > 1 or ("." in digits and "," in digits and digits.index(".") < digits.index(",")):
+        digits = digits.replace(".", "").replace(",", ".")
+    digits = digits.replace(",", "")
+    try:
+        return float(digits)
+    except ValueError:
+        return None
+
+
+def parse_currency(value: str) -> Optional[str]:
+    found = CURRENCY_RE.search(value)
+    if not found:
+        return None
+    return found.group(1) or CURRENCY_NAMES[found.group(2).lower()]
+
+
+def parse_amount(value: str) -> Optional[float]:
+    for found in AMOUNT_RE.finditer(value):
+        number = parse_number(found.group(1))
+        if number is not None:
+            return number * SCALES.get((found.group(2) or "").lower(), 1)
+    return None
+
+
+def parse_coupon(value: str) -> Optional[float]:
+    if FLOATING_RE.search(value):
+        return None
+    found = PERCENT_RE.search(value)
+    return float(found.group(1)) if found else None
+
+
+def parse_day_count(value: str) -> Optional[str]:
+    """The day count convention as 30/360, 30E/360, ACT/360, ACT/365 or ACT/ACT"""
+    return next((name for name, pattern in DAY_COUNT_PATTERNS if pattern.search(value)), None)
+
+
+def parse_frequency(value: str) -> Optional[int]:
+    """Payments per year"""
+    return next((per_year for per_year, pattern in FREQUENCIES if pattern.search(value)), None)
+
+
+def parse_payment_dates(value: str) -> Optional[List[str]]:
+    """Recurring payment dates as sorted "MM-DD" strings"""
+    dates = set()
+    for found in DAY_MONTH_RE.finditer(value):
+        day, month = (found.group(1), found.group(2)) if found.group(1) else (found.group(4), found.group(3))
+        month_number = next(i for i, name in enumerate(MONTHS, 1) if name.startswith(month.lower()[:3]))
+        if 1 <= int(day) <= 31:
+            dates.add(f"{month_number:02d}-{int(day):02d}")
+    return sorted(dates) or None
+
+
+def parse_text(value: str) -> Optional[str]:
+    value = value.strip().strip(".;,").strip()
+    return value[:MAX_VALUE_CHARS] or None
+
+
+PARSERS = {
+    "deal_name": parse_text,
+    "issuer": parse_text,
+    "amount": parse_amount,
+    "currency": parse_currency,
+    "issue_date": parse_date,
+    "maturity_date": parse_date,
+    "coupon_rate": parse_coupon,
+    "day_count": parse_day_count,
+    "payment_dates": parse_payment_dates,
+    "frequency": parse_frequency,
+    "coupon_amount": parse_amount,
+    "calculation_amount": parse_amount,
+}
+
+
+class ExtractedFields:
+    """Fields extracted from a document and where each came from"""
+
+    def __init__(self, values: Dict[str, Any], sources: Dict[str, str]):
+        self.values = values
+        self.sources = sources
+
+    @property
+    def missing(self) -> Tuple[str, ...]:
+        return tuple(field for field in FIELDS if field not in self.values)
+
+    def set(self, field: str, value: Any, source: str):
+        self.values[field] = value
+        self.sources[field] = source
+
+    def report(self) -> Dict[str, Any]:
+        return {"values": self.values, "sources": self.sources, "missing": list(self.missing)}
+
+
+@traced("field_extract")
+def extract_fields(text: str) -> ExtractedFields:
+    """Every field the label pattern finds, from one pass over the text"""
+    fields = ExtractedFields({}, {})
+    for found in LINE_RE.finditer(text):
+        field = LABELS[" ".join(found.group("label").lower().split())]
+        if field in fields.values:
+            continue
+        raw = found.group("value")
+        value = PARSERS[field](raw)
+        if value is not None:
+            fields.set(field, value, "text")
+        # "Aggregate Nominal Amount: USD 250,000,000" also states the currency
+        if field == "amount" and "currency" not in fields.values:
+            currency = parse_currency(raw)
+            if currency:
+                fields.set("currency", currency, "text")
+    return fields
+
+
+def _fallback_schema(missing) -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": {field: {"type": "string"} for field in missing},
+        "required": list(missing),
+    }
+
+
+async def complete_fields(fields: ExtractedFields, text: str) -> ExtractedFields:
+    """
+    Ask the LLM for the FIELD_FALLBACK_FIELDS the text pass missed. Fallback
+    failures are logged and leave the fields as they were: the field rules
+    then report what is still missing.
+    """
+    missing = [field for field in FIELD_FALLBACK_FIELDS if field in fields.missing]
+    if not missing or not FIELD_LLM_FALLBACK:
+        return fields
+    document = (await run_in_threadpool(prompt_text, text))[:FIELD_FALLBACK_CHARS]
+    wanted = "\n".join(f"- {field}: {FIELD_DESCRIPTIONS[field]}" for field in missing)
+    prompt = (
+        "Extract these fields from the term sheet below, copying values as written. "
+        f"Use an empty string for a field the document does not state.\n{wanted}\n\nTerm sheet:\n{document}"
+    )
+    try:
+        with span("fields.llm_fallback"):
+            response = await get_llm_client().generate(
+                model=FIELD_FALLBACK_MODEL, prompt=prompt, format=_fallback_schema(missing), options=PARTIAL_OPTIONS
+            )
+        answer = repair_json(response["response"])
+    except (LLMOverloaded, httpx.HTTPError, ValueError, KeyError) as e:
+        logger.warning(f"Field extraction fallback failed for {missing}: {e!r}")
+        return fields
+    if not isinstance(answer, dict):
+        return fields
+    for field in missing:
+        raw = answer.get(field)
+        if raw is None or str(raw).strip().lower() in EMPTY_VALUES:
+            continue
+        value = PARSERS[field](str(raw))
+        if value is not None:
+            fields.set(field, value, "llm")
+    logger.info(f"Field extraction fallback filled {sorted(f for f in missing if f in fields.values)} of {missing}")
+    return fields
+
+
+async def evaluate_document(text: str) -> Tuple[ExtractedFields, RuleReport]:
+    """
+    Extract fields and evaluate the rule packs on text and fields. The LLM
+    fallback for missing fields runs only when the rules aren't already
+    conclusive; the rules are re-run on what it filled in.
+    """
+    fields = await run_in_threadpool(extract_fields, text)
+    report = await run_in_threadpool(evaluate_rules, text, fields.values)
+    if report.conclusive:
+        return fields, report
+    filled = len(fields.values)
+    fields = await complete_fields(fields, text)
+    if len(fields.values) > filled:
+        report = await run_in_threadpool(evaluate_rules, text, fields.values)
+    return fields, report
@@ -0,0 +1,363 @@
+"""
+Declarative rule engine for term sheets.
+
+Rules live in JSON rule packs (app/validation/rule_packs/*.json), one per
+product type; a pack can extend another and lists `detect` terms used to
+recognise its product type. All packs are compiled once into a single
+evaluator; the document is tokenised once and every text rule reads that
+one scan. Rules on extracted fields run afterwards on the field dict,
+followed by the numeric coupon checks (app.validation.calculations).
+
+Rule kinds:
+
+- required_term: fires when none of `terms` occurs (whole words, case-insensitive)
+- forbidden_term: fires on the first occurrence of any of `terms`
+- token_sequence: fires where consecutive words match the `tokens` regexes
+- date: fires for each distinct ISO-shaped date that isn't a real date within
+  [min_year, max_year]
+- required_fields: fires for each of `fields` missing from the extracted fields
+- field_range: fires when numeric `field` is outside [min, max]
+- field_order: fires when date field `before` is not earlier than `after`
+
+Every rule has id, type, section, severity and a `message` template
+({match}, {field}, {value}). A fired rule marked `conclusive` settles the
+verdict without the LLM. Term rules with "match": "prefix" also accept a
+term whose last word starts a longer one ("collateral" in "Collateralised",
+"issuer" in "Issuers:"); hyphenated and possessive words count as their parts.
+"""
+import os
+import re
+import json
+import time
+import logging
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.schemas import ValidationError, Severity
+from app.validation.calculations import check_calculations
+from app.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+RULE_PACKS_DIR = os.getenv(
+    "RULE_PACKS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rule_packs")
+)
+DEFAULT_PRODUCT_TYPE = "base"
+# Criticality implied by the worst finding; a conclusive failure is 100
+SEVERITY_SCORES = {Severity.CRITICAL: 90, Severity.HIGH: 70, Severity.MEDIUM: 40, Severity.LOW: 15}
+
+TEXT_KINDS = {"required_term", "forbidden_term", "token_sequence", "date"}
+FIELD_KINDS = {"required_fields", "field_range", "field_order"}
+TOKEN_STRIP = ".,;:!?()[]{}\"'"
+# Hyphenated and possessive words also count as their parts ("interest-bearing", "issuer's")
+WORD_PARTS_RE = re.compile(r"[-'’/]")
+MATCH_MODES = ("word", "prefix")
+DATE_SHAPE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+class RuleError(ValueError):
+    """A rule pack is malformed"""
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased whitespace tokens with surrounding punctuation removed"""
+    return [token for token in (raw.strip(TOKEN_STRIP).lower() for raw in text.split()) if token]
+
+
+def _term_tokens(term: str) -> Tuple[str, ...]:
+    tokens = tuple(tokenize(term))
+    if not tokens:
+        raise RuleError(f"Empty term {term!r}")
+    return tokens
+
+
+def _parse_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value).strip(), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+class Rule:
+    def __init__(self, spec: Dict[str, Any], pack: str):
+        try:
+            self.id = spec["id"]
+            self.kind = spec["kind"]
+            self.type = spec["type"]
+            self.section = spec["section"]
+            self.severity = Severity(spec["severity"])
+            self.message = spec["message"]
+        except (KeyError, ValueError) as e:
+            raise RuleError(f"Rule {spec.get('id', '?')} in pack '{pack}' is invalid: {e}")
+        if self.kind not in TEXT_KINDS | FIELD_KINDS:
+            raise RuleError(f"Rule {self.id} has unknown kind '{self.kind}'")
+        self.pack = pack
+        self.spec = spec
+        self.conclusive = bool(spec.get("conclusive", False))
+        # Token form of each term -> the term as written, for messages
+        self.terms = {_term_tokens(term): term for term in spec.get("terms", [])}
+        self.match = spec.get("match", "word")
+        if self.match not in MATCH_MODES:
+            raise RuleError(f"Rule {self.id} has unknown match '{self.match}'")
+        # Matched against lower-cased text
+        self.patterns = [re.compile(p) for p in spec.get("tokens", [])]
+        self.sequence = re.compile(r"\s+".join(f"(?:{p})" for p in spec.get("tokens", [])) + r"(?!\w)")
+        if self.kind in ("required_term", "forbidden_term") and not self.terms:
+            raise RuleError(f"Rule {self.id} needs terms")
+        if self.kind == "token_sequence" and not self.patterns:
+            raise RuleError(f"Rule {self.id} needs tokens")
+
+    def error(self, **values) -> ValidationError:
+        return ValidationError(
+            type=self.type,
+            description=self.message.format(**values),
+            section=self.section,
+            severity=self.severity
+        )
+
+
+class RuleReport:
+    """Outcome of evaluating one document against its product's rule pack"""
+
+    def __init__(self, product_type: str, errors: List[ValidationError], fired: List[Rule], timings: Dict[str, float]):
+        self.product_type = product_type
+        self.errors = errors
+        self.fired = fired
+        self.timings = timings
+
+    @property
+    def conclusive(self) -> bool:
+        """A conclusive rule fired, so the document fails without asking the LLM"""
+        return any(rule.conclusive for rule in self.fired)
+
+    @property
+    def criticality_score(self) -> int:
+        if self.conclusive:
+            return 100
+        return max((SEVERITY_SCORES[e.severity] for e in self.errors), default=0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "product_type": self.product_type,
+            "errors": [e.model_dump(mode="json") for e in self.errors],
+            "criticality_score": self.criticality_score,
+            "conclusive": self.conclusive,
+            "fired": [rule.id for rule in self.fired],
+            "timings": self.timings,
+        }
+
+
+class DocumentScan:
+    """
+    One pass over a document's tokens, shared by every text rule. The pass
+    collects the document's vocabulary (its distinct tokens), which answers
+    single-word terms and dates outright. Multi-word terms and token
+    sequences are confirmed against the text only when all their words are
+    in the vocabulary, with a search anchored on a literal where possible.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lowered = text.lower()
+        self.vocabulary = {token.strip(TOKEN_STRIP) for token in set(self.lowered.split())}
+        self.vocabulary.update(
+            part.strip(TOKEN_STRIP)
+            for token in [t for t in self.vocabulary if WORD_PARTS_RE.search(t)]
+            for part in WORD_PARTS_RE.split(token)
+        )
+        self.vocabulary.discard("")
+        self._terms: Dict[Tuple[Tuple[str, ...], bool], bool] = {}
+
+    def _confirmed(self, pattern: "re.Pattern", boundary: str):
+        """Matches of `pattern` in the lowered text that start at a word boundary"""
+        for found in pattern.finditer(self.lowered):
+            start = found.start()
+            previous = self.lowered[start - 1] if start else " "
+            if not (previous.isalnum() or previous in boundary):
+                yield found
+
+    def _has_word(self, word: str, prefix: bool) -> bool:
+        if word in self.vocabulary:
+            return True
+        return prefix and any(token.startswith(word) for token in self.vocabulary)
+
+    def has_term(self, term: Tuple[str, ...], prefix: bool = False) -> bool:
+        """Whether the words of `term` occur in order; with `prefix` the last may start a longer word"""
+        key = (term, prefix)
+        if key not in self._terms:
+            if not (all(token in self.vocabulary for token in term[:-1]) and self._has_word(term[-1], prefix)):
+                self._terms[key] = False
+            elif len(term) == 1:
+                self._terms[key] = True
+            else:
+                end = "" if prefix else r"(?!\w)"
+                pattern = re.compile(r"\s+".join(re.escape(token) for token in term) + end)
+                self._terms[key] = next(self._confirmed(pattern, "_"), None) is not None
+        return self._terms[key]
+
+    def sequences(self, rule: Rule) -> List[str]:
+        """Text of each run of consecutive tokens matching the rule's patterns"""
+        if not all(any(p.fullmatch(token) for token in self.vocabulary) for p in rule.patterns):
+            return []
+        return [" ".join(found.group().split()) for found in self._confirmed(rule.sequence, "_.")]
+
+    def dates(self) -> List[str]:
+        return [token for token in self.vocabulary if DATE_SHAPE_RE.fullmatch(token)]
+
+
+class RuleEngine:
+    """
+    Every pack's rules compiled into one evaluator: the document is
+    scanned once (see DocumentScan) and each text rule reads the shared
+    scan, then field rules run on the extracted fields.
+    """
+
+    def __init__(self, packs: Dict[str, Dict[str, Any]]):
+        self.packs = packs
+        self._own = {name: [Rule(spec, name) for spec in pack.get("rules", [])] for name, pack in packs.items()}
+        self.rules = [rule for rules in self._own.values() for rule in rules]
+        ids = [rule.id for rule in self.rules]
+        duplicates = sorted({i for i in ids if ids.count(i) > 1})
+        if duplicates:
+            raise RuleError(f"Duplicate rule ids: {', '.join(duplicates)}")
+        self.pack_rules = {name: self._resolve(name, []) for name in packs}
+        self.detect = {name: [_term_tokens(t) for t in pack.get("detect", [])] for name, pack in packs.items()}
+
+    def _resolve(self, name: str, seen: List[str]) -> List[Rule]:
+        """Rules of a pack, after those of the packs it extends"""
+        if name in seen:
+            raise RuleError(f"Rule pack inheritance cycle: {' -> '.join(seen + [name])}")
+        if name not in self.packs:
+            raise RuleError(f"Unknown rule pack '{name}'")
+        parent = self.packs[name].get("extends")
+        inherited = self._resolve(parent, seen + [name]) if parent else []
+        return inherited + self._own[name]
+
+    @classmethod
+    def from_directory(cls, path: str = RULE_PACKS_DIR) -> "RuleEngine":
+        packs = {}
+        for filename in sorted(os.listdir(path)):
+            if filename.endswith(".json"):
+                with open(os.path.join(path, filename), "r") as f:
+                    pack = json.load(f)
+                packs[pack.get("name") or filename[:-5]] = pack
+        if DEFAULT_PRODUCT_TYPE not in packs:
+            raise RuleError(f"No '{DEFAULT_PRODUCT_TYPE}' rule pack in {path}")
+        return cls(packs)
+
+    def detect_product_type(self, scan: DocumentScan) -> str:
+        """The pack with the most distinct detect terms in the document"""
+        scores = {name: sum(scan.has_term(term) for term in terms) for name, terms in self.detect.items()}
+        best = max(scores, key=lambda name: scores[name])
+        return best if scores[best] > 0 else DEFAULT_PRODUCT_TYPE
+
+    def _text_errors(self, rule: Rule, scan: DocumentScan) -> List[ValidationError]:
+        if rule.kind == "required_term":
+            prefix = rule.match == "prefix"
+            return [] if any(scan.has_term(term, prefix) for term in rule.terms) else [rule.error()]
+        if rule.kind == "forbidden_term":
+            found = next((term for term in rule.terms if scan.has_term(term, rule.match == "prefix")), None)
+            return [] if found is None else [rule.error(match=rule.terms[found])]
+        if rule.kind == "token_sequence":
+            found = scan.sequences(rule)
+        else:
+            low, high = rule.spec.get("min_year", 1), rule.spec.get("max_year", 9999)
+            found = [
+                value for value in sorted(scan.dates())
+                if (parsed := _parse_date(value)) is None or not low <= parsed.year <= high
+            ]
+        if rule.spec.get("once", False):
+            found = found[:1]
+        return [rule.error(match=match) for match in found]
+
+    def _field_errors(self, rule: Rule, fields: Dict[str, Any]) -> List[ValidationError]:
+        spec = rule.spec
+        if rule.kind == "required_fields":
+            return [rule.error(field=f) for f in spec["fields"] if fields.get(f) in (None, "")]
+        if rule.kind == "field_range":
+            value = fields.get(spec["field"])
+            if value is None:
+                return []
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                return [rule.error(field=spec["field"], value=value)]
+            low, high = spec.get("min", float("-inf")), spec.get("max", float("inf"))
+            return [] if low <= number <= high else [rule.error(field=spec["field"], value=value)]
+        # field_order
+        before, after = _parse_date(fields.get(spec["before"])), _parse_date(fields.get(spec["after"]))
+        if before is None or after is None or before < after:
+            return []
+        return [rule.error(field=spec["before"], value=fields.get(spec["before"]))]
+
+    def rules_for(self, product_type: str) -> List[Rule]:
+        if product_type not in self.pack_rules:
+            raise RuleError(f"Unknown product type '{product_type}'")
+        return self.pack_rules[product_type]
+
+    @traced("rules")
+    def evaluate(
+        self,
+        text: Optional[str],
+        fields: Optional[Dict[str, Any]] = None,
+        product_type: Optional[str] = None,
+        profile: bool = False
+    ) -> RuleReport:
+        """
+        Evaluate a document against its product's rule pack.
+
+        Args:
+            text: Document text; None evaluates field rules only
+            fields: Structured fields extracted from the document; field rules
+                and coupon checks are skipped when there are none
+            product_type: Rule pack to apply; detected from the text when None
+            profile: Record the shared scan time and each rule's own evaluation time
+        """
+        timings: Dict[str, float] = {}
+        scan = None
+        if text is not None:
+            start = time.perf_counter()
+            scan = DocumentScan(text)
+            if profile:
+                timings["scan"] = time.perf_counter() - start
+        if product_type is None:
+            product_type = self.detect_product_type(scan) if scan is not None else DEFAULT_PRODUCT_TYPE
+
+        errors: List[ValidationError] = []
+        fired: List[Rule] = []
+        for rule in self.rules_for(product_type):
+            start = time.perf_counter() if profile else 0.0
+            if rule.kind in TEXT_KINDS:
+                found = self._text_errors(rule, scan) if scan is not None else []
+            else:
+                found = self._field_errors(rule, fields) if fields else []
+            if profile:
+                timings[rule.id] = timings.get(rule.id, 0.0) + time.perf_counter() - start
+            if found:
+                errors.extend(found)
+                fired.append(rule)
+        if fields:
+            start = time.perf_counter()
+            errors.extend(check_calculations(fields))
+            if profile:
+                timings["calculations"] = time.perf_counter() - start
+        return RuleReport(product_type, errors, fired, {k: round(v, 6) for k, v in timings.items()})
+
+
+@lru_cache(maxsize=1)
+def get_rule_engine() -> RuleEngine:
+    """Rule packs from RULE_PACKS_DIR, compiled once per process"""
+    return RuleEngine.from_directory()
+
+
+def evaluate_rules(
+    text: Optional[str],
+    fields: Optional[Dict[str, Any]] = None,
+    product_type: Optional[str] = None
+) -> RuleReport:
+    return get_rule_engine().evaluate(text, fields, product_type)
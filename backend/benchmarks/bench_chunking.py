@@ -0,0 +1,43 @@
+"""
+Chunking throughput on large synthetic term sheets.
+
+    python -m benchmarks.bench_chunking --pages 1000
+"""
+import argparse
+import time
+
+from app.utils.chunking import chunk_document, estimate_tokens
+from app.utils.validation_helpers import chunk_text as window_chunker
+from benchmarks.synthetic import make_termsheet
+
+
+def _time(fn, text, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark term-sheet chunkers")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = make_termsheet(args.pages)
+    mb = len(text) / 1e6
+    print(f"{args.pages} pages, {mb:.1f} MB, ~{estimate_tokens(text):,} tokens")
+
+    for name, fn in [
+        ("semantic (chunk_document)", chunk_document),
+        ("char windows (validation_helpers)", window_chunker),
+    ]:
+        seconds, chunks = _time(fn, text, args.repeat)
+        print(f"{name:36s} {seconds * 1000:8.1f} ms  {mb / seconds:6.1f} MB/s  {len(chunks):7d} chunks")
+
+
+if __name__ == "__main__":
+    main()
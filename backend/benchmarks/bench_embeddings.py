@@ -0,0 +1,59 @@
+"""
+CPU throughput of the registered embedding backends on term-sheet chunks.
+
+    python -m benchmarks.bench_embeddings --backends hashing,onnx,sentence-transformers --chunks 512
+
+Backends whose runtime or model isn't available are reported and skipped.
+"""
+import argparse
+import json
+import time
+
+from app.utils.chunking import chunk_document
+from app.utils.embeddings import available_backends, get_embedder
+from benchmarks.synthetic import make_termsheet
+
+
+def bench_backend(name, texts, repeat, model=None):
+    embedder = get_embedder(name, model)
+    embedder.embed(texts[:embedder.batch_size])  # load the model and warm up
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        vectors = embedder.embed(texts)
+        best = min(best, time.perf_counter() - start)
+    return {
+        **embedder.info(),
+        "texts": len(texts),
+        "seconds": round(best, 4),
+        "texts_per_second": round(len(texts) / best, 1),
+        "shape": list(vectors.shape),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends")
+    parser.add_argument("--backends", default=",".join(available_backends()))
+    parser.add_argument("--chunks", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    texts = chunk_document(make_termsheet(max(1, args.chunks // 4)))[:args.chunks]
+    results = []
+    for name in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        try:
+            result = bench_backend(name, texts, args.repeat)
+        except Exception as e:
+            print(f"{name:24s} skipped: {e}")
+            continue
+        results.append(result)
+        print(f"{name:24s} {result['model']:32s} dim {result['dimension']:4d}  {result['texts_per_second']:10.1f} texts/s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
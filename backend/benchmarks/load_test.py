@@ -0,0 +1,95 @@
+"""
+HTTP load test for the hot read endpoints.
+
+Drives a running API with a fixed number of concurrent clients and reports
+requests/second and latency percentiles per endpoint, so the same run can be
+repeated before and after a change and the JSON outputs compared:
+
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 \
+        --concurrency 64 --duration 30 --output after.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+DEFAULT_ENDPOINTS = [
+    "/upload/chunks?limit=100",
+    "/audit/history?limit=50",
+]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+async def _worker(client: httpx.AsyncClient, path: str, deadline: float, latencies: List[float], errors: List[int]):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+        except httpx.HTTPError:
+            errors.append(0)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_endpoint(base_url: str, path: str, concurrency: int, duration: float) -> Dict[str, float]:
+    """Hammer one endpoint with `concurrency` clients for `duration` seconds"""
+    latencies: List[float] = []
+    errors: List[int] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*[
+            _worker(client, path, deadline, latencies, errors) for _ in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "latency_p50_ms": percentile(latencies, 50) * 1000,
+        "latency_p95_ms": percentile(latencies, 95) * 1000,
+        "latency_p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def main(args) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for path in args.endpoint or DEFAULT_ENDPOINTS:
+        results[path] = await run_endpoint(args.base_url, path, args.concurrency, args.duration)
+        stats = results[path]
+        print(
+            f"{path:40s} {stats['requests_per_second']:9.1f} req/s  "
+            f"p50 {stats['latency_p50_ms']:7.1f} ms  p99 {stats['latency_p99_ms']:7.1f} ms  "
+            f"errors {stats['errors']}"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the hot read endpoints")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoint", action="append", help="Path to load (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per endpoint")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,262 @@
+"""
+Benchmark suite for the validation and retrieval hot paths.
+
+Ollama is replaced by a deterministic stub (benchmarks/stubs.py), so results
+are reproducible without a model server. Results are written as JSON that
+can be diffed between releases:
+
+    python -m benchmarks.run_benchmarks --output bench-new.json
+    python -m benchmarks.run_benchmarks --baseline bench-old.json
+
+Bulk insert needs PostgreSQL and only runs with --database-url.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.stubs import EMBEDDING_DIM, patch_ollama, stub_vector
+from benchmarks.synthetic import TERMSHEET_SIZES, make_reference_clauses, make_termsheet
+
+REFERENCE_CLAUSE_COUNTS = (10, 100, 1000)
+RETRIEVER_VECTORS = 20000
+
+
+def measure(fn, repeat: int, warmup: int = 1) -> dict:
+    """Run `fn` warmup + repeat times; summarise wall time in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "repeat": repeat,
+    }
+
+
+def bench_chunking(text, repeat):
+    from app.utils.chunking import chunk_document
+    from app.utils.validation_helpers import chunk_text
+
+    yield "chunking.semantic", measure(lambda: chunk_document(text), repeat), {"chunks": len(chunk_document(text))}
+    yield "chunking.windows", measure(lambda: chunk_text(text), repeat), {"chunks": len(chunk_text(text))}
+
+
+def bench_keyword_detection(text, repeat):
+    from app.utils.chunking import chunk_document
+    from app.utils.critical_clause_detector import is_critical_clause
+    from app.validation.rules import get_rule_engine
+
+    chunks = chunk_document(text)
+    engine = get_rule_engine()
+    yield "keywords.rule_engine", measure(lambda: engine.evaluate(text), repeat), {
+        "rules": len(engine.rules)
+    }
+    yield "keywords.critical_clauses", measure(lambda: [is_critical_clause(c) for c in chunks], repeat), {
+        "chunks": len(chunks)
+    }
+
+
+def bench_clause_matching(text, repeat):
+    from app.utils.chunking import chunk_document
+    from app.utils.clause_matcher import FaissClauseMatcher
+    from app.utils.critical_clause_detector import detect_critical_clauses
+
+    chunks = chunk_document(text)
+    matcher = FaissClauseMatcher(make_reference_clauses(REFERENCE_CLAUSE_COUNTS[1]))
+    yield "clause_match.faiss", measure(lambda: matcher.match(chunks), repeat), {"chunks": len(chunks)}
+    yield "clause_match.critical_detect", measure(lambda: detect_critical_clauses(chunks), repeat), {
+        "chunks": len(chunks)
+    }
+
+
+def bench_index_build(repeat):
+    import faiss
+    from app.utils.clause_matcher import FaissClauseMatcher
+
+    for count in REFERENCE_CLAUSE_COUNTS:
+        clauses = make_reference_clauses(count)
+        yield f"index_build.reference_{count}", measure(lambda: FaissClauseMatcher(clauses), repeat), {}
+
+    vectors = np.vstack([stub_vector(str(i)) for i in range(RETRIEVER_VECTORS)])
+
+    def build_flat():
+        index = faiss.IndexFlatL2(EMBEDDING_DIM)
+        index.add(vectors)
+
+    yield f"index_build.flat_{RETRIEVER_VECTORS}", measure(build_flat, repeat), {}
+
+
+def bench_retriever(repeat):
+    import faiss
+    from app.utils.embeddings import get_chunk_embedder
+    from app.utils.rag.retriever import FaissRetriever
+
+    # Chunk indexes live in the chunk embedder's space, which FaissRetriever checks on load
+    dim = get_chunk_embedder().dimension
+    vectors = np.vstack([stub_vector(str(i), dim) for i in range(RETRIEVER_VECTORS)])
+    index = faiss.IndexFlatL2(dim)
+    index.add(vectors)
+    queries = np.vstack([stub_vector(f"query {i}", dim) for i in range(32)])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index_path = os.path.join(tmp, "bench.faiss")
+        ids_path = os.path.join(tmp, "bench_ids.npy")
+        faiss.write_index(index, index_path)
+        np.save(ids_path, np.arange(RETRIEVER_VECTORS, dtype=np.int64))
+        retriever = FaissRetriever(index_path, ids_path)
+
+        meta = {"vectors": RETRIEVER_VECTORS}
+        yield "retriever.query", measure(lambda: retriever.query(queries[0], top_k=5), repeat), meta
+        yield "retriever.batch_query_32", measure(lambda: retriever.batch_query(queries, top_k=5), repeat), meta
+
+
+def bench_bulk_insert(text, repeat, database_url):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from app.crud.chunk_ops import bulk_insert_chunks, ensure_document
+    from app.database import Base
+    from app.utils.chunking import chunk_document
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    rows = [
+        {"document_id": 0, "chunk_index": i, "content": chunk, "vector": stub_vector(chunk).tolist()}
+        for i, chunk in enumerate(chunk_document(text))
+    ]
+
+    def insert_and_rollback():
+        with Session(engine) as db:
+            document = ensure_document(db, None, name="benchmark")
+            bulk_insert_chunks(db, [{**row, "document_id": document.id} for row in rows])
+            db.rollback()
+
+    try:
+        yield "db.bulk_insert", measure(insert_and_rollback, repeat), {"rows": len(rows)}
+    finally:
+        engine.dispose()
+
+
+def bench_validate_full(text, repeat):
+    import httpx
+    from fastapi import FastAPI
+    from app.dependencies import get_db
+    from app.routers.validate import router as validate_router
+
+    app = FastAPI()
+    app.include_router(validate_router)
+
+    def no_db():
+        yield None
+
+    app.dependency_overrides[get_db] = no_db
+    payload = text.encode()
+
+    async def post():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.post("/validate/full", files={"file": ("termsheet.txt", payload, "text/plain")})
+            response.raise_for_status()
+
+    yield "e2e.validate_full", measure(lambda: asyncio.run(post()), repeat), {}
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def run(sizes, repeat, database_url=None, embed_latency=0.0):
+    results = []
+
+    def record(size, cases):
+        for name, timing, meta in cases:
+            results.append({"name": name, "size": size, **timing, **meta})
+            print(f"{name:32s} {size:7s} median {timing['median_ms']:10.3f} ms  p95 {timing['p95_ms']:10.3f} ms")
+
+    with patch_ollama(embed_latency=embed_latency) as stub:
+        for size in sizes:
+            text = make_termsheet(TERMSHEET_SIZES[size])
+            record(size, bench_chunking(text, repeat))
+            record(size, bench_keyword_detection(text, repeat))
+            record(size, bench_clause_matching(text, repeat))
+            record(size, bench_validate_full(text, repeat))
+            if database_url:
+                record(size, bench_bulk_insert(text, repeat, database_url))
+        record("-", bench_index_build(repeat))
+        record("-", bench_retriever(repeat))
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "sizes": {size: TERMSHEET_SIZES[size] for size in sizes},
+            "embed_latency_ms": embed_latency * 1000,
+            "embed_calls": stub.embed_calls,
+            "bulk_insert": bool(database_url),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict):
+    """Print the median change of every benchmark present in both runs"""
+    old = {(r["name"], r["size"]): r for r in baseline["results"]}
+    print(f"\n{'benchmark':32s} {'size':7s} {'baseline':>12s} {'current':>12s} {'change':>8s}")
+    for r in current["results"]:
+        before = old.get((r["name"], r["size"]))
+        if before is None:
+            continue
+        change = (r["median_ms"] - before["median_ms"]) / before["median_ms"] * 100 if before["median_ms"] else 0.0
+        print(f"{r['name']:32s} {r['size']:7s} {before['median_ms']:10.3f}ms {r['median_ms']:10.3f}ms {change:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark validation and retrieval hot paths")
+    parser.add_argument("--sizes", default=",".join(TERMSHEET_SIZES), help="Comma-separated: " + ", ".join(TERMSHEET_SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Compare against a previous JSON results file")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="PostgreSQL URL for the bulk insert benchmark (rolled back)")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0,
+                        help="Simulated latency per stub embedding call")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = set(sizes) - set(TERMSHEET_SIZES)
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(sorted(unknown))}")
+
+    report = run(sizes, args.repeat, args.database_url, args.embed_latency_ms / 1000)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {len(report['results'])} results to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
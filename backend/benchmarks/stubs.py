@@ -0,0 +1,80 @@
+"""
+Deterministic stand-ins for Ollama so benchmarks measure our code, not the model.
+
+Embeddings are derived from a hash of the text, so the same text always maps
+to the same vector; generate() returns a fixed, schema-valid validation result.
+An optional per-call latency simulates a local model server.
+"""
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+EMBEDDING_DIM = 768  # nomic-embed-text
+
+STUB_VALIDATION = {
+    "errors": [{
+        "type": "DATE_FORMAT",
+        "description": "Issue date is not in YYYY-MM-DD format",
+        "section": "Dates",
+        "severity": "MEDIUM",
+    }],
+    "criticality_score": 35,
+    "validation_summary": "Stub validation result",
+}
+
+
+def stub_vector(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Unit-length float32 vector seeded from the text's hash"""
+    seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class StubOllama:
+    def __init__(self, embed_latency: float = 0.0, generate_latency: float = 0.0):
+        self.embed_latency = embed_latency
+        self.generate_latency = generate_latency
+        self.embed_calls = 0
+        self.generate_calls = 0
+
+    def embeddings(self, model=None, prompt="", **kwargs):
+        self.embed_calls += 1
+        if self.embed_latency:
+            time.sleep(self.embed_latency)
+        return {"embedding": stub_vector(prompt).tolist()}
+
+    def generate(self, model=None, prompt="", **kwargs):
+        self.generate_calls += 1
+        if self.generate_latency:
+            time.sleep(self.generate_latency)
+        return {"response": json.dumps(STUB_VALIDATION)}
+
+
+    def handle(self, request):
+        """httpx transport handler serving the Ollama API paths we call"""
+        import httpx
+
+        body = json.loads(request.content)
+        if request.url.path == "/api/embeddings":
+            return httpx.Response(200, json=self.embeddings(**body))
+        if request.url.path == "/api/generate":
+            return httpx.Response(200, json=self.generate(**body))
+        return httpx.Response(404, json={"error": f"unknown path {request.url.path}"})
+
+
+@contextmanager
+def patch_ollama(embed_latency: float = 0.0, generate_latency: float = 0.0):
+    """Route every LLM client call to a StubOllama through an in-process transport"""
+    import httpx
+    from app.utils.llm_client import LLMClient, set_llm_client
+
+    stub = StubOllama(embed_latency, generate_latency)
+    transport = httpx.MockTransport(stub.handle)
+    saved = set_llm_client(LLMClient(transport=transport, async_transport=transport))
+    try:
+        yield stub
+    finally:
+        set_llm_client(saved)
@@ -0,0 +1,51 @@
+"""
+Deterministic synthetic term-sheet text for benchmarks.
+"""
+import random
+
+SECTION_TITLES = [
+    "Interest", "Collateral", "Maturity", "Redemption", "Events of Default",
+    "Change of Control", "Taxation", "Governing Law", "Selling Restrictions",
+]
+
+FIELDS = [
+    ("Issuer", "Example Bank plc"), ("Currency", "USD"), ("Aggregate Nominal Amount", "USD 250,000,000"),
+    ("Issue Date", "2025-03-15"), ("Maturity Date", "2030-03-15"), ("Interest Rate", "5.50% per annum"),
+    ("Day Count Fraction", "30/360"), ("Interest Payment Dates", "15 March and 15 September in each year"),
+]
+
+SENTENCES = [
+    "The Notes bear interest from the Interest Commencement Date at the Rate of Interest.",
+    "Interest is payable semi-annually in arrear on each Interest Payment Date.",
+    "The Issuer may redeem the Notes in whole but not in part at the Make-Whole Redemption Amount.",
+    "Upon a Change of Control each Noteholder shall have a Put Option to require redemption.",
+    "The obligations of the Issuer are secured by collateral in the form of government bonds.",
+    "Payments will be made without withholding or deduction for taxes unless required by law.",
+    "If an Event of Default occurs the Notes shall become immediately due and repayable.",
+    "Early Redemption for tax reasons is permitted on giving not less than 30 days notice.",
+]
+
+
+def make_termsheet(pages: int, seed: int = 42, lines_per_page: int = 40) -> str:
+    """Generate a term sheet of roughly `pages` pages of prose and field lines"""
+    rng = random.Random(seed)
+    out = ["INDICATIVE TERM SHEET"]
+    out.extend(f"{label}: {value}" for label, value in FIELDS)
+    section = 1
+    for page in range(pages):
+        out.append(f"{section}. {rng.choice(SECTION_TITLES)}")
+        section += 1
+        for _ in range(lines_per_page):
+            out.append(" ".join(rng.choice(SENTENCES) for _ in range(rng.randint(1, 3))))
+        out.append(f"Page {page + 1} of {pages}")
+    return "\n".join(out)
+
+
+# Named document sizes in pages: a one-pager, a typical term sheet, a full prospectus
+TERMSHEET_SIZES = {"small": 2, "medium": 20, "large": 200}
+
+
+def make_reference_clauses(count: int, seed: int = 7):
+    """Generate `count` distinct reference clauses for index benchmarks"""
+    rng = random.Random(seed)
+    return [f"{rng.choice(SENTENCES)} (ref {i})" for i in range(count)]
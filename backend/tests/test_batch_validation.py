@@ -0,0 +1,61 @@
+# tests/test_batch_validation.py
+import io
+import json
+import asyncio
+import zipfile
+import httpx
+from fastapi import FastAPI
+from app.routers import validate
+from app.utils import embeddings
+from app.utils.reference_library import get_reference_store
+
+TERMSHEET = """Issuer: Example Bank plc
+Interest Rate: 5.50% per annum. Interest is payable semi-annually in arrear.
+Maturity Date: 2030-03-15
+Collateral: The obligations of the Issuer are secured by government bonds.
+Upon a Change of Control each Noteholder shall have a Put Option to require redemption.
+"""
+
+def test_batch_streams_one_line_per_document(monkeypatch):
+    """Plain files and zip members are all validated; bad documents fail alone"""
+    monkeypatch.setattr(embeddings, "EMBEDDING_BACKEND", "hashing")
+    get_reference_store().clear()
+
+    async def fake_llm(self, text):
+        return {"errors": [], "criticality_score": 10, "validation_summary": "Looks fine"}
+
+    monkeypatch.setattr(validate.TermsheetValidator, "validate_with_ollama", fake_llm)
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("q3/a.txt", TERMSHEET)
+        zf.writestr("q3/b.txt", TERMSHEET.replace("Example Bank", "Other Bank"))
+        zf.writestr("q3/notes.csv", "ignored")
+    files = [
+        ("files", ("single.txt", TERMSHEET.encode(), "text/plain")),
+        ("files", ("broken.pdf", b"not a pdf", "application/pdf")),
+        ("files", ("portfolio.zip", archive.getvalue(), "application/zip")),
+    ]
+
+    app = FastAPI()
+    app.include_router(validate.router)
+
+    async def post():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/validate/batch", files=files)
+
+    try:
+        response = asyncio.run(post())
+    finally:
+        get_reference_store().clear()
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    results, summary = lines[:-1], lines[-1]["summary"]
+
+    by_name = {r["filename"]: r for r in results}
+    assert set(by_name) == {"single.txt", "broken.pdf", "portfolio.zip/q3/a.txt", "portfolio.zip/q3/b.txt"}
+    assert by_name["broken.pdf"]["status"] == "error"
+    assert by_name["single.txt"]["status"] == "ok"
+    assert by_name["single.txt"]["result"]["clause_matches"]
+    assert summary["documents"] == 4 and summary["failed"] == 1
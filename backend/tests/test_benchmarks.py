@@ -0,0 +1,15 @@
+# tests/test_benchmarks.py
+import json
+import sys
+from benchmarks import run_benchmarks
+
+def test_small_benchmark_run_writes_report(tmp_path, monkeypatch):
+    """Smoke test: the harness runs end to end at the small size and writes its JSON report"""
+    output = tmp_path / "bench.json"
+    monkeypatch.setattr(sys, "argv", ["run_benchmarks", "--sizes", "small", "--repeat", "1", "--output", str(output)])
+    run_benchmarks.main()
+
+    report = json.loads(output.read_text())
+    names = {result["name"] for result in report["results"]}
+    assert {"chunking.windows", "e2e.validate_full", "retriever.query", "retriever.batch_query_32"} <= names
+    assert report["meta"]["sizes"] == {"small": 2}
@@ -0,0 +1,68 @@
+# tests/test_calculations.py
+import pytest
+from app.validation.calculations import build_schedule, check_calculations
+from app.validation.fields import extract_fields
+from app.validation.rules import get_rule_engine
+
+FIXED = {
+    "issue_date": "2025-03-15", "maturity_date": "2030-03-15", "amount": 250000000.0,
+    "coupon_rate": 5.5, "frequency": 2, "payment_dates": ["03-15", "09-15"], "day_count": "30/360",
+    "coupon_amount": 6875000.0,
+}
+
+def test_consistent_terms_pass():
+    schedule = build_schedule(FIXED)
+    assert len(schedule) == 10 and schedule.regular.all()
+    assert schedule.to_list()[0] == {"start": "2025-03-15", "end": "2025-09-15", "year_fraction": 0.5, "coupon": 6875000.0}
+    assert check_calculations(FIXED) == []
+
+@pytest.mark.parametrize("day_count, fractions", [
+    ("30/360", [0.5, 0.5]),
+    ("ACT/360", [184 / 360, 181 / 360]),
+    ("ACT/365", [184 / 365, 181 / 365]),
+    ("ACT/ACT", [0.5, 0.5]),
+])
+def test_day_counts(day_count, fractions):
+    schedule = build_schedule({**FIXED, "day_count": day_count})
+    assert list(schedule.fractions[:2]) == pytest.approx(fractions)
+
+def test_short_first_period_and_month_ends():
+    fields = {**FIXED, "issue_date": "2025-01-31", "maturity_date": "2030-08-31", "day_count": "ACT/ACT",
+              "payment_dates": ["02-28", "08-31"], "coupon_amount": None}
+    schedule = build_schedule(fields)
+    assert not schedule.regular[0] and schedule.regular[1:].all()
+    assert schedule.fractions[0] == pytest.approx(28 / 181 / 2)
+    # 2028-02-29 is the February month end, as the 02-28 payment date intends
+    assert check_calculations(fields) == []
+
+def test_inconsistencies_are_reported():
+    errors = check_calculations({**FIXED, "coupon_amount": 6900000.0, "payment_dates": ["03-31", "09-30"], "frequency": 4})
+    assert [(e.type, e.severity.value) for e in errors] == [("DATE", "MEDIUM"), ("DATE", "HIGH"), ("CALCULATION", "HIGH")]
+    assert "a regular period pays 3,437,500.00" in errors[2].description
+
+def test_coupon_amount_on_either_basis_passes():
+    """A coupon stated for the whole issue is checked against the aggregate, not the denomination"""
+    fields = {**FIXED, "amount": 500000000.0, "calculation_amount": 100000.0, "coupon_rate": 4.25}
+    assert check_calculations({**fields, "coupon_amount": 10625000.0}) == []
+    assert check_calculations({**fields, "coupon_amount": 2125.0}) == []
+    errors = check_calculations({**fields, "coupon_amount": 10000000.0})
+    assert [e.type for e in errors] == ["CALCULATION"]
+    assert "a regular period pays 2,125.00" in errors[0].description
+
+def test_checks_run_from_extracted_fields():
+    text = """Issuer: ACME Bank plc
+Aggregate Nominal Amount: EUR 100,000,000
+Specified Denomination: EUR 1,000
+Issue Date: 2025-06-30
+Maturity Date: 2028-06-30
+Interest Rate: 4.00% per annum
+Interest Payment Dates: 30 June in each year
+Day Count Fraction: Actual/Actual (ICMA)
+Fixed Coupon Amount: EUR 45.00 per Calculation Amount
+"""
+    fields = extract_fields(text).values
+    assert fields["calculation_amount"] == 1000.0 and fields["payment_dates"] == ["06-30"]
+    report = get_rule_engine().evaluate(None, fields, "fixed_rate", profile=True)
+    assert [e.type for e in report.errors] == ["MISSING_FIELD", "CALCULATION"]
+    assert "a regular period pays 40.00" in report.errors[1].description
+    assert "calculations" in report.timings
@@ -0,0 +1,75 @@
+# tests/test_chunk_export.py
+import io
+import json
+import asyncio
+from collections import namedtuple
+import httpx
+import pyarrow as pa
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.dialects import postgresql
+from app.routers import upload
+from app.utils.chunk_export import arrow_stream, export_query, ndjson_stream
+
+Row = namedtuple("Row", "id document_id chunk_index content vector_id vector")
+
+PAGE = [
+    Row(1, 7, 0, "Issuer: ACME Bank plc", 10, [0.25, -1.5, 3.0]),
+    Row(2, 7, 1, "Maturity Date: 2030-03-15", None, None),
+    Row(5, 8, 0, "Interest: 4.25% per annum", 11, []),
+]
+
+def as_dicts(rows):
+    return [row._asdict() for row in rows]
+
+def test_ndjson_round_trip():
+    """One line per chunk; missing vectors stay null"""
+    body = b"".join(ndjson_stream(iter([PAGE[:2], PAGE[2:]])))
+    assert [json.loads(line) for line in body.decode().splitlines()] == as_dicts(PAGE)
+
+def test_arrow_round_trip():
+    """One record batch per DB batch; null vectors are nulls, not empty lists"""
+    body = b"".join(arrow_stream(iter([PAGE[:2], PAGE[2:]])))
+    reader = pa.ipc.open_stream(io.BytesIO(body))
+    batches = list(reader)
+    assert [batch.num_rows for batch in batches] == [2, 1]
+
+    table = pa.Table.from_batches(batches)
+    assert table.schema.field("vector").type == pa.list_(pa.float32())
+    assert table.column("vector").null_count == 1
+    assert table.to_pylist() == as_dicts(PAGE)
+
+def test_export_query_resumes_after_cursor():
+    """The `after` key filters on (document_id, chunk_index, id) in keyset order"""
+    sql = str(export_query(7, after=(7, 1, 2)).compile(dialect=postgresql.dialect()))
+    assert "(pdf_chunks.document_id, pdf_chunks.chunk_index, pdf_chunks.id) > (" in sql
+    assert sql.endswith("ORDER BY pdf_chunks.document_id, pdf_chunks.chunk_index, pdf_chunks.id")
+
+@pytest.mark.parametrize("format, decode", [
+    ("ndjson", lambda body: [json.loads(line) for line in body.decode().splitlines()]),
+    ("arrow", lambda body: pa.ipc.open_stream(io.BytesIO(body)).read_all().to_pylist()),
+])
+def test_export_endpoint_streams_from_cursor(monkeypatch, format, decode):
+    calls = []
+
+    def fake_batches(document_id, batch_size, after):
+        calls.append((document_id, batch_size, after))
+        rows = [row for row in PAGE if (row.document_id, row.chunk_index, row.id) > after]
+        return iter([rows[i:i + batch_size] for i in range(0, len(rows), batch_size)])
+
+    monkeypatch.setattr(upload, "iter_chunk_batches", fake_batches)
+    app = FastAPI()
+    app.include_router(upload.router)
+
+    async def get(params):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/upload/chunks/export", params=params)
+
+    response = asyncio.run(get({"format": format, "batch_size": 1, "cursor": "7:0:1"}))
+    assert response.status_code == 200
+    assert calls == [(None, 1, (7, 0, 1))]
+    assert decode(response.content) == as_dicts(PAGE[1:])
+
+    bad = asyncio.run(get({"format": format, "cursor": "7:zero"}))
+    assert bad.status_code == 400
@@ -0,0 +1,58 @@
+# tests/test_chunk_stream.py
+import io
+import json
+import pytest
+from fastapi import HTTPException, UploadFile
+from app.utils.chunk_stream import (
+    CountingReader, iter_uploaded_chunks, iter_document_pages, start_progress
+)
+
+def make_reader(body: bytes):
+    progress = start_progress(None, "chunks.json")
+    return CountingReader(UploadFile(io.BytesIO(body)), progress), progress
+
+@pytest.mark.asyncio
+async def test_streams_json_array_chunks():
+    """Chunks in a JSON array are yielded one by one with progress tracked"""
+    chunks = [
+        {"document_id": 1, "chunk_index": i, "content": f"chunk {i}", "vector": [0.1, 0.2]}
+        for i in range(5)
+    ]
+    body = json.dumps(chunks).encode()
+    reader, progress = make_reader(body)
+
+    parsed = [chunk async for chunk in iter_uploaded_chunks(reader)]
+
+    assert parsed == chunks
+    assert progress["bytes_read"] == len(body)
+
+@pytest.mark.asyncio
+async def test_streams_ndjson_chunks():
+    """NDJSON uploads are parsed line by line"""
+    lines = [json.dumps({"document_id": 2, "chunk_index": i, "content": "x"}) for i in range(3)]
+    reader, _ = make_reader(("\n".join(lines) + "\n").encode())
+
+    parsed = [chunk async for chunk in iter_uploaded_chunks(reader)]
+
+    assert [chunk["chunk_index"] for chunk in parsed] == [0, 1, 2]
+
+@pytest.mark.asyncio
+async def test_rejects_chunks_missing_fields():
+    """Chunks without required fields are rejected as a 400"""
+    reader, _ = make_reader(json.dumps([{"document_id": 1, "content": "x"}]).encode())
+
+    with pytest.raises(HTTPException) as exc:
+        [chunk async for chunk in iter_uploaded_chunks(reader)]
+    assert exc.value.status_code == 400
+
+@pytest.mark.asyncio
+async def test_streams_document_pages_and_header():
+    """Pages are streamed out of a document while header keys are captured"""
+    document = {"document_id": 7, "title": "Notes", "pages": [{"content": "a"}, {"content": "b"}]}
+    reader, _ = make_reader(json.dumps(document).encode())
+    header = {}
+
+    pages = [page async for page in iter_document_pages(reader, header)]
+
+    assert pages == document["pages"]
+    assert header == {"document_id": 7, "title": "Notes"}
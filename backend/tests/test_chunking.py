@@ -0,0 +1,117 @@
+# tests/test_chunking.py
+import math
+import random
+import pytest
+from app.utils.chunking import (
+    chunk_document, chunk_spans, estimate_tokens, iter_window_spans, iter_windows, window_offsets
+)
+from app.utils.validation_helpers import chunk_text
+
+TERMSHEET = """INDICATIVE TERM SHEET
+Issuer: Example Bank plc
+Currency: USD
+1. Interest
+The Notes bear interest at 5.50% per annum. Interest is payable semi-annually in arrear.
+2. Redemption
+Early Redemption is permitted on giving not less than 30 days notice.
+3. Governing Law
+English law.
+"""
+
+def assert_covers(text, spans):
+    assert spans[0][0] == 0
+    assert spans[-1][1] == len(text)
+    assert all(prev[1] == nxt[0] for prev, nxt in zip(spans, spans[1:]))
+
+def test_sections_start_new_chunks_when_budget_is_tight():
+    """Each numbered section begins its own chunk when sections can't be packed together"""
+    chunks = chunk_document(TERMSHEET, max_tokens=25)
+
+    assert any(chunk.startswith("1. Interest") for chunk in chunks)
+    assert any(chunk.startswith("2. Redemption") for chunk in chunks)
+    assert any(chunk.startswith("3. Governing Law") for chunk in chunks)
+
+def test_small_sections_are_packed_into_one_chunk():
+    """A term sheet well under the budget becomes a single chunk"""
+    assert chunk_document(TERMSHEET, max_tokens=512) == [TERMSHEET.strip()]
+
+def test_chunks_respect_token_budget():
+    """Oversize sections are split at sentences and run-ons at word windows"""
+    text = "1. Interest\n" + "The rate resets quarterly. " * 200 + "word " * 1000
+    spans = chunk_spans(text, max_tokens=64)
+
+    assert_covers(text, spans)
+    assert all(estimate_tokens(text, start, end) <= 64 for start, end in spans)
+
+def test_split_section_does_not_absorb_neighbours():
+    """Pieces of a split section never share a chunk with the next section"""
+    text = "1. Interest\n" + "Interest accrues daily. " * 100 + "\n2. Redemption\nAt par.\n"
+    chunks = chunk_document(text, max_tokens=50)
+
+    assert chunks[-1] == "2. Redemption\nAt par."
+
+def test_clause_numbers_are_not_sentence_breaks():
+    """A clause number such as "1." does not end a sentence"""
+    text = "Section 4. Terms\n" + "See clause 1. The notes are senior. " * 40
+    chunks = chunk_document(text, max_tokens=30)
+
+    assert all(not chunk.endswith("clause 1.") for chunk in chunks)
+
+@pytest.mark.parametrize("text", ["", "   \n  "])
+def test_blank_text_produces_no_chunks(text):
+    assert chunk_document(text) == []
+
+# ---------- Overlapping windows: property tests ----------
+def random_text(rng, length):
+    alphabet = "abcdefghij" * 3 + " " * 5 + "\n"
+    if rng.random() < 0.3:
+        alphabet = "x"  # no word boundaries at all
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+@pytest.mark.parametrize("seed", range(200))
+def test_window_spans_cover_text_with_bounded_count(seed):
+    """Windows cover every character, advance monotonically and stay within bounds"""
+    rng = random.Random(seed)
+    text = random_text(rng, rng.randint(0, 3000))
+    chunk_size = rng.randint(1, 400)
+    overlap = rng.randint(0, chunk_size * 2)
+
+    spans = list(iter_window_spans(text, chunk_size, overlap))
+
+    if not text:
+        assert spans == []
+        return
+    assert spans[0][0] == 0
+    assert spans[-1][1] == len(text)
+    for (prev_start, prev_end), (start, end) in zip(spans, spans[1:]):
+        assert prev_start < start <= prev_end  # no gaps, strictly advancing
+    assert all(0 < end - start <= chunk_size for start, end in spans)
+    effective_overlap = min(overlap, chunk_size // 4)
+    step = max(1, chunk_size // 2 - effective_overlap)
+    assert len(spans) <= math.ceil(len(text) / step) + 1
+
+def test_windows_snap_to_word_boundaries():
+    """Window ends fall just after whitespace when one is available"""
+    text = "alpha beta gamma delta " * 50
+    for start, end in list(iter_window_spans(text, 40, 10))[:-1]:
+        assert text[end - 1] == " "
+
+def test_bytes_windows_are_memoryviews():
+    """Bytes input yields zero-copy memoryview slices"""
+    data = b"alpha beta gamma delta " * 20
+    windows = list(iter_windows(data, 50, 10))
+
+    assert all(isinstance(window, memoryview) for window in windows)
+    assert windows[0].obj is data
+    starts, ends = window_offsets(data, 50, 10)
+    assert [bytes(w) for w in windows] == [data[s:e] for s, e in zip(starts, ends)]
+
+def test_chunk_text_matches_window_spans():
+    """validation_helpers.chunk_text is the str form of the window spans"""
+    text = "word " * 600
+    spans = list(iter_window_spans(text, 200, 20))
+    assert chunk_text(text, 200, 20) == [text[s:e] for s, e in spans]
+    # Consecutive windows overlap and together cover the whole text
+    assert spans[0][0] == 0 and spans[-1][1] == len(text)
+    assert all(s1 < s2 < e1 for (s1, e1), (s2, _) in zip(spans, spans[1:]))
+    assert chunk_text("short text", 200, 20) == ["short text"]
@@ -39,3 +39,40 @@ def test_build_validation_prompt():
     assert "The following are critical clauses" in prompt
     assert "Interest Rate" in prompt
     assert "Early Redemption" in prompt
+
+def test_query_embedded_once_through_the_batcher(monkeypatch):
+    """The detector's query is embedded once, by the engine's batcher, not per document"""
+    import asyncio
+    from app.routers import validate
+    from app.utils import critical_clause_detector, embeddings
+    from app.utils.embeddings import EmbeddingBatcher, HashingEmbedder
+    from app.validation.engine import TermsheetValidationEngine
+
+    class CountingEmbedder(HashingEmbedder):
+        def __init__(self):
+            super().__init__(dimension=64)
+            self.texts = []
+
+        def _embed(self, texts):
+            self.texts.extend(texts)
+            return super()._embed(texts)
+
+    async def fake_llm(self, text):
+        return {"errors": [], "criticality_score": 0}
+
+    embedder = CountingEmbedder()
+    monkeypatch.setattr(embeddings, "EMBEDDING_BACKEND", "hashing")
+    monkeypatch.setattr(embeddings, "EMBEDDING_MODEL", None)
+    monkeypatch.setattr(embeddings, "_embedders", {("hashing", None): embedder})
+    monkeypatch.setattr(critical_clause_detector, "QUERY_VECTORS", {})
+    monkeypatch.setattr("app.validation.engine.QUERY_VECTORS", critical_clause_detector.QUERY_VECTORS)
+    monkeypatch.setattr(validate.TermsheetValidator, "validate_with_ollama", fake_llm)
+    text = "Issuer: ACME. Interest: 5%. Collateral: none. Maturity: 2030. Early Redemption at par."
+
+    async def run():
+        engine = TermsheetValidationEngine(["Early Redemption at par."], batcher=EmbeddingBatcher(embedder))
+        return [await engine.validate({"issuer": "ACME"}, text) for _ in range(3)]
+
+    results = asyncio.run(run())
+    assert all(r.clause_matches for r in results)
+    assert embedder.texts.count(critical_clause_detector.CRITICAL_QUERY) == 1
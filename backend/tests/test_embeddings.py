@@ -0,0 +1,84 @@
+# tests/test_embeddings.py
+import faiss
+import numpy as np
+import pytest
+from app.utils.embeddings import (
+    HashingEmbedder, available_backends, check_index_compatible, get_chunk_embedder, get_embedder,
+    write_index_metadata
+)
+
+def test_backends_registered():
+    assert {"ollama", "sentence-transformers", "onnx", "hashing"} <= set(available_backends())
+    with pytest.raises(ValueError):
+        get_embedder("does-not-exist")
+
+def test_hashing_embedder_is_deterministic():
+    """Same text gives the same unit vector; shared words give closer vectors"""
+    embedder = HashingEmbedder(dimension=256)
+    a, b, c = embedder.embed([
+        "The Issuer may redeem the Notes early",
+        "The Issuer may redeem the Notes at par",
+        "Governing law is English law",
+    ])
+    assert a.shape == (256,) and a.dtype == np.float32
+    assert np.allclose(a, embedder.embed_one("The Issuer may redeem the Notes early"))
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert a @ b > a @ c
+
+def test_index_metadata_rejects_other_vector_space(tmp_path):
+    """An index built by one backend can't be queried with another's vectors"""
+    embedder = HashingEmbedder(dimension=64)
+    index_path = str(tmp_path / "clauses.faiss")
+    index = faiss.IndexFlatL2(64)
+    index.add(embedder.embed(["Maturity Date: 2030-03-15"]))
+    faiss.write_index(index, index_path)
+    write_index_metadata(index_path, embedder)
+
+    check_index_compatible(index_path, index.d, embedder)
+    with pytest.raises(ValueError, match="dimension"):
+        check_index_compatible(index_path, index.d, HashingEmbedder(dimension=128))
+    with pytest.raises(ValueError, match="built with"):
+        check_index_compatible(index_path, index.d, HashingEmbedder(model="other", dimension=64))
+
+def test_drift_check_flags_divergent_embedder():
+    """check_drift accepts an equivalent embedder and rejects a noisy one"""
+    from app.utils.onnx_export import check_drift, embedding_drift
+
+    reference = HashingEmbedder(dimension=128)
+    assert embedding_drift(reference, HashingEmbedder(dimension=128))["min_cosine"] > 0.999
+
+    class NoisyEmbedder(HashingEmbedder):
+        def _embed(self, texts):
+            vectors = super()._embed(texts)
+            return vectors + np.random.default_rng(0).normal(0, 0.2, vectors.shape).astype(np.float32)
+
+    with pytest.raises(ValueError, match="drifted"):
+        check_drift(reference, NoisyEmbedder(dimension=128), min_cosine=0.98)
+
+def test_batcher_coalesces_concurrent_requests():
+    """Concurrent embed() calls share one backend call and get their own rows back"""
+    import asyncio
+    from app.utils.embeddings import EmbeddingBatcher
+
+    embedder = HashingEmbedder(dimension=64)
+    requests = [[f"clause {i} of document {doc}" for i in range(3)] for doc in range(5)]
+
+    async def run():
+        batcher = EmbeddingBatcher(embedder, max_wait=0.01)
+        results = await asyncio.gather(*(batcher.embed(texts) for texts in requests))
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+    assert batcher.backend_calls == 1
+    for texts, vectors in zip(requests, results):
+        assert np.allclose(vectors, embedder.embed(texts))
+
+def test_shipped_chatbot_index_loads_with_default_settings():
+    """The committed chatbot index is in the default chunk vector space"""
+    import os
+    from app.utils.rag.chatbot.retriever import ChatbotRetriever
+
+    index_dir = os.path.join(os.path.dirname(__file__), "..", "app", "indices", "chatbot")
+    retriever = ChatbotRetriever(index_dir=index_dir)
+    assert retriever.index.d == get_chunk_embedder().dimension == 384
+    assert retriever.index.ntotal == len(retriever.id_map)
@@ -0,0 +1,84 @@
+# tests/test_fields.py
+import json
+import asyncio
+import httpx
+import pytest
+from app.utils.llm_client import LLMClient, set_llm_client
+from app.validation.fields import extract_fields, evaluate_document, parse_amount, parse_date
+
+TERMSHEET = """INDICATIVE TERM SHEET
+Deal Name\tACME Senior Notes 2030
+Issuer - ACME Bank plc.
+Notional Amount:   EUR 500m
+Issue Date: 15th March, 2025
+Maturity: five years after the Issue Date
+Maturity Date: 15/03/2030
+Interest Rate: 4.25 per cent. per annum, fixed rate
+1. Interest
+Interest is payable annually. Day count fraction 30/360. Collateral: none.
+Issuer: Someone Else Ltd
+"""
+
+def test_one_pass_extraction():
+    fields = extract_fields(TERMSHEET)
+    assert fields.values == {
+        "deal_name": "ACME Senior Notes 2030",
+        "issuer": "ACME Bank plc",
+        "amount": 500000000.0,
+        "currency": "EUR",
+        "issue_date": "2025-03-15",
+        "maturity_date": "2030-03-15",
+        "coupon_rate": 4.25,
+    }
+    assert set(fields.sources.values()) == {"text"}
+    assert fields.missing == ("day_count", "payment_dates", "frequency", "coupon_amount", "calculation_amount")
+
+@pytest.mark.parametrize("value, expected", [
+    ("March 15th, 2030", "2030-03-15"), ("15 Mar. 2030", "2030-03-15"), ("2030-03-15 (T+5)", "2030-03-15"),
+    ("2031-02-30", None), ("5 years", None),
+])
+def test_parse_date(value, expected):
+    assert parse_date(value) == expected
+
+@pytest.mark.parametrize("value, expected", [
+    ("USD 1,234.50", 1234.5), ("250.000.000 EUR", 250000000.0), ("up to GBP 1.5bn", 1.5e9), ("TBC", None),
+])
+def test_parse_amount(value, expected):
+    assert parse_amount(value) == expected
+
+def _with_llm(handler, coro):
+    saved = set_llm_client(LLMClient(async_transport=httpx.MockTransport(handler)))
+    try:
+        return asyncio.run(coro)
+    finally:
+        set_llm_client(saved)
+
+def test_llm_fallback_only_for_missing_fields():
+    requests = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        requests.append(body)
+        reply = {"deal_name": "ACME 2030 Notes", "currency": "n/a"}
+        return httpx.Response(200, json={"response": json.dumps(reply)})
+
+    text = TERMSHEET.replace("Deal Name\tACME Senior Notes 2030\n", "").replace("EUR 500m", "500m")
+    fields, report = _with_llm(handler, evaluate_document(text))
+    assert len(requests) == 1
+    assert sorted(requests[0]["format"]["properties"]) == ["currency", "deal_name"]
+    assert fields.values["deal_name"] == "ACME 2030 Notes" and fields.sources["deal_name"] == "llm"
+    assert "currency" not in fields.values
+    assert [e.description for e in report.errors] == ["Required field 'currency' could not be extracted"]
+
+    # Nothing missing: no call at all
+    requests.clear()
+    _with_llm(handler, evaluate_document(TERMSHEET))
+    assert requests == []
+
+def test_fallback_skipped_when_rules_are_conclusive():
+    def handler(request):
+        raise AssertionError("no LLM call expected")
+
+    fields, report = _with_llm(handler, evaluate_document("Deal Name: X\nNothing else."))
+    assert report.conclusive
+    assert fields.values == {"deal_name": "X"}
@@ -0,0 +1,100 @@
+# tests/test_jobs.py
+import asyncio
+import httpx
+from fastapi import FastAPI
+from app.jobs import queue as job_queue
+from app.jobs.queue import SQLiteJobQueue, QUEUED, RUNNING, SUCCEEDED, FAILED
+from app.jobs.tasks import task, PermanentJobError
+from app.jobs.worker import run_once
+from app.routers.jobs import router as jobs_router
+
+def test_enqueue_is_idempotent_and_priority_ordered(tmp_path):
+    """Same key returns the live job; claims go by priority, then enqueue order"""
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"))
+    low = queue.enqueue("test", {"n": 1}, idempotency_key="doc-a")
+    assert queue.enqueue("test", {"n": 1}, idempotency_key="doc-a")["id"] == low["id"]
+    high = queue.enqueue("test", {"n": 2}, priority=5)
+    later = queue.enqueue("test", {"n": 3})
+
+    assert [queue.claim("w")["id"] for _ in range(3)] == [high["id"], low["id"], later["id"]]
+    assert queue.claim("w") is None
+    assert queue.stats() == {RUNNING: 3}
+
+def test_failed_job_retries_then_fails(tmp_path):
+    """Attempts are retried with backoff until max_attempts, after which the key can be reused"""
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"))
+    job = queue.enqueue("test", {}, idempotency_key="doc-b", max_attempts=2)
+
+    queue.claim("w")
+    assert queue.fail(job["id"], "w", "boom", retry_base=0)["status"] == QUEUED
+    queue.claim("w")
+    failed = queue.fail(job["id"], "w", "boom again", retry_base=0)
+    assert failed["status"] == FAILED and failed["attempts"] == 2 and failed["error"] == "boom again"
+    assert queue.enqueue("test", {}, idempotency_key="doc-b")["id"] != job["id"]
+
+def test_expired_lease_is_requeued(tmp_path):
+    """A job whose worker died is handed to the next worker once its lease runs out"""
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"))
+    job = queue.enqueue("test", {})
+    queue.claim("dead-worker", lease_seconds=-1)
+    reclaimed = queue.claim("live-worker")
+    assert reclaimed["id"] == job["id"] and reclaimed["worker"] == "live-worker" and reclaimed["attempts"] == 2
+
+    # The worker that lost the lease can no longer record an outcome
+    assert queue.complete(job["id"], "dead-worker", "stale result") is None
+    assert queue.fail(job["id"], "dead-worker", "stale error") is None
+    assert queue.get(job["id"])["status"] == RUNNING
+    assert queue.complete(job["id"], "live-worker", "fresh result")["result"] == "fresh result"
+    assert queue.complete(job["id"], "live-worker", "again") is None
+
+def test_worker_runs_registered_tasks(tmp_path):
+    """run_once records results, and permanent errors skip the remaining retries"""
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"))
+
+    @task("test_double")
+    def double(payload):
+        if payload["n"] < 0:
+            raise PermanentJobError("negative input")
+        return payload["n"] * 2
+
+    ok = queue.enqueue("test_double", {"n": 21})
+    bad = queue.enqueue("test_double", {"n": -1})
+    assert run_once(queue, "w")["status"] == SUCCEEDED
+    assert queue.get(ok["id"])["result"] == 42
+    assert run_once(queue, "w")["status"] == FAILED
+    assert queue.get(bad["id"])["attempts"] == 1
+    assert run_once(queue, "w") is None
+
+def test_job_endpoints(tmp_path, monkeypatch):
+    """Uploads are deduplicated by content; results are 202 until a worker finishes"""
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(job_queue, "_queue", queue)
+    app = FastAPI()
+    app.include_router(jobs_router)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            files = {"file": ("sheet.txt", b"Issuer: ACME", "text/plain")}
+            first = await client.post("/jobs/validate?priority=3", files=files)
+            again = await client.post("/jobs/validate", files=files)
+            job_id = first.json()["job_id"]
+            pending = await client.get(f"/jobs/{job_id}/result")
+            queue.claim("w")
+            queue.complete(job_id, "w", {"criticality_score": 0})
+            done = await client.get(f"/jobs/{job_id}/result")
+            missing = await client.get("/jobs/unknown")
+            broken = queue.enqueue("validate_full", {}, max_attempts=1)
+            queue.claim("w")
+            queue.fail(broken["id"], "w", "unreadable file")
+            failed = await client.get(f"/jobs/{broken['id']}/result")
+            return first, again, pending, done, missing, failed
+
+    first, again, pending, done, missing, failed = asyncio.run(scenario())
+    assert first.status_code == 202 and first.json()["priority"] == 3
+    assert again.json()["job_id"] == first.json()["job_id"]
+    assert pending.status_code == 202 and pending.json()["status"] == QUEUED
+    assert done.status_code == 200 and done.json() == {"criticality_score": 0}
+    assert missing.status_code == 404
+    assert failed.status_code == 409
+    assert failed.json()["status"] == FAILED and failed.json()["error"] == "unreadable file"
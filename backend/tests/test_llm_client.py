@@ -0,0 +1,171 @@
+# tests/test_llm_client.py
+import json
+import time
+import socket
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+import pytest
+from fastapi import HTTPException
+from app.utils import llm_client
+from app.utils.llm_client import LLMClient, LLMOverloaded, LLMUnavailable, set_llm_client
+
+def ollama_transport(delay: float = 0.0):
+    """In-process stand-in for the Ollama API, recording peak concurrency"""
+    state = {"active": 0, "peak": 0, "calls": 0}
+
+    def reply(request):
+        if request.url.path == "/api/embeddings":
+            return httpx.Response(200, json={"embedding": [0.0, 1.0]})
+        body = json.loads(request.content)
+        return httpx.Response(200, json={"model": body["model"], "response": '{"errors": []}'})
+
+    async def handler(request):
+        state["calls"] += 1
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(delay)
+        state["active"] -= 1
+        return reply(request)
+
+    return httpx.MockTransport(handler), httpx.MockTransport(reply), state
+
+def test_concurrency_limit_and_fast_rejection():
+    """At most max_concurrency requests reach Ollama; beyond max_queue waiters are rejected"""
+    transport, _, state = ollama_transport(delay=0.05)
+    client = LLMClient(max_concurrency=2, max_queue=2, async_transport=transport)
+
+    async def burst():
+        calls = [client.generate("mistral", f"prompt {i}") for i in range(6)]
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    results = asyncio.run(burst())
+    rejected = [r for r in results if isinstance(r, LLMOverloaded)]
+    assert len(rejected) == 2 and state["calls"] == 4
+    assert state["peak"] == 2
+    metrics = "\n".join(client.metrics())
+    assert 'termsheet_llm_rejected_total{model="mistral"} 2' in metrics
+    assert 'termsheet_llm_queue_depth{model="mistral"} 0' in metrics
+
+def test_queue_timeout_and_per_model_slots():
+    """Waiting longer than queue_timeout fails; other models have their own slots"""
+    _, transport, _ = ollama_transport()
+    client = LLMClient(max_concurrency=1, queue_timeout=0.05, transport=transport)
+    client.gate("mistral").acquire()
+    with pytest.raises(LLMOverloaded):
+        client.generate_sync("mistral", "blocked")
+    assert client.embeddings_sync("nomic-embed-text", "free") == [0.0, 1.0]
+    client.gate("mistral").release()
+    assert client.generate_sync("mistral", "free again")["response"] == '{"errors": []}'
+
+def test_validator_returns_503_when_overloaded():
+    """The validate router surfaces backpressure as 503 with Retry-After"""
+    from app.routers.validate import TermsheetValidator
+    transport, _, _ = ollama_transport()
+    client = LLMClient(max_concurrency=1, max_queue=0, async_transport=transport)
+    client.gate("mistral").acquire()
+    saved = set_llm_client(client)
+    try:
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(TermsheetValidator().validate_with_ollama("Issuer: ACME"))
+    finally:
+        set_llm_client(saved)
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"]
+
+@pytest.fixture
+def stub_server():
+    """Start local Ollama stand-ins; each records its hits and can be switched to answer 503"""
+    servers = []
+
+    def start(delay: float = 0.0):
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._reply(200 if server.healthy else 503, {"models": []})
+
+            def do_POST(self):
+                json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                server.hits += 1
+                time.sleep(delay)
+                if not server.healthy:
+                    return self._reply(503, {"error": "overloaded"})
+                self._reply(200, {"response": '{"errors": []}'})
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.hits, server.healthy = 0, True
+        server.url = f"http://127.0.0.1:{server.server_address[1]}"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def closed_port_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+def test_requests_spread_by_outstanding_count(stub_server):
+    """Concurrent requests go to the host with the fewest in flight"""
+    first, second = stub_server(delay=0.1), stub_server(delay=0.1)
+    client = LLMClient([first.url, second.url], max_concurrency=2)
+
+    async def burst():
+        try:
+            return await asyncio.gather(*(client.generate("mistral", f"p{i}") for i in range(4)))
+        finally:
+            await client.aclose()
+
+    assert len(asyncio.run(burst())) == 4
+    assert (first.hits, second.hits) == (2, 2)
+
+def test_failover_and_circuit_breaker(stub_server, monkeypatch):
+    """Failing hosts are skipped within a request, then taken out of rotation"""
+    monkeypatch.setattr(llm_client, "LLM_CIRCUIT_FAILURES", 1)
+    good, bad = stub_server(), stub_server()
+    bad.healthy = False
+    client = LLMClient([bad.url, closed_port_url(), good.url])
+
+    for _ in range(4):
+        assert client.generate_sync("mistral", "x")["response"] == '{"errors": []}'
+    assert good.hits == 4 and bad.hits == 1
+    assert [b["state"] for b in client.status()] == ["open", "open", "closed"]
+    assert 'termsheet_llm_backend_circuit_open{host="%s"} 1' % bad.url in "\n".join(client.metrics())
+
+    good.healthy = False
+    with pytest.raises(LLMUnavailable):
+        client.generate_sync("mistral", "x")
+
+def test_health_check_reopens_recovered_host(stub_server, monkeypatch):
+    """A host that fails its probe leaves rotation and rejoins once it passes again"""
+    monkeypatch.setattr(llm_client, "LLM_CIRCUIT_FAILURES", 1)
+    monkeypatch.setattr(llm_client, "LLM_CIRCUIT_COOLDOWN", 0.0)
+    server = stub_server()
+    server.healthy = False
+    client = LLMClient(server.url)
+
+    async def probe():
+        try:
+            return [b["state"] for b in await client.check_health()]
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(probe()) == ["half_open"]  # open, with the cooldown already elapsed
+    server.healthy = True
+    assert asyncio.run(probe()) == ["closed"]
+    assert client.generate_sync("mistral", "x")["response"] == '{"errors": []}'
@@ -0,0 +1,102 @@
+# tests/test_ocr.py
+import io
+import hashlib
+import os
+from concurrent.futures import Future
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject, NumberObject
+from app.utils import ocr
+from app.utils.redis_cache import MemoryCache
+
+SAMPLE_PDF = os.path.join(os.path.dirname(__file__), "data", "sample_termsheet.pdf")
+
+def test_find_scanned_pages():
+    pages = ["Issuer: Example Bank plc, Currency: USD", "  \n ", "page 3"]
+    assert ocr.find_scanned_pages(pages, min_chars=10) == [1, 2]
+
+def test_cached_ocr_output_fills_scanned_pages(monkeypatch):
+    """Pages whose fingerprint is cached are filled without running OCR"""
+    with open(SAMPLE_PDF, "rb") as f:
+        data = f.read()
+    cache = MemoryCache("ocr-test")
+    monkeypatch.setattr(ocr, "get_cache", lambda namespace: cache)
+
+    document = hashlib.sha256(data).hexdigest()
+    page = PdfReader(io.BytesIO(data)).pages[1]
+    cache.set(ocr.page_cache_key(document, 2, page, ocr.OCR_DPI, ocr.OCR_LANG), "text recovered by OCR")
+
+    pages = ["x" * 100, "", "x" * 100, "x" * 100]
+    filled = ocr.ocr_missing_pages(data, pages)
+
+    assert filled == [1]
+    assert pages[1] == "text recovered by OCR"
+
+def _scanned_pdf(images):
+    """A PDF whose pages each draw one image wrapped in a form XObject, as scanners write them"""
+    writer = PdfWriter()
+    for pixels in images:
+        writer.add_blank_page(width=100, height=100)
+        page = writer.pages[-1]
+        image = DecodedStreamObject()
+        image.set_data(pixels)
+        image.update({
+            NameObject("/Type"): NameObject("/XObject"), NameObject("/Subtype"): NameObject("/Image"),
+            NameObject("/Width"): NumberObject(len(pixels)), NameObject("/Height"): NumberObject(1),
+        })
+        form = DecodedStreamObject()
+        form.set_data(b"q /Im0 Do Q")
+        form.update({
+            NameObject("/Type"): NameObject("/XObject"), NameObject("/Subtype"): NameObject("/Form"),
+            NameObject("/Resources"): DictionaryObject({
+                NameObject("/XObject"): DictionaryObject({NameObject("/Im0"): writer._add_object(image)})
+            }),
+        })
+        contents = DecodedStreamObject()
+        contents.set_data(b"q /Fm0 Do Q")
+        page[NameObject("/Contents")] = writer._add_object(contents)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/XObject"): DictionaryObject({NameObject("/Fm0"): writer._add_object(form)})
+        })
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+def test_fingerprint_covers_images_inside_form_xobjects():
+    """Pages with identical content streams but different nested images get different keys"""
+    data = _scanned_pdf([b"\x00\x01", b"\x02\x03", b"\x00\x01"])
+    pages = PdfReader(io.BytesIO(data)).pages
+    fingerprints = [ocr.page_fingerprint(page) for page in pages]
+    assert fingerprints[0] != fingerprints[1] and fingerprints[0] == fingerprints[2]
+
+    # The same page in another document never shares a cache entry
+    other = _scanned_pdf([b"\x00\x01"])
+    key = ocr.page_cache_key(hashlib.sha256(data).hexdigest(), 1, pages[0], 300, "eng")
+    other_page = PdfReader(io.BytesIO(other)).pages[0]
+    assert key != ocr.page_cache_key(hashlib.sha256(other).hexdigest(), 1, other_page, 300, "eng")
+
+def test_partial_ocr_failure_reports_pages_that_were_filled(monkeypatch):
+    class Pool:
+        def submit(self, fn, data, page_number, dpi, lang):
+            future = Future()
+            if page_number == 2:
+                future.set_exception(RuntimeError("tesseract crashed"))
+            else:
+                future.set_result(f"page {page_number} text")
+            return future
+
+    monkeypatch.setattr(ocr, "get_cache", lambda namespace: MemoryCache("ocr-partial"))
+    monkeypatch.setattr(ocr, "get_process_pool", lambda: Pool())
+    pages = ["", "", ""]
+    filled = ocr.ocr_missing_pages(_scanned_pdf([b"\x00", b"\x01", b"\x02"]), pages)
+    assert filled == [0, 2]
+    assert pages == ["page 1 text", "", "page 3 text"]
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache("lru", maxsize=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
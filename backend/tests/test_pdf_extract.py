@@ -0,0 +1,42 @@
+# tests/test_pdf_extract.py
+import os
+import pytest
+from app.utils.pdf_extract import extract_pdf_pages, extract_pdf_text, get_process_pool, PdfText, PDF_EXTRACT_WORKERS
+
+SAMPLE_PDF = os.path.join(os.path.dirname(__file__), "data", "sample_termsheet.pdf")
+
+@pytest.fixture
+def pdf_bytes():
+    with open(SAMPLE_PDF, "rb") as f:
+        return f.read()
+
+def test_parallel_extraction_matches_sequential(pdf_bytes):
+    """Page-parallel extraction returns the same pages in the same order"""
+    sequential = extract_pdf_pages(pdf_bytes, workers=1)
+    parallel = extract_pdf_pages(pdf_bytes, workers=2, min_pages=1)
+
+    assert parallel == sequential
+    assert len(parallel) == 4
+
+def test_process_pool_is_sized_by_workers():
+    """`workers` sizes the pool; each size is created once and shared"""
+    assert get_process_pool(2) is get_process_pool(2)
+    assert get_process_pool(2)._max_workers == 2
+    assert get_process_pool(3)._max_workers == 3
+    assert get_process_pool() is get_process_pool(PDF_EXTRACT_WORKERS)
+
+def test_page_offsets_map_text_back_to_pages(pdf_bytes):
+    """Every page's text is found at its recorded offset"""
+    pdf_text = extract_pdf_text(pdf_bytes, workers=1)
+
+    for number, (page, offset) in enumerate(zip(pdf_text.pages, pdf_text.page_offsets), start=1):
+        assert pdf_text.text[offset:offset + len(page)] == page
+        if page:
+            assert pdf_text.page_for_offset(offset) == number
+
+def test_page_range_spans_page_boundaries():
+    pdf_text = PdfText(["first page", "second page", "third page"])
+    start = pdf_text.text.index("page")  # inside page 1
+    end = pdf_text.text.index("third") + 3  # inside page 3
+
+    assert pdf_text.page_range(start, end) == (1, 3)
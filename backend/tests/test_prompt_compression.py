@@ -0,0 +1,65 @@
+# tests/test_prompt_compression.py
+import re
+from app.utils import prompt_compression
+from app.utils.prompt_compression import compress_text, strip_repeated_lines, dedupe_paragraphs
+
+DISCLAIMER = (
+    "This document is for discussion purposes only and does not constitute an offer "
+    "to sell or a solicitation of an offer to buy any security."
+)
+
+def make_pages(count: int) -> str:
+    pages = []
+    for number in range(1, count + 1):
+        body = "\n".join(f"Clause {number}.{i}:   value   {i}" for i in range(12))
+        pages.append(f"ACME Bank - Indicative Terms\n\n{body}\n\n{DISCLAIMER}\n\nPage {number} of {count}")
+    return "\n\n\n".join(pages)
+
+def test_headers_footers_and_repeated_disclaimers_are_removed():
+    """Compaction drops boilerplate but keeps every term"""
+    text = make_pages(4)
+    result = compress_text(text, critical_only=False)
+    assert "ACME Bank" not in result.text and "Page 2 of 4" not in result.text
+    assert result.text.count(DISCLAIMER) == 1
+    assert "Clause 3.11: value 11" in result.text
+    assert result.removed == {"header_footer_lines": 8, "duplicate_paragraphs": 3}
+    assert 0 < result.tokens < result.original_tokens
+    assert result.report()["tokens_saved"] == result.original_tokens - result.tokens
+
+def test_close_repeats_and_short_paragraphs_are_kept():
+    """Field values repeated a few lines apart are terms, not page furniture"""
+    text = "\n".join(["Call Option:", "Not Applicable", "Put Option:", "Not Applicable"] * 3)
+    assert strip_repeated_lines(text) == (text, 0)
+    assert dedupe_paragraphs("N/A\n\nN/A") == ("N/A\n\nN/A", 0)
+
+def test_spaced_out_field_values_are_kept():
+    """Values recurring far apart, even on several pages, are terms too"""
+    terms = lambda page: "\n".join(f"Term {page}.{i}: value {i}" for i in range(10))
+    block = "Call Option:\nNot Applicable\nPut Option:\nNot Applicable\nMake-Whole Redemption:\nNot Applicable"
+    text = "\n".join(f"{block}\n{terms(n)}" for n in range(3))
+    assert strip_repeated_lines(text) == (text, 0)
+    pages = "\n".join(f"{terms(n)}\n{block}\n{terms(n + 3)}\nPage {n} of 3" for n in range(1, 4))
+    stripped, removed = strip_repeated_lines(pages)
+    assert removed == 3 and stripped.count("Not Applicable") == 9
+    top = "\n".join(f"{block}\n{terms(n)}\nPage {n} of 3" for n in range(1, 4))
+    stripped, removed = strip_repeated_lines(top)
+    assert removed == 3 and stripped == re.sub(r"\nPage \d of 3", "", top)
+
+def test_only_page_numbers_are_digit_normalised():
+    """Amounts that differ by a digit are different lines; page numbers are not"""
+    text = "\f".join(f"Redemption Amount: {100 + n}%\nTerm {n}\nPage {n}" for n in range(3))
+    result = compress_text(text, critical_only=False)
+    assert result.removed["header_footer_lines"] == 3
+    assert [f"Redemption Amount: {100 + n}%" in result.text for n in range(3)] == [True] * 3
+
+def test_critical_only_keeps_flagged_chunks_and_neighbours(monkeypatch):
+    """With critical_only, only detector-flagged chunks and their neighbours reach the prompt"""
+    import app.utils.critical_clause_detector as detector
+    chunks = [f"PART {i}\nSection body number {i}." for i in range(6)]
+    monkeypatch.setattr(prompt_compression, "chunk_document", lambda text: chunks)
+    monkeypatch.setattr(detector, "detect_critical_clauses", lambda c: {
+        "is_critical": True, "critical_chunks": [{"chunk_id": 3, "text": c[3]}]
+    })
+    result = compress_text("\n".join(chunks), critical_only=True, neighbors=1)
+    assert result.text == "\n\n".join(chunks[2:5])
+    assert result.removed["non_critical_chunks"] == 3
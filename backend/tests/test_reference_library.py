@@ -0,0 +1,120 @@
+# tests/test_reference_library.py
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.crud import reference_clause_ops
+from app.crud.reference_clause_ops import (
+    LibraryVersionConflict, decode_vectors, encode_vectors, list_libraries, publish_library
+)
+from app.database import Base
+from app.models.reference_clauses import ReferenceClause, ReferenceLibraryVersion
+from app.utils import reference_library
+from app.utils import embeddings
+from app.utils.clause_matcher import FaissClauseMatcher
+from app.utils.reference_library import SEED_CLAUSES, ReferenceLibraryStore
+
+CLAUSES = [
+    {"text": "The Notes bear interest at a fixed rate payable annually in arrear.", "critical": True},
+    {"text": "The Issuer may redeem the Notes early for tax reasons.", "critical": False},
+    {"text": "The Notes are governed by English law.", "critical": False},
+]
+
+@pytest.fixture
+def sessions(monkeypatch):
+    monkeypatch.setattr(embeddings, "EMBEDDING_BACKEND", "hashing")
+    monkeypatch.setattr(embeddings, "EMBEDDING_MODEL", None)
+    monkeypatch.setattr(embeddings, "_embedders", {})
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[ReferenceLibraryVersion.__table__, ReferenceClause.__table__])
+    return sessionmaker(bind=engine)
+
+class CountingEmbedder(embeddings.HashingEmbedder):
+    name = "hashing"
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def _embed(self, texts):
+        self.calls += 1
+        return super()._embed(texts)
+
+def test_vectors_round_trip_as_float32_bytes():
+    vectors = np.random.default_rng(0).standard_normal((4, 8)).astype(np.float32)
+    blobs = encode_vectors(vectors)
+    assert len(blobs[0]) == 8 * 4
+    assert np.array_equal(decode_vectors(blobs, 8), vectors)
+
+def test_published_versions_load_without_embedding(sessions):
+    with sessions() as db:
+        assert publish_library(db, CLAUSES[:2], "fixed_rate", "global")["version"] == 1
+        assert publish_library(db, CLAUSES, "fixed_rate", "global")["version"] == 2
+
+    counting = CountingEmbedder()
+    embeddings._embedders[("hashing", None)] = counting
+    store = ReferenceLibraryStore(session_factory=sessions)
+    library = store.library("fixed_rate")
+    assert library.version == 2 and library.critical == [True, False, False]
+    matcher = store.matcher(FaissClauseMatcher, "fixed_rate")
+    assert matcher.index.ntotal == 3
+    assert counting.calls == 0
+    assert store.matcher(FaissClauseMatcher, "fixed_rate") is matcher
+
+    # One batched search covers every document clause
+    matches = matcher.match([clause["text"] for clause in CLAUSES])
+    assert [m.similarity for m in matches] == pytest.approx([1.0, 1.0, 1.0])
+
+def test_library_fallbacks(sessions):
+    store = ReferenceLibraryStore(session_factory=sessions, refresh_seconds=3600)
+    assert store.library("floating_rate").clauses == list(SEED_CLAUSES)
+
+    with sessions() as db:
+        publish_library(db, CLAUSES, "base", "global")
+        publish_library(db, CLAUSES[:1], "floating_rate", "uk")
+    # Cached until invalidated (publishing through the API invalidates)
+    assert store.library("floating_rate").version == 0
+    store.invalidate()
+    assert store.library("floating_rate").key == ("base", "global", 1)
+    assert store.library("floating_rate", "uk").key == ("floating_rate", "uk", 1)
+
+    with sessions() as db:
+        assert [(l["product_type"], l["jurisdiction"], l["version"], l["clauses"]) for l in list_libraries(db)] == [
+            ("base", "global", 1, 3), ("floating_rate", "uk", 1, 1)
+        ]
+
+def test_unreachable_database_uses_seed_clauses():
+    def broken():
+        raise ConnectionError("database is down")
+
+    store = ReferenceLibraryStore(session_factory=broken)
+    assert store.library().version == 0
+
+def test_concurrent_publishes_get_distinct_versions(sessions, monkeypatch):
+    """A publish that loses the race for a version number retries with the next one"""
+    with sessions() as db:
+        publish_library(db, CLAUSES[:1], "fixed_rate", "global")
+
+    # Another process read the same max version before this one committed
+    stale = iter([1])
+    real_next_version = reference_clause_ops.next_version
+    monkeypatch.setattr(reference_clause_ops, "next_version", lambda *args: next(stale, None) or real_next_version(*args))
+    with sessions() as db:
+        assert publish_library(db, CLAUSES, "fixed_rate", "global")["version"] == 2
+        rows = db.query(ReferenceClause.version, ReferenceClause.text).order_by(ReferenceClause.id).all()
+    assert [version for version, _ in rows] == [1, 2, 2, 2]
+
+    with sessions() as db, pytest.raises(LibraryVersionConflict):
+        publish_library(db, CLAUSES, "fixed_rate", "global", version=2)
+
+def test_seeding_is_safe_across_workers(sessions, monkeypatch):
+    monkeypatch.setattr(reference_library, "_store", ReferenceLibraryStore(session_factory=sessions))
+    assert reference_library.seed_reference_library()["version"] == 1
+    assert reference_library.seed_reference_library() is None
+
+    # A worker that saw an empty database just before another one seeded it
+    monkeypatch.setattr(reference_clause_ops, "latest_versions", lambda db: {})
+    assert reference_library.seed_reference_library() is None
+    with sessions() as db:
+        assert [(l["version"], l["clauses"]) for l in list_libraries(db)] == [(1, len(SEED_CLAUSES))]
@@ -0,0 +1,79 @@
+# tests/test_rules.py
+import pytest
+from app.crud.validation_ops import ValidationOperations
+from app.validation.rules import RuleEngine, RuleError, get_rule_engine
+
+SECTIONS = "Issuer: ACME Bank plc. Interest: see below. Collateral: none. Maturity: 2030-06-30."
+
+def fired(report):
+    return [rule.id for rule in report.fired]
+
+def test_missing_sections_are_conclusive():
+    report = get_rule_engine().evaluate("Payment terms only, nothing else.")
+    assert fired(report) == ["section.interest", "section.collateral", "section.maturity", "section.issuer"]
+    assert report.conclusive
+    assert report.criticality_score == 100
+
+def test_product_type_selects_its_pack():
+    text = SECTIONS + " Floating rate of 3M EURIBOR plus a margin of 1.25%. Former LIBOR references apply."
+    report = get_rule_engine().evaluate(text, profile=True)
+    assert report.product_type == "floating_rate"
+    assert fired(report) == ["floating_rate.libor", "floating_rate.fallback"]
+    assert report.errors[0].description.startswith("References LIBOR")
+    assert not report.conclusive
+    assert "scan" in report.timings and "floating_rate.margin" in report.timings
+
+    # The same text evaluated as a fixed-rate note gets the fixed-rate rules instead
+    fixed = get_rule_engine().evaluate(text, product_type="fixed_rate")
+    assert fired(fixed) == ["fixed_rate.day_count"]
+
+def test_dates_and_spelled_percentages():
+    text = SECTIONS + " Issue date 2031-02-30, coupon 4.5 percent or 5  percent; reset 2025-13-01, 1850-01-01."
+    report = get_rule_engine().evaluate(text, product_type="base")
+    assert fired(report) == ["dates.valid", "format.spelled_percent"]
+    dates = [e.description for e in report.errors if e.type == "INVALID_DATE"]
+    assert dates == ["Invalid date: 1850-01-01", "Invalid date: 2025-13-01", "Invalid date: 2031-02-30"]
+    # `once`: one finding however many spelled percentages there are
+    assert len([e for e in report.errors if e.type == "FORMAT_ISSUE"]) == 1
+
+def test_terms_match_whole_words_only():
+    report = get_rule_engine().evaluate(
+        "Reissuers disinterest. Collateral. Maturity. Fixed day counting.", product_type="fixed_rate"
+    )
+    assert "section.issuer" in fired(report) and "section.interest" in fired(report)
+    assert "fixed_rate.day_count" in fired(report)
+
+def test_field_rules():
+    fields = {
+        "deal_name": "ACME 2030", "issuer": "ACME Bank plc", "amount": -5, "currency": "",
+        "issue_date": "2030-07-01", "maturity_date": "2030-06-30", "coupon_rate": 40,
+    }
+    report = get_rule_engine().evaluate(None, fields, "fixed_rate")
+    assert fired(report) == [
+        "fields.required", "fields.issue_before_maturity", "fields.amount_positive", "fixed_rate.coupon_range"
+    ]
+    assert report.errors[0].description == "Required field 'currency' could not be extracted"
+
+    result = ValidationOperations().validate_termsheet({**fields, "product_type": "fixed_rate"})
+    assert result["status"] == "failed"
+    assert result["fired"] == fired(report)
+
+def test_malformed_packs_are_rejected():
+    rule = {"kind": "required_term", "terms": ["x"], "type": "T", "section": "S", "severity": "LOW", "message": "m"}
+    with pytest.raises(RuleError, match="cycle"):
+        RuleEngine({"base": {"extends": "a"}, "a": {"extends": "base"}})
+    with pytest.raises(RuleError, match="Duplicate"):
+        RuleEngine({"base": {"rules": [{"id": "r", **rule}]}, "a": {"rules": [{"id": "r", **rule}]}})
+    with pytest.raises(RuleError, match="unknown kind"):
+        RuleEngine({"base": {"rules": [{"id": "r", **rule, "kind": "nope"}]}})
+    with pytest.raises(RuleError, match="unknown match"):
+        RuleEngine({"base": {"rules": [{"id": "r", **rule, "match": "substring"}]}})
+
+@pytest.mark.parametrize("text", [
+    "Collateralised notes. Interest-bearing. Issuers: ACME Bank plc. Maturity: 2030.",
+    "The issuer's interest/coupon terms, collateral-free, matures at MATURITY.",
+])
+def test_section_terms_accept_inflected_spellings(text):
+    report = get_rule_engine().evaluate(text, product_type="base")
+    assert not [rule for rule in fired(report) if rule.startswith("section.")]
+    assert not report.conclusive
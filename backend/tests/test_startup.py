@@ -0,0 +1,97 @@
+# tests/test_startup.py
+import os
+import sys
+import json
+import asyncio
+import subprocess
+import httpx
+from fastapi import FastAPI
+from app.routers.health import router as health_router
+from app.startup import readiness
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Seconds allowed for `import app.main` in a fresh interpreter
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", "2.0"))
+HEAVY_MODULES = ["faiss", "ollama", "sentence_transformers", "torch", "onnxruntime", "pyarrow", "pytesseract"]
+
+def test_app_import_is_fast_and_lazy():
+    """Importing the app stays within budget and loads no models or heavy libraries"""
+    code = (
+        "import sys, time, json\n"
+        "start = time.perf_counter()\n"
+        "import app.main\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", code],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    assert report["loaded"] == []
+    assert report["seconds"] < IMPORT_TIME_BUDGET, f"import app.main took {report['seconds']:.2f}s"
+
+def test_readiness_reports_database_and_models(monkeypatch):
+    """/health/live always answers; /health/ready waits for the DB and optionally the models"""
+    app = FastAPI()
+    app.include_router(health_router)
+    monkeypatch.setitem(readiness, "database", False)
+    monkeypatch.setitem(readiness, "models_warm", False)
+
+    async def get(path):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path)
+
+    assert asyncio.run(get("/health/live")).status_code == 200
+    assert asyncio.run(get("/health/ready")).status_code == 503
+
+    readiness["database"] = True
+    assert asyncio.run(get("/health/ready")).status_code == 200
+    response = asyncio.run(get("/health/ready?require_models=true"))
+    assert response.status_code == 503 and response.json()["models_warm"] is False
+
+def test_warm_up_records_each_step(monkeypatch):
+    """A failing step is reported and leaves models_warm False without stopping later steps"""
+    from app.startup import warm_up
+    monkeypatch.setitem(readiness, "errors", {})
+    monkeypatch.setitem(readiness, "warmup_steps", {})
+    calls = []
+
+    def broken():
+        raise ConnectionError("ollama down")
+
+    steps = [("first", lambda: calls.append("first")), ("ollama_keep_alive", broken), ("last", lambda: calls.append("last"))]
+    asyncio.run(warm_up(steps))
+    assert calls == ["first", "last"]
+    assert readiness["models_warm"] is False
+    assert set(readiness["warmup_steps"]) == {"first", "ollama_keep_alive", "last"}
+    assert "ollama down" in readiness["errors"]["ollama_keep_alive"]
+
+    asyncio.run(warm_up(steps[:1]))
+    assert readiness["models_warm"] is True
+
+def test_load_embedder_warms_query_and_chunk_embedders(monkeypatch):
+    """Both embedders are loaded at startup; a shared instance is warmed once"""
+    import app.utils.embeddings as embeddings
+    from app.startup import _load_embedder
+    warmed = []
+
+    class Recorder:
+        def __init__(self, name):
+            self.name = name
+
+        def embed_one(self, text):
+            warmed.append(self.name)
+
+    query, chunk = Recorder("query"), Recorder("chunk")
+    monkeypatch.setattr(embeddings, "get_embedder", lambda: query)
+    monkeypatch.setattr(embeddings, "get_chunk_embedder", lambda: chunk)
+    _load_embedder()
+    assert warmed == ["query", "chunk"]
+
+    warmed.clear()
+    monkeypatch.setattr(embeddings, "get_chunk_embedder", lambda: query)
+    _load_embedder()
+    assert warmed == ["query"]
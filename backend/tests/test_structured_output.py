@@ -0,0 +1,75 @@
+# tests/test_structured_output.py
+import json
+import asyncio
+import httpx
+import pytest
+from app.utils.llm_client import LLMClient, set_llm_client
+from app.utils.structured_output import VALIDATION_SCHEMA, repair_json, coerce_output, parse_validation_output
+
+def test_schema_is_inlined_for_ollama():
+    """Ollama's format takes a self-contained schema"""
+    assert "$defs" not in json.dumps(VALIDATION_SCHEMA)
+    severity = VALIDATION_SCHEMA["properties"]["errors"]["items"]["properties"]["severity"]
+    assert severity["enum"] == ["CRITICAL", "HIGH", "MEDIUM", "LOW"]
+
+@pytest.mark.parametrize("raw, expected", [
+    ('Here you go:\n```json\n{"a": [1, 2,],}\n```', {"a": [1, 2]}),
+    ('{"ok": True, "none": None, "text": "True"} trailing notes', {"ok": True, "none": None, "text": "True"}),
+    ('{"errors": [{"type": "DATE"}], "validation_summary": "Dates are inconsi', {
+        "errors": [{"type": "DATE"}], "validation_summary": "Dates are inconsi"
+    }),
+    ('{"errors": [], "criticality_score": 40, "validation_', {"errors": [], "criticality_score": 40}),
+])
+def test_repair_json(raw, expected):
+    assert repair_json(raw) == expected
+
+def test_coerce_output_normalises_fields():
+    recovered, bad = coerce_output({
+        "errors": [
+            {"error_type": "DATE", "message": "Bad date", "severity": "high"},
+            {"type": "CALCULATION"},
+        ],
+        "criticality_score": "85.0",
+        "validation_summary": {"risk_rating": "BBB"},
+    })
+    assert recovered["errors"][0].severity.value == "HIGH" and recovered["errors"][0].section == "Document"
+    assert bad == [{"type": "CALCULATION"}]
+    assert recovered["criticality_score"] == 85
+    assert recovered["validation_summary"] == "risk_rating: BBB"
+
+def test_only_broken_parts_are_re_requested():
+    """A malformed finding and a missing summary cost two small calls, not a full regeneration"""
+    prompts = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        prompts.append(body["prompt"])
+        if body["prompt"].startswith("Rewrite"):
+            reply = {"type": "CALCULATION", "description": "Coupon math is off", "section": "Interest", "severity": "MEDIUM"}
+        else:
+            reply = {"validation_summary": "Moderate risk."}
+        return httpx.Response(200, json={"response": json.dumps(reply)})
+
+    async def regenerate():
+        raise AssertionError("full regeneration should not be needed")
+
+    raw = '```json\n{"errors": [{"type": "DATE", "description": "Bad date", "section": "Dates", "severity": "LOW"}, {"type": "CALCULATION"},], "criticality_score": 40'
+    saved = set_llm_client(LLMClient(async_transport=httpx.MockTransport(handler)))
+    try:
+        result = asyncio.run(parse_validation_output(raw, model="mistral", regenerate=regenerate))
+    finally:
+        set_llm_client(saved)
+    assert len(prompts) == 2
+    assert [e["type"] for e in result["errors"]] == ["DATE", "CALCULATION"]
+    assert result["criticality_score"] == 40 and result["validation_summary"] == "Moderate risk."
+
+def test_unreadable_output_regenerates_once():
+    calls = []
+
+    async def regenerate():
+        calls.append(1)
+        return json.dumps({"errors": [], "validation_summary": "Clean."})
+
+    result = asyncio.run(parse_validation_output("I cannot comply.", model="mistral", regenerate=regenerate))
+    assert calls == [1]
+    assert result == {"errors": [], "criticality_score": 0, "validation_summary": "Clean."}
@@ -0,0 +1,61 @@
+# tests/test_tracing.py
+import asyncio
+from fastapi import FastAPI
+import httpx
+from app.utils import tracing
+from app.utils.tracing import Histogram, TimingMiddleware, span, traced
+
+def test_histogram_exposition_is_cumulative():
+    hist = Histogram("stage_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        hist.observe(("embedding",), value)
+    lines = hist.expose()
+    assert 'stage_seconds_bucket{stage="embedding",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="embedding",le="1.0"} 3' in lines
+    assert 'stage_seconds_bucket{stage="embedding",le="+Inf"} 4' in lines
+    assert 'stage_seconds_count{stage="embedding"} 4' in lines
+
+def test_traced_handles_sync_and_async(monkeypatch):
+    """Both kinds of function are timed and keep their return values"""
+    recorded = []
+    monkeypatch.setattr(tracing, "record_span", lambda name, seconds: recorded.append(name))
+
+    @traced("sync_stage")
+    def work():
+        return 1
+
+    @traced("async_stage")
+    async def async_work():
+        return 2
+
+    assert work() == 1
+    assert asyncio.run(async_work()) == 2
+    assert recorded == ["sync_stage", "async_stage"]
+
+def test_server_timing_header_on_request():
+    """Spans from sync endpoints (run in a thread) reach the response header"""
+    app = FastAPI()
+    app.add_middleware(TimingMiddleware)
+
+    @app.get("/work")
+    def work():
+        with span("extract_text"):
+            pass
+        with span("embedding"):
+            pass
+        with span("embedding"):
+            pass
+        return {"ok": True}
+
+    async def fetch(headers):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/work", headers=headers)
+
+    assert "server-timing" not in asyncio.run(fetch({})).headers
+
+    header = asyncio.run(fetch({"X-Request-Timing": "1"})).headers["server-timing"]
+    assert "extract_text;dur=" in header
+    assert 'embedding;dur=' in header and 'desc="2x"' in header
+    assert "total;dur=" in header
+    assert 'route="/work"' in tracing.render_metrics()
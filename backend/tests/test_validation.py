@@ -12,10 +12,17 @@ def test_chunk_text():
     Section 2. Terms
     These are the terms.
     """
-    chunks = chunk_text(text)
+    chunks = chunk_text(text, chunk_size=60, overlap=10)
     assert len(chunks) >= 2
     assert "Section 1" in chunks[0]
-    assert "Section 2" in chunks[1]
+    assert "Section 2" in chunks[-1]
+    # Every window starts inside the previous one, and together they cover the text
+    starts = [text.find(chunks[0])]
+    for previous, chunk in zip(chunks, chunks[1:]):
+        start = text.find(chunk, starts[-1] + 1)
+        assert starts[-1] < start < starts[-1] + len(previous)
+        starts.append(start)
+    assert starts[0] == 0 and starts[-1] + len(chunks[-1]) == len(text)
 
 @pytest.mark.asyncio
 async def test_validation_engine():